@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+# Credenciais do usuário de demonstração (ver services/auth_service.verify_user)
+USERNAME = "admin"
+PASSWORD = "admin"
+
+# Requisição de um cenário: (método, caminho, argumentos do httpx)
+RequestSpec = Tuple[str, str, dict]
+
+
+def _theme(index: int) -> str:
+    return f"Tema {index}"[:20]
+
+
+# Cenários disponíveis: cada um gera a requisição de número `index`
+SCENARIOS: Dict[str, Callable[[int], RequestSpec]] = {
+    "auth_token": lambda index: (
+        "POST", "/auth/token", {"data": {"username": USERNAME, "password": PASSWORD}}),
+    "generate_question": lambda index: (
+        "POST", "/questions/v1/generate-question", {"json": {"theme": _theme(index)}}),
+    "generate_question_stream": lambda index: (
+        "POST", "/questions/v1/generate-question/stream", {"json": {"theme": _theme(index)}}),
+    "generate_question_v2": lambda index: (
+        "POST", "/questions/v2/generate-question", {"json": {"theme": _theme(index), "quantity": 5}}),
+    "generate_question_v2_batched": lambda index: (
+        "POST", "/questions/v2/generate-question",
+        {"json": {"theme": _theme(index), "quantity": 5}, "params": {"batched": "true"}}),
+    "analyze_response": lambda index: (
+        "POST", "/questions/v1/analyze-response",
+        {"json": {"question": {"question": "O que é fotossíntese?"}, "answer": {"answer": f"Resposta {index}"}}}),
+    "analyze_responses": lambda index: (
+        "POST", "/questions/v1/analyze-responses",
+        {"json": [{"question": f"Pergunta {item}?", "answer": f"Resposta {index}"} for item in range(10)]}),
+}
+
+DEFAULT_SCENARIOS = ["auth_token", "generate_question", "generate_question_v2", "analyze_response"]
+
+
+def percentile(values: List[float], quantile: float) -> float:
+    """
+    Calcula o percentil pelo método do posto mais próximo.
+
+    Args:
+        values (List[float]): As amostras.
+        quantile (float): O quantil desejado, de 0 a 1.
+
+    Returns:
+        float: O percentil, ou 0 se não houver amostras.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(quantile * len(ordered)) - 1)]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    """
+    Resume as medições de um cenário.
+
+    Args:
+        latencies (List[float]): Duração, em segundos, das requisições bem-sucedidas.
+        errors (int): Quantidade de requisições com falha (status >= 400 ou erro de conexão).
+        elapsed (float): Duração da medição, em segundos.
+
+    Returns:
+        dict: Requisições, vazão (RPS), taxa de erros e latências p50/p95/p99, média e máxima (em ms).
+    """
+    total = len(latencies) + errors
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "rps": round(total / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.15, error_margin: float = 0.01) -> List[str]:
+    """
+    Compara os resultados com uma execução de referência.
+
+    Há regressão quando, em algum cenário presente em ambas, a latência p95 ou p99 cresce
+    mais que `tolerance`, a vazão cai mais que `tolerance` ou a taxa de erros sobe mais que
+    `error_margin`.
+
+    Args:
+        results (dict): Os resultados atuais (ver `run_benchmark`).
+        baseline (dict): Os resultados de referência.
+        tolerance (float): Variação relativa tolerada da latência e da vazão.
+        error_margin (float): Aumento absoluto tolerado da taxa de erros.
+
+    Returns:
+        List[str]: A descrição de cada regressão encontrada (vazia se não houver).
+    """
+    regressions = []
+    for name, current in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        for metric in ("p95_ms", "p99_ms"):
+            if reference[metric] > 0 and current[metric] > reference[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {reference[metric]} -> {current[metric]}")
+        if reference["rps"] > 0 and current["rps"] < reference["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {reference['rps']} -> {current['rps']}")
+        if current["error_rate"] > reference["error_rate"] + error_margin:
+            regressions.append(f"{name}: error_rate {reference['error_rate']} -> {current['error_rate']}")
+    return regressions
+
+
+def configure_environment(args: argparse.Namespace):
+    """
+    Configura a aplicação para usar o provedor local simulado, com a latência e a taxa de
+    erros informadas, e recarrega as configurações.
+
+    Args:
+        args (argparse.Namespace): Os argumentos da linha de comando.
+    """
+    from config import get_settings
+
+    # Credenciais fictícias apenas se não houver configuração
+    os.environ.setdefault("GROQ_API_KEY", "benchmark")
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    os.environ.setdefault("ALGORITHM", "HS256")
+    os.environ.update({
+        "LLM_STUB_ENABLED": "true",
+        "LLM_DEFAULT_PROVIDER": "stub",
+        "LLM_STUB_LATENCY": str(args.latency),
+        "LLM_STUB_LATENCY_JITTER": str(args.jitter),
+        "LLM_STUB_LATENCY_DISTRIBUTION": args.distribution,
+        "LLM_STUB_ERROR_RATE": str(args.error_rate),
+        "LLM_STUB_SEED": str(args.seed),
+        "QUESTION_POOL_ENABLED": "false",
+    })
+    get_settings.cache_clear()
+
+
+async def _token(client: httpx.AsyncClient) -> str:
+    response = await client.post("/auth/token", data={"username": USERNAME, "password": PASSWORD})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, concurrency: int, duration: float,
+                       warmup: float, headers: dict) -> dict:
+    """
+    Executa um cenário em malha fechada: `concurrency` clientes enviam requisições em
+    sequência, cada um aguardando a resposta (inteira, inclusive em streaming) antes da
+    próxima. As requisições do aquecimento não entram nas medições.
+
+    Args:
+        client (httpx.AsyncClient): O cliente HTTP.
+        name (str): O nome do cenário.
+        concurrency (int): Quantidade de clientes simultâneos.
+        duration (float): Duração da medição, em segundos.
+        warmup (float): Duração do aquecimento, em segundos.
+        headers (dict): Cabeçalhos das requisições (ex.: autenticação).
+
+    Returns:
+        dict: O resumo das medições (ver `summarize`).
+    """
+    build = SCENARIOS[name]
+    latencies: List[float] = []
+    errors = 0
+    counter = 0
+    started = time.perf_counter()
+    measuring_from = started + warmup
+    deadline = measuring_from + duration
+
+    async def user():
+        nonlocal errors, counter
+        while time.perf_counter() < deadline:
+            counter += 1
+            method, path, options = build(counter)
+            request_started = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers, **options)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            finished = time.perf_counter()
+            if request_started < measuring_from:
+                continue
+            if failed:
+                errors += 1
+            else:
+                latencies.append(finished - request_started)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - measuring_from)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    """
+    Executa os cenários escolhidos, em sequência, contra a aplicação em processo (com o
+    provedor simulado) ou contra um servidor em execução (`--url`).
+
+    Args:
+        args (argparse.Namespace): Os argumentos da linha de comando.
+
+    Returns:
+        dict: A configuração da execução e o resumo de cada cenário.
+    """
+    results = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "target": args.url or "in-process",
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "distribution": args.distribution,
+            "error_rate": args.error_rate,
+        },
+        "scenarios": {},
+    }
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout)
+        lifespan = None
+    else:
+        configure_environment(args)
+        from main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark",
+                                   timeout=args.timeout)
+        lifespan = app.router.lifespan_context(app)
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            headers = {"Authorization": f"Bearer {await _token(client)}"}
+            for name in args.scenarios:
+                logger.info("Executando o cenário %s (%d clientes, %.0fs).", name, args.concurrency, args.duration)
+                summary = await run_scenario(client, name, args.concurrency, args.duration, args.warmup, headers)
+                results["scenarios"][name] = summary
+                logger.info("%s: %s", name, json.dumps(summary))
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+    return results
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Teste de carga e de latência da API com o provedor simulado.")
+    parser.add_argument("--scenarios", nargs="+", default=DEFAULT_SCENARIOS, choices=sorted(SCENARIOS),
+                        help="Cenários a executar, em sequência")
+    parser.add_argument("--concurrency", type=int, default=32, help="Clientes simultâneos")
+    parser.add_argument("--duration", type=float, default=10.0, help="Duração de cada cenário, em segundos")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Aquecimento de cada cenário, em segundos")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latência simulada do modelo, em segundos")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Variação da latência (desvio do logaritmo na distribuição lognormal)")
+    parser.add_argument("--distribution", default="uniform", choices=["uniform", "lognormal", "exponential"],
+                        help="Distribuição da latência simulada")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Taxa de falhas simuladas do modelo")
+    parser.add_argument("--seed", type=int, default=42, help="Semente das latências e falhas simuladas")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Tempo limite de cada requisição, em segundos")
+    parser.add_argument("--url", help="URL de um servidor em execução (com LLM_STUB_ENABLED=true), em vez da "
+                                      "aplicação em processo")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: saída padrão)")
+    parser.add_argument("--baseline", help="Arquivo JSON de referência para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.15,
+                        help="Variação relativa tolerada de latência e vazão em relação à referência")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.duration <= 0 or args.warmup < 0:
+        parser.error("--concurrency e --duration devem ser positivos e --warmup não pode ser negativo.")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Executa o teste de carga, grava os resultados em JSON e, com `--baseline`, retorna
+    o código de saída 1 se houver regressão.
+
+    Ex.: `python -m benchmarks.load_test --concurrency 64 --distribution lognormal --jitter 0.5
+    --output benchmarks/results/atual.json --baseline benchmarks/results/referencia.json`.
+    """
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    logger.setLevel(logging.INFO)
+    args = parse_args(argv)
+    results = asyncio.run(run_benchmark(args))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance)
+        results["baseline"] = {"path": args.baseline, "commit": baseline.get("meta", {}).get("commit"),
+                               "regressions": regressions}
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    regressions = results.get("baseline", {}).get("regressions")
+    if regressions:
+        for regression in regressions:
+            logger.error("Regressão: %s", regression)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
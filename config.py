@@ -0,0 +1,196 @@
+from functools import lru_cache
+from typing import List, Literal, Optional
+
+import jwt
+from pydantic import Field, field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+
+
+class Settings(BaseSettings):
+    """
+    Configurações da aplicação, carregadas uma única vez das variáveis de ambiente
+    (ou do arquivo `.env`) e validadas na inicialização.
+
+    Cada atributo corresponde à variável de ambiente de mesmo nome em maiúsculas
+    (ex.: `groq_api_key` -> `GROQ_API_KEY`). Ver `.env-sample`.
+    """
+    model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
+
+    # Autenticação
+    secret_key: str = Field(..., min_length=1, description="Chave secreta de assinatura dos tokens JWT")
+    algorithm: str = Field(..., description="Algoritmo de assinatura dos tokens JWT")
+    access_token_expire_minutes: float = Field(30, gt=0, description="Validade do token de acesso em minutos")
+
+    # API Groq e pool de conexões
+    groq_api_key: str = Field(..., min_length=1, description="Chave da API Groq")
+    groq_max_connections: int = Field(100, gt=0)
+    groq_max_keepalive_connections: int = Field(20, ge=0)
+    groq_keepalive_expiry: float = Field(30, ge=0)
+    groq_timeout: float = Field(60, gt=0)
+    groq_model: str = "llama3-70b-8192"
+
+    # Concorrência e geração em lote
+    groq_max_concurrency_per_request: int = Field(5, gt=0)
+    groq_max_concurrency: int = Field(50, gt=0)
+    groq_batch_size: int = Field(10, gt=0)
+    groq_batch_generation: bool = False
+    groq_coalesce_requests: bool = True
+    groq_bulk_concurrency: int = Field(20, gt=0)
+    bulk_grading_max_items: int = Field(1000, gt=0)
+    generation_max_items: int = Field(100, gt=0)
+
+    # Controle de ritmo das chamadas à API Groq (0 desabilita a cota correspondente)
+    groq_requests_per_minute: int = Field(0, ge=0)
+    groq_tokens_per_minute: int = Field(0, ge=0)
+    groq_initial_concurrency: int = Field(16, gt=0)
+    groq_min_concurrency: int = Field(1, gt=0)
+    groq_adaptive_max_concurrency: int = Field(64, gt=0)
+    groq_latency_threshold: float = Field(10, gt=0)
+    groq_queue_timeout: float = Field(30, gt=0)
+
+    # Cotas e fila justa por usuário (0 desabilita o limite correspondente): tokens por minuto
+    # e saldo máximo de cada usuário, chamadas simultâneas ao modelo (total e por usuário),
+    # chamadas em espera por usuário antes das recusas (429) e pesos no formato `usuario=peso,...`
+    tenant_tokens_per_minute: int = Field(0, ge=0)
+    tenant_token_burst: int = Field(0, ge=0)
+    fair_queue_concurrency: int = Field(0, ge=0)
+    tenant_max_concurrency: int = Field(0, ge=0)
+    tenant_max_queued: int = Field(0, ge=0)
+    tenant_weights: str = ""
+
+    # Novas tentativas, tempo limite por tentativa e hedge das chamadas à API Groq
+    groq_retry_max_attempts: int = Field(3, gt=0)
+    groq_retry_base_delay: float = Field(0.5, ge=0)
+    groq_retry_max_delay: float = Field(8, ge=0)
+    groq_retry_budget_ratio: float = Field(0.2, ge=0)
+    groq_call_timeout: float = Field(30, gt=0)
+    groq_hedging_enabled: bool = False
+    groq_hedge_quantile: float = Field(0.95, gt=0, lt=1)
+    groq_hedge_min_delay: float = Field(1, ge=0)
+
+    # Disjuntor das chamadas à API Groq
+    groq_breaker_failure_threshold: int = Field(5, gt=0)
+    groq_breaker_recovery_timeout: float = Field(30, gt=0)
+
+    # Provedores de LLM: padrão, por rota (vazio usa o padrão) e backends adicionais
+    llm_default_provider: str = "groq"
+    llm_question_provider: str = ""
+    llm_analysis_provider: str = ""
+    openai_compatible_base_url: str = ""
+    openai_compatible_api_key: str = ""
+    openai_compatible_model: str = ""
+    llm_stub_enabled: bool = False
+    llm_stub_latency: float = Field(0.05, ge=0)
+    llm_stub_latency_jitter: float = Field(0, ge=0)
+    llm_stub_latency_distribution: Literal["uniform", "lognormal", "exponential"] = "uniform"
+    llm_stub_error_rate: float = Field(0, ge=0, le=1)
+    llm_stub_seed: Optional[int] = None
+    llm_json_mode: bool = True
+
+    # Roteamento de modelos por tarefa e tamanho da entrada (ver services/model_router.py)
+    llm_model_routes: str = ""
+    llm_model_prices: str = "llama3-8b-8192:0.05,llama3-70b-8192:0.59"
+
+    # Cache de avaliações
+    assessment_cache_backend: Literal["memory", "sqlite", "none"] = "memory"
+    assessment_cache_max_size: int = Field(10000, gt=0)
+    assessment_cache_ttl: float = Field(3600, gt=0)
+    assessment_cache_sqlite_path: str = "assessment_cache.db"
+    assessment_cache_sqlite_max_size: int = Field(100000, gt=0)
+
+    # Reaproveitamento da avaliação de respostas quase idênticas à mesma pergunta
+    # (similaridade de 0 a 1 entre os conjuntos de palavras normalizadas). O padrão 1 exige as
+    # mesmas palavras; limiares menores aumentam o reaproveitamento ao custo da precisão
+    similarity_cache_enabled: bool = False
+    similarity_threshold: float = Field(1.0, gt=0, le=1)
+    similarity_max_questions: int = Field(1000, gt=0)
+    similarity_max_answers: int = Field(1000, gt=0)
+
+    # Reserva de questões pré-geradas
+    question_pool_enabled: bool = False
+    question_pool_themes: str = ""
+    question_pool_low_watermark: int = Field(5, ge=0)
+    question_pool_high_watermark: int = Field(20, gt=0)
+    question_pool_max_themes: int = Field(1000, gt=0)
+    question_pool_auto_register_after: int = Field(0, ge=0)
+
+    # Fila de tarefas assíncronas (0 workers apenas enfileira, para consumo por `worker.py`)
+    job_queue_backend: Literal["memory", "sqlite"] = "memory"
+    job_queue_sqlite_path: str = "jobs.db"
+    job_workers: int = Field(4, ge=0)
+    job_worker_processes: int = Field(1, gt=0)
+    job_poll_interval: float = Field(0.5, gt=0)
+    job_timeout: float = Field(3600, gt=0)
+    job_result_ttl: float = Field(86400, gt=0)
+    job_max_items: int = Field(20000, gt=0)
+    job_drain_timeout: float = Field(10, ge=0)
+
+    # Métricas no formato do Prometheus (/metrics)
+    metrics_enabled: bool = True
+
+    # Rastreamento das requisições (spans no formato do OpenTelemetry): none, console ou file
+    tracing_exporter: Literal["none", "console", "file"] = "none"
+    tracing_file_path: str = "traces.jsonl"
+    tracing_sample_rate: float = Field(1.0, ge=0, le=1)
+
+    # Registro (logs) assíncrono: nível, formato (json ou text), capacidade da fila e
+    # amostragem dos registros INFO acima de N por segundo (0 desabilita a amostragem)
+    log_level: Literal["DEBUG", "INFO", "WARNING", "ERROR"] = "INFO"
+    log_format: Literal["json", "text"] = "json"
+    log_queue_size: int = Field(10000, ge=0)
+    log_sample_after: int = Field(200, ge=0)
+    log_sample_rate: float = Field(0.1, ge=0, le=1)
+
+    # Servidor de produção (serve.py); 0 workers usa a quantidade de CPUs disponíveis. Vários
+    # processos exigem a fila de tarefas em SQLite, e as cotas por minuto valem por processo
+    server_host: str = "0.0.0.0"
+    server_port: int = Field(8000, gt=0)
+    server_workers: int = Field(1, ge=0)
+    server_backlog: int = Field(2048, gt=0)
+    server_keepalive_timeout: int = Field(5, gt=0)
+    server_limit_concurrency: Optional[int] = Field(None, gt=0)
+    server_limit_max_requests: Optional[int] = Field(None, gt=0)
+    server_graceful_timeout: int = Field(30, gt=0)
+    server_forwarded_allow_ips: str = "127.0.0.1"
+    server_access_log: bool = False
+
+    @field_validator("algorithm")
+    def validate_algorithm(cls, value: str) -> str:
+        """
+        Validador que garante que o algoritmo JWT é suportado pelo PyJWT.
+
+        Args:
+            value (str): O algoritmo configurado.
+
+        Returns:
+            str: O algoritmo validado.
+
+        Raises:
+            ValueError: Se o algoritmo não for suportado.
+        """
+        if value not in jwt.algorithms.get_default_algorithms():
+            raise ValueError(f"Algoritmo JWT não suportado: {value}")
+        return value
+
+    @property
+    def question_pool_theme_list(self) -> List[str]:
+        """
+        Lista de temas a serem pré-gerados, a partir de `QUESTION_POOL_THEMES` (separados por vírgula).
+        """
+        return [theme.strip() for theme in self.question_pool_themes.split(",") if theme.strip()]
+
+
+@lru_cache
+def get_settings() -> Settings:
+    """
+    Retorna as configurações da aplicação, carregadas e validadas na primeira chamada.
+
+    Pode ser usada como dependência do FastAPI (`Depends(get_settings)`).
+
+    Returns:
+        Settings: As configurações da aplicação.
+
+    Raises:
+        pydantic.ValidationError: Se alguma configuração obrigatória estiver ausente ou inválida.
+    """
+    return Settings()
@@ -1,11 +1,196 @@
-import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
-from routes import auth_routes, questions_routes
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+from config import Settings, get_settings
+from routes import auth_routes, jobs_routes, metrics_routes, questions_routes
+from services.assessment_cache import build_assessment_cache
+from services.circuit_breaker import CircuitBreaker
+from services.fair_scheduler import FairScheduler, TenantBudgets, parse_tenant_weights
+from services.groq_service import AsyncGroqService
+from services.job_handlers import build_job_handlers
+from services.job_queue import JobQueue, build_job_store
+from services.llm_providers import OpenAICompatibleProvider, StubProvider
+from services.logging_config import LoggingPipeline, configure_logging
+from services.metrics import MetricsMiddleware
+from services.model_router import ModelRouter, parse_model_prices, parse_model_routes
+from services.question_pool import QuestionPool
+from services.rate_limiter import RateGovernor
+from services.resilience import RetryBudget, RetryPolicy
+from services.similarity_index import SimilarAssessmentIndex
+from services.tracing import TracingMiddleware, build_span_exporter, tracer
+
+
+def setup_logging(settings: Settings) -> LoggingPipeline:
+    """
+    Configura o registro (logs) assíncrono do processo a partir das configurações.
+
+    Usada pela aplicação, pelo servidor de produção (`serve.py`) e pelos processos de
+    trabalho da fila de tarefas (`worker.py`).
+
+    Args:
+        settings (Settings): Configurações da aplicação.
+
+    Returns:
+        LoggingPipeline: O registro configurado, a ser encerrado com `stop`.
+    """
+    return configure_logging(
+        level=settings.log_level,
+        log_format=settings.log_format,
+        queue_size=settings.log_queue_size,
+        sample_after=settings.log_sample_after,
+        sample_rate=settings.log_sample_rate
+    )
+
+
+def build_groq_service(settings: Settings) -> AsyncGroqService:
+    """
+    Cria o AsyncGroqService a partir das configurações, com os provedores de LLM, o
+    controle de ritmo, as novas tentativas, o disjuntor, o roteamento de modelos e as
+    cotas e a fila justa por usuário.
+
+    Usada pela aplicação e pelos processos de trabalho da fila de tarefas (`worker.py`).
+
+    Args:
+        settings (Settings): Configurações da aplicação.
+
+    Returns:
+        AsyncGroqService: O serviço configurado.
+    """
+    providers = {}
+    if settings.openai_compatible_base_url:
+        providers["openai"] = OpenAICompatibleProvider(
+            base_url=settings.openai_compatible_base_url,
+            model=settings.openai_compatible_model,
+            api_key=settings.openai_compatible_api_key or None,
+            timeout=settings.groq_timeout
+        )
+    if settings.llm_stub_enabled:
+        providers["stub"] = StubProvider(
+            latency=settings.llm_stub_latency,
+            latency_jitter=settings.llm_stub_latency_jitter,
+            latency_distribution=settings.llm_stub_latency_distribution,
+            error_rate=settings.llm_stub_error_rate,
+            seed=settings.llm_stub_seed
+        )
+    return AsyncGroqService(
+        api_key=settings.groq_api_key,
+        max_connections=settings.groq_max_connections,
+        max_keepalive_connections=settings.groq_max_keepalive_connections,
+        keepalive_expiry=settings.groq_keepalive_expiry,
+        timeout=settings.groq_timeout,
+        max_concurrency_per_request=settings.groq_max_concurrency_per_request,
+        max_concurrency=settings.groq_max_concurrency,
+        batch_size=settings.groq_batch_size,
+        batch_generation=settings.groq_batch_generation,
+        assessment_cache=build_assessment_cache(
+            backend=settings.assessment_cache_backend,
+            max_size=settings.assessment_cache_max_size,
+            ttl=settings.assessment_cache_ttl,
+            sqlite_path=settings.assessment_cache_sqlite_path,
+            sqlite_max_size=settings.assessment_cache_sqlite_max_size
+        ),
+        similarity_index=SimilarAssessmentIndex(
+            threshold=settings.similarity_threshold,
+            max_questions=settings.similarity_max_questions,
+            max_answers=settings.similarity_max_answers
+        ) if settings.similarity_cache_enabled else None,
+        coalesce_requests=settings.groq_coalesce_requests,
+        rate_governor=RateGovernor(
+            requests_per_minute=settings.groq_requests_per_minute,
+            tokens_per_minute=settings.groq_tokens_per_minute,
+            initial_concurrency=settings.groq_initial_concurrency,
+            min_concurrency=settings.groq_min_concurrency,
+            max_concurrency=settings.groq_adaptive_max_concurrency,
+            latency_threshold=settings.groq_latency_threshold,
+            queue_timeout=settings.groq_queue_timeout
+        ),
+        retry_policy=RetryPolicy(
+            max_attempts=settings.groq_retry_max_attempts,
+            base_delay=settings.groq_retry_base_delay,
+            max_delay=settings.groq_retry_max_delay,
+            timeout=settings.groq_call_timeout,
+            budget=RetryBudget(ratio=settings.groq_retry_budget_ratio),
+            hedging=settings.groq_hedging_enabled,
+            hedge_quantile=settings.groq_hedge_quantile,
+            hedge_min_delay=settings.groq_hedge_min_delay
+        ),
+        circuit_breaker=CircuitBreaker(
+            failure_threshold=settings.groq_breaker_failure_threshold,
+            recovery_timeout=settings.groq_breaker_recovery_timeout
+        ),
+        model=settings.groq_model,
+        providers=providers,
+        default_provider=settings.llm_default_provider,
+        model_router=ModelRouter(
+            rules=parse_model_routes(settings.llm_model_routes),
+            prices=parse_model_prices(settings.llm_model_prices)
+        ),
+        json_mode=settings.llm_json_mode,
+        bulk_concurrency=settings.groq_bulk_concurrency,
+        tenant_budgets=TenantBudgets(
+            tokens_per_minute=settings.tenant_tokens_per_minute,
+            burst=settings.tenant_token_burst or None
+        ) if settings.tenant_tokens_per_minute else None,
+        fair_scheduler=FairScheduler(
+            concurrency=settings.fair_queue_concurrency,
+            tenant_concurrency=settings.tenant_max_concurrency,
+            tenant_max_queued=settings.tenant_max_queued,
+            weights=parse_tenant_weights(settings.tenant_weights),
+            queue_timeout=settings.groq_queue_timeout
+        ) if settings.fair_queue_concurrency else None
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Gerencia o ciclo de vida da aplicação, criando o AsyncGroqService compartilhado, a fila
+    de tarefas assíncronas (e, se habilitada, a reserva de perguntas pré-geradas) na
+    inicialização e encerrando-os no desligamento.
+
+    O registro (logs) assíncrono também é configurado aqui e encerrado por último, após
+    a escrita dos registros pendentes.
+
+    As configurações são carregadas e validadas aqui, de modo que uma configuração
+    ausente ou inválida impede a inicialização da aplicação.
+    """
+    settings = get_settings()
+    app.state.settings = settings
+    app.state.logging = setup_logging(settings)
+    tracer.configure(build_span_exporter(settings.tracing_exporter, settings.tracing_file_path),
+                     settings.tracing_sample_rate)
+    app.state.groq_service = build_groq_service(settings)
+    app.state.job_queue = JobQueue(
+        store=build_job_store(settings.job_queue_backend, settings.job_queue_sqlite_path),
+        handlers=build_job_handlers(app.state.groq_service),
+        workers=settings.job_workers,
+        poll_interval=settings.job_poll_interval,
+        job_timeout=settings.job_timeout,
+        result_ttl=settings.job_result_ttl
+    )
+    await app.state.job_queue.start()
+    app.state.question_pool = None
+    if settings.question_pool_enabled:
+        app.state.question_pool = QuestionPool(
+            app.state.groq_service,
+            low_watermark=settings.question_pool_low_watermark,
+            high_watermark=settings.question_pool_high_watermark,
+            max_themes=settings.question_pool_max_themes,
+            auto_register_after=settings.question_pool_auto_register_after
+        )
+        app.state.question_pool.warm(settings.question_pool_theme_list)
+        await app.state.question_pool.start()
+    yield
+    if app.state.question_pool is not None:
+        await app.state.question_pool.stop()
+    await app.state.job_queue.stop(drain_timeout=settings.job_drain_timeout)
+    await app.state.groq_service.close()
+    tracer.close()
+    tracer.configure(None)
+    app.state.logging.stop()
+
+
 app = FastAPI(
     title="API de Educação e E-learning",
     description=(
@@ -15,6 +200,11 @@ app = FastAPI(
         "*GitHub:* [GitHub](https://github.com/lusabo/fastapi)"
     ),
     version="1.0.0",
+    lifespan=lifespan,
 )
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+app.include_router(metrics_routes.router, tags=["Metrics"])
 app.include_router(auth_routes.router, prefix="/auth", tags=["Auth"])
 app.include_router(questions_routes.router, prefix="/questions", tags=["Questions"])
+app.include_router(jobs_routes.router, prefix="/jobs", tags=["Jobs"])
@@ -3,5 +3,8 @@ from .theme import Theme
 from .assessment import Assessment
 from .answer import Answer
 from .questions import Questions
+from .grading_item import GradingItem
+from .grading_result import GradingResult
+from .job import Job
 
-__all__ = ["Question", "Theme", "Assessment", "Answer", "Questions"]
\ No newline at end of file
+__all__ = ["Question", "Theme", "Assessment", "Answer", "Questions", "GradingItem", "GradingResult", "Job"]
\ No newline at end of file
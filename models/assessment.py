@@ -1,4 +1,48 @@
-from pydantic import BaseModel, Field, field_validator
+import re
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+# Score em percentual ("80%", "80", "80.5 %") ou em fração ("8/10", "8 de 10")
+_PERCENT_PATTERN = re.compile(r"^(\d+(?:[.,]\d+)?)\s*%?$")
+_FRACTION_PATTERN = re.compile(r"^(\d+(?:[.,]\d+)?)\s*(?:/|de)\s*(\d+(?:[.,]\d+)?)$")
+
+
+def parse_score(value) -> float:
+    """
+    Converte o score retornado pelo modelo em um número de 0 a 100.
+
+    Aceita números e textos em percentual (ex.: `80`, `"80%"`, `"80,5 %"`) ou em fração
+    (ex.: `"8/10"`, `"8 de 10"`).
+
+    Args:
+        value: O score retornado pelo modelo.
+
+    Returns:
+        float: O score normalizado, de 0 a 100.
+
+    Raises:
+        ValueError: Se o score não puder ser interpretado ou estiver fora do intervalo.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Score inválido: {value}")
+    if isinstance(value, (int, float)):
+        score = float(value)
+    elif isinstance(value, str):
+        text = value.strip().lower()
+        percent = _PERCENT_PATTERN.match(text)
+        fraction = _FRACTION_PATTERN.match(text)
+        if percent:
+            score = float(percent.group(1).replace(",", "."))
+        elif fraction and float(fraction.group(2).replace(",", ".")) > 0:
+            score = 100 * float(fraction.group(1).replace(",", ".")) / float(fraction.group(2).replace(",", "."))
+        else:
+            raise ValueError(f"Score inválido: {value}")
+    else:
+        raise ValueError(f"Score inválido: {value}")
+    if not 0 <= score <= 100:
+        raise ValueError(f"Score fora do intervalo de 0 a 100: {value}")
+    return round(score, 2)
 
 
 class Assessment(BaseModel):
@@ -7,11 +51,18 @@ class Assessment(BaseModel):
 
     Atributos:
         feedback (str): Feedback da análise da resposta.
-        score (str): Score em percentual.
+        score (str): Score em percentual (ex.: "80%").
+        score_value (float): Score numérico, de 0 a 100.
+        reused (bool): Se a avaliação foi reaproveitada de uma resposta semelhante, sem nova
+            chamada ao modelo (para auditoria).
+        similarity (Optional[float]): Similaridade, de 0 a 1, com a resposta cuja avaliação foi reaproveitada.
     """
 
     feedback: str = Field(..., description="Feedback da análise da resposta")
     score: str = Field(..., description="Score em percentual")
+    score_value: Optional[float] = Field(None, ge=0, le=100, description="Score numérico, de 0 a 100")
+    reused: bool = Field(False, description="Avaliação reaproveitada de uma resposta semelhante")
+    similarity: Optional[float] = Field(None, ge=0, le=1, description="Similaridade com a resposta reaproveitada")
 
     @field_validator("feedback", mode="before")
     def strip_feedback(cls, value: str) -> str:
@@ -29,16 +80,29 @@ class Assessment(BaseModel):
         return value
 
     @field_validator("score", mode="before")
-    def strip_score(cls, value: str) -> str:
+    def normalize_score(cls, value) -> str:
         """
-        Validador para remover espaços em branco do score.
+        Validador que normaliza o score para o formato percentual (ex.: `8/10` -> `80%`).
 
         Args:
-            value (str): O valor do score.
+            value: O valor do score.
 
         Returns:
-            str: O valor do score sem espaços em branco.
+            str: O score em percentual.
+
+        Raises:
+            ValueError: Se o score não puder ser interpretado.
         """
-        if isinstance(value, str):
-            return value.strip()
-        return value
+        return f"{parse_score(value):g}%"
+
+    @model_validator(mode="after")
+    def fill_score_value(self) -> "Assessment":
+        """
+        Validador que preenche o score numérico a partir do score em percentual.
+
+        Returns:
+            Assessment: A avaliação com o score numérico preenchido.
+        """
+        if self.score_value is None:
+            self.score_value = parse_score(self.score)
+        return self
@@ -0,0 +1,28 @@
+from pydantic import BaseModel, Field, field_validator
+
+
+class GradingItem(BaseModel):
+    """
+    Modelo que representa um par de questão e resposta a ser avaliado na correção em lote.
+
+    Atributos:
+        question (str): Texto da questão. Não pode ser vazio.
+        answer (str): Resposta fornecida pelo usuário. Não pode ser vazia.
+    """
+    question: str = Field(..., min_length=1, description="Texto da questão")
+    answer: str = Field(..., min_length=1, description="Resposta fornecida pelo usuário")
+
+    @field_validator("question", "answer", mode="before")
+    def strip_whitespace(cls, value: str) -> str:
+        """
+        Validador que remove espaços em branco do início e do fim da questão e da resposta.
+
+        Args:
+            value (str): O texto da questão ou da resposta.
+
+        Returns:
+            str: O texto sem espaços em branco no início e no fim.
+        """
+        if isinstance(value, str):
+            return value.strip()
+        return value
@@ -0,0 +1,19 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+from .assessment import Assessment
+
+
+class GradingResult(BaseModel):
+    """
+    Modelo que representa o resultado da avaliação de um item na correção em lote.
+
+    Atributos:
+        index (int): Posição do item na lista enviada.
+        assessment (Optional[Assessment]): A avaliação, se o item foi avaliado com sucesso.
+        error (Optional[str]): A mensagem de erro, se o item não pôde ser avaliado.
+    """
+    index: int = Field(..., ge=0, description="Posição do item na lista enviada")
+    assessment: Optional[Assessment] = Field(None, description="Avaliação do item")
+    error: Optional[str] = Field(None, description="Erro ao avaliar o item")
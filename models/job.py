@@ -0,0 +1,37 @@
+from typing import Any, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class Job(BaseModel):
+    """
+    Modelo que representa uma tarefa assíncrona (ex.: geração de muitas questões ou correção
+    de uma prova inteira), executada em segundo plano pela fila de tarefas.
+
+    Atributos:
+        id (str): Identificador da tarefa.
+        kind (str): Tipo da tarefa (`generate_questions` ou `analyze_responses`).
+        status (str): Situação da tarefa: `queued`, `running`, `succeeded` ou `failed`.
+        owner (Optional[str]): Usuário que submeteu a tarefa.
+        created_at (float): Momento da submissão (timestamp Unix).
+        started_at (Optional[float]): Momento do início da execução.
+        finished_at (Optional[float]): Momento do término da execução.
+        result (Optional[Any]): Resultado da tarefa, se concluída com sucesso.
+        error (Optional[str]): Mensagem de erro, se a tarefa falhou.
+    """
+    id: str = Field(..., description="Identificador da tarefa")
+    kind: str = Field(..., description="Tipo da tarefa")
+    status: Literal["queued", "running", "succeeded", "failed"] = Field("queued", description="Situação da tarefa")
+    owner: Optional[str] = Field(None, description="Usuário que submeteu a tarefa")
+    created_at: float = Field(..., description="Momento da submissão (timestamp Unix)")
+    started_at: Optional[float] = Field(None, description="Momento do início da execução")
+    finished_at: Optional[float] = Field(None, description="Momento do término da execução")
+    result: Optional[Any] = Field(None, description="Resultado da tarefa")
+    error: Optional[str] = Field(None, description="Mensagem de erro, se a tarefa falhou")
+
+    @property
+    def done(self) -> bool:
+        """
+        Indica se a tarefa terminou (com sucesso ou falha).
+        """
+        return self.status in ("succeeded", "failed")
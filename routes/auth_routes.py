@@ -1,34 +1,35 @@
 import logging
-import os
 from datetime import timedelta
 
 import jwt
-from dotenv import load_dotenv
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
+from config import Settings, get_settings
 from services import auth_service
+from services.tracing import TracedRoute, tracer
 
 # Configura o logger para o módulo atual
 logger = logging.getLogger(__name__)
 
-# Carrega as variáveis de ambiente do arquivo .env
-load_dotenv()
-
 # Cria um roteador para o FastAPI
-router = APIRouter()
+router = APIRouter(route_class=TracedRoute)
 
 # Define o esquema de autenticação OAuth2 com o endpoint de token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
 
 
 @router.post("/token")
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
+def login(
+        form_data: OAuth2PasswordRequestForm = Depends(),
+        settings: Settings = Depends(get_settings)
+):
     """
     Endpoint para login de usuário.
 
     Args:
         form_data (OAuth2PasswordRequestForm): Formulário contendo o nome de usuário e senha.
+        settings (Settings): Configurações da aplicação.
 
     Returns:
         dict: Dicionário contendo o token de acesso e o tipo de token.
@@ -38,27 +39,35 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     user = auth_service.verify_user(form_data.username, form_data.password)
     if not user:
-        logger.warning(f"Tentativa de login falhou para o usuário: {form_data.username}")
+        logger.warning("Tentativa de login falhou para o usuário: %s", form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuário ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"}
         )
-    access_token_expires = timedelta(minutes=float(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES")))
+    access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = auth_service.create_access_token(
         data={"sub": user["id"]},
         expires_delta=access_token_expires
     )
-    logger.info(f"Token criado com sucesso para o usuário: {form_data.username}")
+    logger.info("Token criado com sucesso para o usuário: %s", form_data.username)
     return {"access_token": access_token, "token_type": "bearer"}
 
 
-def get_current_user(token: str = Depends(oauth2_scheme)):
+def get_current_user(
+        token: str = Depends(oauth2_scheme),
+        settings: Settings = Depends(get_settings)
+):
     """
     Função para obter o usuário atual a partir do token de autenticação.
 
+    A verificação do token é reaproveitada entre requisições (ver
+    `auth_service.decode_access_token`) e, dentro de uma mesma requisição, o FastAPI
+    avalia esta dependência uma única vez, mesmo declarada no roteador e no endpoint.
+
     Args:
         token (str): Token de autenticação JWT.
+        settings (Settings): Configurações da aplicação.
 
     Returns:
         dict: Dicionário contendo o ID do usuário.
@@ -71,22 +80,17 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
         detail="Não foi possível validar as credenciais",
         headers={"WWW-Authenticate": "Bearer"}
     )
-    try:
-        secret_key = os.getenv("SECRET_KEY")
-        algorithm = os.getenv("ALGORITHM")
-
-        if not secret_key or not algorithm:
-            logger.error("Variáveis de ambiente 'SECRET_KEY' ou 'ALGORITHM' não estão configuradas corretamente.")
-            raise credentials_exception
-
-        payload = jwt.decode(token, secret_key, algorithms=[algorithm])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            logger.warning("Token válido, mas sem o campo 'sub'.")
+    with tracer.span("auth.get_current_user") as span:
+        try:
+            payload = auth_service.decode_access_token(token, settings.secret_key, settings.algorithm)
+            user_id: str = payload.get("sub")
+            if user_id is None:
+                logger.warning("Token válido, mas sem o campo 'sub'.")
+                raise credentials_exception
+        except jwt.PyJWTError as e:
+            logger.error("Erro ao decodificar o token: %s", e)
             raise credentials_exception
-    except jwt.PyJWTError as e:
-        logger.error(f"Erro ao decodificar o token: {str(e)}")
-        raise credentials_exception
+        span.set_attribute("enduser.id", user_id)
     return {"id": user_id}
 
 
@@ -101,5 +105,5 @@ def read_users_me(current_user: dict = Depends(get_current_user)):
     Returns:
         dict: Dicionário contendo o ID do usuário atual.
     """
-    logger.info(f"Usuário {current_user.get('id')} acessou o endpoint /users/me")
+    logger.info("Usuário %s acessou o endpoint /users/me", current_user.get("id"))
     return current_user
@@ -0,0 +1,139 @@
+import math
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Query, Request
+
+from config import Settings, get_settings
+from routes.auth_routes import get_current_user
+from services.exceptions import QuotaExceededError
+from services.fair_scheduler import set_current_tenant
+from services.groq_service import AsyncGroqService
+from services.job_queue import JobQueue
+from services.question_pool import QuestionPool
+
+
+def get_groq_service(request: Request) -> AsyncGroqService:
+    """
+    Dependência que fornece a instância compartilhada do AsyncGroqService.
+
+    A instância é criada uma única vez no ciclo de vida da aplicação (ver `main.py`)
+    e reaproveitada por todas as requisições.
+
+    Args:
+        request (Request): Requisição atual.
+
+    Returns:
+        AsyncGroqService: Serviço Groq assíncrono compartilhado pela aplicação.
+    """
+    return request.app.state.groq_service
+
+
+def get_question_pool(request: Request) -> Optional[QuestionPool]:
+    """
+    Dependência que fornece a reserva de perguntas pré-geradas da aplicação.
+
+    Args:
+        request (Request): Requisição atual.
+
+    Returns:
+        Optional[QuestionPool]: A reserva de perguntas, ou None se estiver desabilitada.
+    """
+    return getattr(request.app.state, "question_pool", None)
+
+
+def get_job_queue(request: Request) -> JobQueue:
+    """
+    Dependência que fornece a fila de tarefas assíncronas da aplicação.
+
+    Args:
+        request (Request): Requisição atual.
+
+    Returns:
+        JobQueue: A fila de tarefas compartilhada pela aplicação.
+
+    Raises:
+        HTTPException: Se a fila de tarefas não estiver disponível (503).
+    """
+    queue = getattr(request.app.state, "job_queue", None)
+    if queue is None:
+        raise HTTPException(status_code=503, detail="Fila de tarefas indisponível.")
+    return queue
+
+
+def quota_exceeded(error: QuotaExceededError) -> HTTPException:
+    """
+    Converte a cota excedida de um usuário em uma resposta 429 com o cabeçalho `Retry-After`.
+
+    Args:
+        error (QuotaExceededError): O erro lançado pelo serviço.
+
+    Returns:
+        HTTPException: A exceção HTTP correspondente.
+    """
+    return HTTPException(
+        status_code=429,
+        detail="Cota de uso do serviço de IA excedida. Tente novamente mais tarde.",
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    )
+
+
+async def admit_user(
+        current_user: dict = Depends(get_current_user),
+        service: AsyncGroqService = Depends(get_groq_service)
+) -> dict:
+    """
+    Dependência que identifica o usuário das chamadas ao modelo feitas na requisição (para a
+    cota de tokens e a fila justa do AsyncGroqService) e recusa a requisição de imediato se
+    a sua cota de tokens estiver esgotada.
+
+    É assíncrona para que o usuário definido no contexto da requisição seja visto pela rota.
+
+    Args:
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        service (AsyncGroqService): Serviço Groq assíncrono compartilhado pela aplicação.
+
+    Returns:
+        dict: O usuário atual.
+
+    Raises:
+        HTTPException: Se a cota de tokens do usuário estiver esgotada (429).
+    """
+    set_current_tenant(current_user["id"])
+    if service.tenant_budgets is not None:
+        try:
+            service.tenant_budgets.check(current_user["id"])
+        except QuotaExceededError as e:
+            raise quota_exceeded(e)
+    return current_user
+
+
+def provider_selector(route_setting: str) -> Callable[..., str]:
+    """
+    Cria a dependência que escolhe o provedor de LLM de uma rota.
+
+    O provedor é, em ordem de prioridade: o informado na requisição (`?provider=`), o
+    configurado para a rota (`route_setting`) ou o provedor padrão do serviço.
+
+    Args:
+        route_setting (str): Nome da configuração com o provedor da rota (ex.: `llm_question_provider`).
+
+    Returns:
+        Callable[..., str]: A dependência que retorna o nome do provedor escolhido.
+    """
+
+    def select_provider(
+            provider: Optional[str] = Query(None, description="Provedor de LLM (ex.: groq, openai, stub)"),
+            settings: Settings = Depends(get_settings),
+            service: AsyncGroqService = Depends(get_groq_service)
+    ) -> str:
+        name = provider or getattr(settings, route_setting) or service.default_provider
+        if name not in service.providers:
+            raise HTTPException(status_code=400, detail=f"Provedor de LLM desconhecido: {name}")
+        return name
+
+    return select_provider
+
+
+# Dependências que escolhem o provedor das rotas de geração de questões e de análise de respostas
+select_question_provider = provider_selector("llm_question_provider")
+select_analysis_provider = provider_selector("llm_analysis_provider")
@@ -0,0 +1,219 @@
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from config import Settings, get_settings
+from models import GradingItem, Job, Questions
+from routes.auth_routes import get_current_user
+from routes.dependencies import admit_user, get_job_queue, select_analysis_provider, select_question_provider
+from routes.questions_routes import STREAMING_HEADERS, _sse_event
+from services.job_queue import JobQueue
+from services.tracing import TracedRoute
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+# Cria um roteador FastAPI com dependências
+router = APIRouter(
+    dependencies=[Depends(get_current_user)],
+    route_class=TracedRoute
+)
+
+# Intervalo, em segundos, entre os comentários que mantêm viva a conexão de eventos
+EVENTS_KEEPALIVE = 15.0
+
+
+async def _owned_job(queue: JobQueue, job_id: str, current_user: dict, wait: float = 0) -> Job:
+    """
+    Busca uma tarefa do usuário atual, aguardando opcionalmente o seu término.
+
+    Args:
+        queue (JobQueue): A fila de tarefas.
+        job_id (str): O identificador da tarefa.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        wait (float): Tempo máximo, em segundos, de espera pelo término da tarefa.
+
+    Returns:
+        Job: A tarefa.
+
+    Raises:
+        HTTPException: Se a tarefa não existir ou pertencer a outro usuário (404).
+    """
+    job = await queue.wait(job_id, wait) if wait > 0 else await queue.get(job_id)
+    if job is None or job.owner != current_user["id"]:
+        raise HTTPException(status_code=404, detail="Tarefa não encontrada.")
+    return job
+
+
+@router.post("/v1/generate-question",
+             response_model=Job,
+             dependencies=[Depends(admit_user)],
+             status_code=202,
+             summary="Geração assíncrona de questões por tema com quantidade")
+async def submit_generate_questions(
+        payload: Questions = Body(..., description="Tema e quantidade de questões"),
+        batched: Optional[bool] = Query(None, description="Gera as questões em lote, com várias por chamada ao modelo"),
+        current_user: dict = Depends(get_current_user),
+        queue: JobQueue = Depends(get_job_queue),
+        provider: str = Depends(select_question_provider),
+        settings: Settings = Depends(get_settings)
+):
+    """
+    Enfileira a geração de muitas questões, retornando imediatamente a tarefa criada.
+
+    O resultado (lista de questões) é obtido em `GET /jobs/v1/{job_id}` ou acompanhado
+    em `GET /jobs/v1/{job_id}/events`.
+
+    Args:
+        payload (Questions): Objeto contendo o tema e a quantidade de questões a serem geradas.
+        batched (Optional[bool]): Se as questões devem ser geradas em lote. Se omitido, usa o padrão do serviço.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        queue (JobQueue): Fila de tarefas da aplicação.
+        provider (str): Nome do provedor de LLM escolhido para a requisição.
+        settings (Settings): Configurações da aplicação.
+
+    Returns:
+        Job: A tarefa enfileirada.
+
+    Raises:
+        HTTPException: Se o tema estiver vazio ou a quantidade exceder o máximo permitido.
+    """
+    if not payload.theme.strip():
+        raise HTTPException(status_code=422, detail="O tema não pode ser vazio.")
+    if payload.quantity > settings.job_max_items:
+        raise HTTPException(status_code=422,
+                            detail=f"A quantidade deve ser de no máximo {settings.job_max_items} questões.")
+
+    job = await queue.submit(
+        "generate_questions",
+        {"theme": payload.theme, "quantity": payload.quantity, "batched": batched, "provider": provider},
+        owner=current_user["id"]
+    )
+    logger.info("Usuário %s enfileirou a geração de %d questão(ões) na tarefa %s.",
+                current_user["id"], payload.quantity, job.id)
+    return job
+
+
+@router.post("/v1/analyze-responses",
+             response_model=Job,
+             dependencies=[Depends(admit_user)],
+             status_code=202,
+             summary="Correção assíncrona em lote de respostas")
+async def submit_analyze_responses(
+        items: List[GradingItem] = Body(..., description="Pares de questão e resposta a serem avaliados"),
+        current_user: dict = Depends(get_current_user),
+        queue: JobQueue = Depends(get_job_queue),
+        provider: str = Depends(select_analysis_provider),
+        settings: Settings = Depends(get_settings)
+):
+    """
+    Enfileira a correção de muitos pares de questão e resposta, retornando imediatamente a
+    tarefa criada.
+
+    O resultado tem o mesmo formato de `POST /questions/v1/analyze-responses` (um
+    `GradingResult` por item, na ordem enviada).
+
+    Args:
+        items (List[GradingItem]): Os pares de questão e resposta.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        queue (JobQueue): Fila de tarefas da aplicação.
+        provider (str): Nome do provedor de LLM escolhido para a requisição.
+        settings (Settings): Configurações da aplicação.
+
+    Returns:
+        Job: A tarefa enfileirada.
+
+    Raises:
+        HTTPException: Se a lista estiver vazia ou exceder o máximo de itens permitido.
+    """
+    if not items:
+        raise HTTPException(status_code=422, detail="A lista de itens não pode ser vazia.")
+    if len(items) > settings.job_max_items:
+        raise HTTPException(status_code=422, detail=f"A lista deve ter no máximo {settings.job_max_items} itens.")
+
+    job = await queue.submit(
+        "analyze_responses",
+        {"items": [item.model_dump() for item in items], "provider": provider},
+        owner=current_user["id"]
+    )
+    logger.info("Usuário %s enfileirou a correção de %d item(ns) na tarefa %s.",
+                current_user["id"], len(items), job.id)
+    return job
+
+
+@router.get("/v1/{job_id}",
+            response_model=Job,
+            summary="Consulta de tarefa assíncrona")
+async def get_job(
+        job_id: str,
+        wait: float = Query(0, ge=0, le=60, description="Aguarda até N segundos pelo término da tarefa"),
+        current_user: dict = Depends(get_current_user),
+        queue: JobQueue = Depends(get_job_queue)
+):
+    """
+    Retorna a situação e, se concluída, o resultado de uma tarefa do usuário atual.
+
+    Com `wait`, a resposta é adiada até o término da tarefa ou o fim do prazo (long polling).
+
+    Args:
+        job_id (str): O identificador da tarefa.
+        wait (float): Tempo máximo, em segundos, de espera pelo término da tarefa.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        queue (JobQueue): Fila de tarefas da aplicação.
+
+    Returns:
+        Job: A tarefa.
+
+    Raises:
+        HTTPException: Se a tarefa não existir ou pertencer a outro usuário (404).
+    """
+    return await _owned_job(queue, job_id, current_user, wait)
+
+
+@router.get("/v1/{job_id}/events",
+            response_class=StreamingResponse,
+            summary="Acompanhamento de tarefa assíncrona (streaming)")
+async def job_events(
+        job_id: str,
+        current_user: dict = Depends(get_current_user),
+        queue: JobQueue = Depends(get_job_queue)
+):
+    """
+    Acompanha uma tarefa do usuário atual via Server-Sent Events.
+
+    É emitido um evento `status` a cada mudança de situação e um evento final `done` com a
+    tarefa concluída (incluindo o resultado ou o erro).
+
+    Args:
+        job_id (str): O identificador da tarefa.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        queue (JobQueue): Fila de tarefas da aplicação.
+
+    Returns:
+        StreamingResponse: Fluxo `text/event-stream` com os eventos da tarefa.
+
+    Raises:
+        HTTPException: Se a tarefa não existir ou pertencer a outro usuário (404).
+    """
+    job = await _owned_job(queue, job_id, current_user)
+
+    async def events():
+        current = job
+        status = None
+        while True:
+            if current is None:
+                yield _sse_event("error", {"detail": "Tarefa não encontrada."})
+                return
+            if current.done:
+                yield _sse_event("done", current.model_dump(mode="json"))
+                return
+            if current.status != status:
+                status = current.status
+                yield _sse_event("status", {"id": current.id, "status": status})
+            else:
+                yield ": keep-alive\n\n"
+            current = await queue.wait(job_id, EVENTS_KEEPALIVE)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=STREAMING_HEADERS)
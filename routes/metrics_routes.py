@@ -0,0 +1,111 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from config import Settings, get_settings
+from services import auth_service
+from services.circuit_breaker import CircuitBreaker
+from services.metrics import REGISTRY, CollectedMetric, cache_metrics
+
+# Cria um roteador FastAPI (sem autenticação, para coleta pelo Prometheus)
+router = APIRouter()
+
+# Tipo de conteúdo do formato de texto do Prometheus
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Valor numérico de cada estado do disjuntor
+BREAKER_STATES = {CircuitBreaker.CLOSED: 0, CircuitBreaker.HALF_OPEN: 1, CircuitBreaker.OPEN: 2}
+
+
+def _collect(request: Request) -> List[CollectedMetric]:
+    """
+    Lê o estado atual dos componentes da aplicação (caches, índice de similaridade, reserva
+    de perguntas, controle de ritmo, disjuntor, fila justa e cotas por usuário, custo por
+    modelo e fila de tarefas) como métricas.
+
+    Args:
+        request (Request): Requisição atual.
+
+    Returns:
+        List[CollectedMetric]: As métricas coletadas.
+    """
+    state = request.app.state
+    service = getattr(state, "groq_service", None)
+    pool = getattr(state, "question_pool", None)
+    queue = getattr(state, "job_queue", None)
+    assessment_cache = getattr(service, "assessment_cache", None)
+    similarity_index = getattr(service, "similarity_index", None)
+    collected = cache_metrics({
+        "token": auth_service.token_cache.stats(),
+        "assessment": assessment_cache.stats() if assessment_cache is not None else None,
+        "similar_assessment": similarity_index.stats() if similarity_index is not None else None,
+        "question_pool": pool.stats() if pool is not None else None,
+    })
+    if service is None:
+        return collected
+
+    if service.rate_governor is not None:
+        governor = service.rate_governor.stats()
+        collected += [
+            CollectedMetric("llm_concurrency_limit", "Limite adaptativo de chamadas simultâneas ao modelo.",
+                            "gauge", [({}, governor["concurrency_limit"])]),
+            CollectedMetric("llm_requests_in_flight", "Chamadas ao modelo em andamento.",
+                            "gauge", [({}, governor["in_flight"])]),
+            CollectedMetric("llm_throttled_total", "Respostas 429 recebidas do provedor.",
+                            "counter", [({}, governor["throttled"])]),
+        ]
+    if service.circuit_breaker is not None:
+        collected.append(CollectedMetric(
+            "llm_circuit_breaker_state", "Estado do disjuntor (0 fechado, 1 meio-aberto, 2 aberto).",
+            "gauge", [({}, BREAKER_STATES[service.circuit_breaker.state])]))
+    if service.model_router is not None:
+        collected.append(CollectedMetric(
+            "llm_cost_dollars_total", "Custo estimado das chamadas ao modelo, em dólares.", "counter",
+            [({"model": model}, stats["cost"]) for model, stats in service.model_router.stats().items()]))
+    rejected = []
+    if service.fair_scheduler is not None:
+        fair = service.fair_scheduler.stats()
+        collected += [
+            CollectedMetric("fair_queue_waiting_calls", "Chamadas ao modelo aguardando na fila justa.",
+                            "gauge", [({}, fair["queued"])]),
+            CollectedMetric("fair_queue_waiting_tenants", "Usuários com chamadas aguardando na fila justa.",
+                            "gauge", [({}, fair["queued_tenants"])]),
+        ]
+        rejected.append(({"reason": "queued_calls"}, fair["rejected"]))
+    if service.tenant_budgets is not None:
+        rejected.append(({"reason": "tokens"}, service.tenant_budgets.stats()["rejected"]))
+    if rejected:
+        collected.append(CollectedMetric(
+            "tenant_quota_rejections_total", "Chamadas recusadas por cota do usuário excedida.", "counter", rejected))
+    collected.append(CollectedMetric(
+        "llm_analysis_repairs_total", "Chamadas de reparo de respostas fora do formato JSON.",
+        "counter", [({}, service.analysis_repairs)]))
+    if queue is not None:
+        jobs = queue.stats()
+        collected.append(CollectedMetric(
+            "jobs_finished_total", "Tarefas assíncronas concluídas neste processo.", "counter",
+            [({"status": "succeeded"}, jobs["succeeded"]), ({"status": "failed"}, jobs["failed"])]))
+    return collected
+
+
+@router.get("/metrics",
+            response_class=PlainTextResponse,
+            include_in_schema=False)
+def metrics(request: Request, settings: Settings = Depends(get_settings)):
+    """
+    Expõe as métricas do processo no formato de texto do Prometheus.
+
+    Args:
+        request (Request): Requisição atual.
+        settings (Settings): Configurações da aplicação.
+
+    Returns:
+        PlainTextResponse: As métricas formatadas.
+
+    Raises:
+        HTTPException: Se as métricas estiverem desabilitadas (404).
+    """
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(REGISTRY.render(_collect(request)), media_type=CONTENT_TYPE)
@@ -1,108 +1,328 @@
+import json
 import logging
-from typing import List
+import math
+from typing import List, Optional
 
-from fastapi import APIRouter, Body, HTTPException, Depends
+from fastapi import APIRouter, Body, HTTPException, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 
-from models import Theme, Question, Assessment, Answer, Questions
+from config import Settings, get_settings
+from models import Theme, Question, Assessment, Answer, Questions, GradingItem, GradingResult
 from routes.auth_routes import get_current_user
-from services.groq_service import GroqService
+from routes.dependencies import (admit_user, get_groq_service, get_question_pool, quota_exceeded,
+                                 select_analysis_provider, select_question_provider)
+from services.exceptions import QuotaExceededError, UpstreamUnavailableError
+from services.groq_service import AsyncGroqService, grading_result, parse_assessment
+from services.question_pool import QuestionPool
+from services.tracing import TracedRoute
 
 # Configura o logger para o módulo atual
 logger = logging.getLogger(__name__)
 
 # Cria um roteador FastAPI com dependências
 router = APIRouter(
-    dependencies=[Depends(get_current_user)]
+    dependencies=[Depends(get_current_user), Depends(admit_user)],
+    route_class=TracedRoute
 )
 
+# Cabeçalhos que evitam cache e buffering de proxies nas respostas em streaming
+STREAMING_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def _service_unavailable(error: UpstreamUnavailableError) -> HTTPException:
+    """
+    Converte a indisponibilidade momentânea do serviço de IA em uma resposta 503 com o
+    cabeçalho `Retry-After` (ou 429, se a cota do usuário foi excedida).
+
+    Args:
+        error (UpstreamUnavailableError): O erro lançado pelo serviço.
+
+    Returns:
+        HTTPException: A exceção HTTP correspondente.
+    """
+    if isinstance(error, QuotaExceededError):
+        return quota_exceeded(error)
+    return HTTPException(
+        status_code=503,
+        detail="Serviço de IA temporariamente indisponível. Tente novamente em instantes.",
+        headers={"Retry-After": str(max(1, math.ceil(error.retry_after)))}
+    )
+
+
+def _ensure_available(service: AsyncGroqService, current_user: dict):
+    """
+    Recusa a requisição em streaming antes do início da resposta se as chamadas ao modelo
+    seriam recusadas de imediato (após o início, o código HTTP já foi enviado como 200).
+
+    Args:
+        service (AsyncGroqService): Serviço Groq assíncrono compartilhado pela aplicação.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+
+    Raises:
+        HTTPException: Se a cota do usuário estiver esgotada (429) ou o disjuntor estiver aberto (503).
+    """
+    try:
+        service.check_available()
+    except UpstreamUnavailableError as e:
+        logger.warning("Serviço de IA indisponível para o usuário %s: %s", current_user.get("id"), str(e))
+        raise _service_unavailable(e)
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """
+    Formata um evento Server-Sent Events com dados em JSON.
+
+    Args:
+        event (str): Nome do evento.
+        data (dict): Dados do evento.
+
+    Returns:
+        str: O evento formatado.
+    """
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
 
 @router.post("/v1/generate-question",
              response_model=Question,
              summary="Geração de questão por tema")
-def generate_question(
+async def generate_question(
         payload: Theme = Body(..., description="Tema para a geração da questão"),
-        current_user: dict = Depends(get_current_user)
+        current_user: dict = Depends(get_current_user),
+        service: AsyncGroqService = Depends(get_groq_service),
+        provider: str = Depends(select_question_provider),
+        pool: Optional[QuestionPool] = Depends(get_question_pool)
 ):
     """
     Gera uma questão baseada no tema fornecido.
 
+    Se a reserva de perguntas estiver habilitada (e a requisição usar o provedor padrão), a
+    questão é retirada dela; a geração pelo modelo só ocorre quando a reserva do tema está vazia.
+
     Args:
         payload (Theme): Objeto contendo o tema para a geração da questão.
         current_user (dict): Dicionário contendo as informações do usuário atual.
+        service (AsyncGroqService): Serviço Groq assíncrono compartilhado pela aplicação.
+        provider (str): Nome do provedor de LLM escolhido para a requisição.
+        pool (Optional[QuestionPool]): Reserva de perguntas pré-geradas, se habilitada.
 
     Returns:
         Question: Objeto contendo a questão gerada.
 
     Raises:
-        HTTPException: Se o tema estiver vazio ou ocorrer um erro interno ao gerar a questão.
+        HTTPException: Se o tema estiver vazio, o serviço de IA estiver indisponível (503) ou ocorrer
+            um erro interno ao gerar a questão.
     """
-    logger.info(f"Usuário {current_user['id']} solicitou a geração de questão para o tema: '{payload.theme}'")
+    logger.info("Usuário %s solicitou a geração de questão para o tema: '%s'", current_user["id"], payload.theme)
 
     if not payload.theme.strip():
-        logger.warning(f"Usuário {current_user['id']} enviou tema vazio para geração de questão.")
+        logger.warning("Usuário %s enviou tema vazio para geração de questão.", current_user["id"])
         raise HTTPException(status_code=422, detail="O tema não pode ser vazio.")
 
-    service = GroqService()
+    use_pool = pool is not None and provider == service.default_provider
+    question_text = pool.get(payload.theme) if use_pool else None
     try:
-        question_text = service.create_question(payload.theme)
+        if question_text is None:
+            question_text = await service.create_shared_question(payload.theme, provider)
+    except UpstreamUnavailableError as e:
+        logger.warning("Serviço de IA indisponível para o usuário %s: %s", current_user.get("id"), str(e))
+        raise _service_unavailable(e)
     except Exception as e:
-        logger.error(f"Erro ao gerar questão para o tema '{payload.theme}' pelo usuário {current_user['id']}: {str(e)}")
+        logger.error("Erro ao gerar questão para o tema '%s' pelo usuário %s: %s", payload.theme, current_user["id"], e)
         raise HTTPException(status_code=500, detail="Erro interno ao gerar questão.")
 
-    logger.info(f"Questão gerada com sucesso para o tema '{payload.theme}' pelo usuário {current_user['id']}.")
+    logger.info("Questão gerada com sucesso para o tema '%s' pelo usuário %s.", payload.theme, current_user["id"])
     return Question(question=question_text)
 
 
+@router.post("/v1/generate-question/stream",
+             response_class=StreamingResponse,
+             summary="Geração de questão por tema (streaming)")
+async def generate_question_stream(
+        payload: Theme = Body(..., description="Tema para a geração da questão"),
+        current_user: dict = Depends(get_current_user),
+        service: AsyncGroqService = Depends(get_groq_service),
+        provider: str = Depends(select_question_provider)
+):
+    """
+    Gera uma questão baseada no tema fornecido, enviando o texto via Server-Sent Events
+    conforme é gerado pelo modelo.
+
+    São emitidos eventos `token` com cada trecho (`delta`), um evento final `done` com a
+    questão completa ou, em caso de falha, um evento `error`.
+
+    Args:
+        payload (Theme): Objeto contendo o tema para a geração da questão.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        service (AsyncGroqService): Serviço Groq assíncrono compartilhado pela aplicação.
+        provider (str): Nome do provedor de LLM escolhido para a requisição.
+
+    Returns:
+        StreamingResponse: Fluxo `text/event-stream` com os eventos da geração.
+
+    Raises:
+        HTTPException: Se o tema estiver vazio, a cota do usuário for excedida (429) ou o serviço
+            de IA estiver indisponível (503).
+    """
+    logger.info("Usuário %s solicitou a geração de questão (streaming) para o tema: '%s'",
+                current_user["id"], payload.theme)
+
+    if not payload.theme.strip():
+        logger.warning("Usuário %s enviou tema vazio para geração de questão.", current_user["id"])
+        raise HTTPException(status_code=422, detail="O tema não pode ser vazio.")
+
+    _ensure_available(service, current_user)
+
+    async def events():
+        parts = []
+        try:
+            async for delta in service.stream_question(payload.theme, provider):
+                parts.append(delta)
+                yield _sse_event("token", {"delta": delta})
+            question = Question(question="".join(parts))
+        except Exception as e:
+            logger.error("Erro ao gerar questão (streaming) para o tema '%s' pelo usuário %s: %s",
+                         payload.theme, current_user["id"], str(e))
+            yield _sse_event("error", {"detail": "Erro interno ao gerar questão."})
+            return
+        logger.info("Questão gerada com sucesso (streaming) para o usuário %s.", current_user["id"])
+        yield _sse_event("done", question.model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=STREAMING_HEADERS)
+
+
 @router.post("/v2/generate-question",
              response_model=List[Question],
              summary="Geração de questões por tema com quantidade")
-def generate_question_v2(
+async def generate_question_v2(
         payload: Questions = Body(..., description="Tema e quantidade de questões"),
-        current_user: dict = Depends(get_current_user)
+        batched: Optional[bool] = Query(None, description="Gera as questões em lote, com várias por chamada ao modelo"),
+        current_user: dict = Depends(get_current_user),
+        service: AsyncGroqService = Depends(get_groq_service),
+        provider: str = Depends(select_question_provider),
+        pool: Optional[QuestionPool] = Depends(get_question_pool),
+        settings: Settings = Depends(get_settings)
 ):
     """
     Gera múltiplas questões baseadas no tema fornecido e na quantidade especificada.
 
+    Se a reserva de perguntas estiver habilitada (e a requisição usar o provedor padrão), as
+    questões disponíveis são retiradas dela e apenas as restantes são geradas pelo modelo.
+
     Args:
         payload (Questions): Objeto contendo o tema e a quantidade de questões a serem geradas.
+        batched (Optional[bool]): Se as questões devem ser geradas em lote. Se omitido, usa o padrão do serviço.
         current_user (dict): Dicionário contendo as informações do usuário atual.
+        service (AsyncGroqService): Serviço Groq assíncrono compartilhado pela aplicação.
+        provider (str): Nome do provedor de LLM escolhido para a requisição.
+        pool (Optional[QuestionPool]): Reserva de perguntas pré-geradas, se habilitada.
+        settings (Settings): Configurações da aplicação.
 
     Returns:
         List[Question]: Lista de objetos contendo as questões geradas.
 
     Raises:
-        HTTPException: Se o tema estiver vazio ou ocorrer um erro interno ao gerar as questões.
+        HTTPException: Se o tema estiver vazio, a quantidade exceder o máximo permitido, a cota do
+            usuário for excedida (429), o serviço de IA estiver indisponível (503) ou ocorrer um erro
+            interno ao gerar as questões.
     """
-    logger.info(
-        f"Usuário {current_user['id']} solicitou a geração de {payload.quantity} questão(ões) para o tema: '{payload.theme}'")
+    logger.info("Usuário %s solicitou a geração de %d questão(ões) para o tema: '%s'",
+                current_user["id"], payload.quantity, payload.theme)
 
     if not payload.theme.strip():
         logger.warning("Usuário %s enviou um tema vazio.", current_user.get("id"))
         raise HTTPException(status_code=422, detail="O tema não pode ser vazio.")
+    if payload.quantity > settings.generation_max_items:
+        raise HTTPException(status_code=422,
+                            detail=f"A quantidade deve ser de no máximo {settings.generation_max_items} questões.")
 
-    service = GroqService()
-    questions = []
-    for i in range(payload.quantity):
-        try:
-            question_text = service.create_question(payload.theme)
-        except Exception as e:
-            logger.error("Erro ao gerar a questão %d para o tema '%s' (usuário %s): %s",
-                         i + 1, payload.theme, current_user.get("id"), str(e), exc_info=True)
-            raise HTTPException(status_code=500, detail="Erro interno ao gerar a questão.")
-        questions.append(Question(question=question_text))
+    if batched is None:
+        batched = service.batch_generation
+    create_questions = service.create_questions_batch if batched else service.create_questions
+    use_pool = pool is not None and provider == service.default_provider
+    questions_text = pool.take(payload.theme, payload.quantity) if use_pool else []
+    remaining = payload.quantity - len(questions_text)
+    try:
+        if remaining > 0:
+            questions_text += await create_questions(payload.theme, remaining, provider)
+    except UpstreamUnavailableError as e:
+        logger.warning("Serviço de IA indisponível para o usuário %s: %s", current_user.get("id"), str(e))
+        raise _service_unavailable(e)
+    except Exception as e:
+        logger.error("Erro ao gerar as questões para o tema '%s' (usuário %s): %s",
+                     payload.theme, current_user.get("id"), str(e), exc_info=True)
+        raise HTTPException(status_code=500, detail="Erro interno ao gerar a questão.")
+    questions = [Question(question=question_text) for question_text in questions_text]
 
     logger.info("Geração de %d questão(ões) concluída com sucesso para o usuário %s.",
                 len(questions), current_user.get("id"))
     return questions
 
 
+@router.post("/v2/generate-question/stream",
+             response_class=StreamingResponse,
+             summary="Geração de questões por tema com quantidade (streaming)")
+async def generate_question_v2_stream(
+        payload: Questions = Body(..., description="Tema e quantidade de questões"),
+        current_user: dict = Depends(get_current_user),
+        service: AsyncGroqService = Depends(get_groq_service),
+        provider: str = Depends(select_question_provider),
+        settings: Settings = Depends(get_settings)
+):
+    """
+    Gera múltiplas questões baseadas no tema fornecido, enviando cada questão em NDJSON
+    assim que fica pronta.
+
+    Cada linha contém um objeto Question. Em caso de falha, a última linha contém um
+    objeto com o campo `error` e as gerações restantes são canceladas.
+
+    Args:
+        payload (Questions): Objeto contendo o tema e a quantidade de questões a serem geradas.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        service (AsyncGroqService): Serviço Groq assíncrono compartilhado pela aplicação.
+        provider (str): Nome do provedor de LLM escolhido para a requisição.
+        settings (Settings): Configurações da aplicação.
+
+    Returns:
+        StreamingResponse: Fluxo `application/x-ndjson` com as questões geradas.
+
+    Raises:
+        HTTPException: Se o tema estiver vazio, a quantidade exceder o máximo permitido, a cota do
+            usuário for excedida (429) ou o serviço de IA estiver indisponível (503).
+    """
+    logger.info("Usuário %s solicitou a geração de %d questão(ões) (streaming) para o tema: '%s'",
+                current_user.get("id"), payload.quantity, payload.theme)
+
+    if not payload.theme.strip():
+        logger.warning("Usuário %s enviou um tema vazio.", current_user.get("id"))
+        raise HTTPException(status_code=422, detail="O tema não pode ser vazio.")
+    if payload.quantity > settings.generation_max_items:
+        raise HTTPException(status_code=422,
+                            detail=f"A quantidade deve ser de no máximo {settings.generation_max_items} questões.")
+
+    _ensure_available(service, current_user)
+
+    async def lines():
+        try:
+            async for question_text in service.iter_questions(payload.theme, payload.quantity, provider):
+                yield Question(question=question_text).model_dump_json() + "\n"
+        except Exception as e:
+            logger.error("Erro ao gerar as questões (streaming) para o tema '%s' (usuário %s): %s",
+                         payload.theme, current_user.get("id"), str(e))
+            yield json.dumps({"error": "Erro interno ao gerar a questão."}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=STREAMING_HEADERS)
+
+
 @router.post("/v1/analyze-response",
              response_model=Assessment,
              summary="Análise de resposta")
-def analyze_response(
+async def analyze_response(
         question: Question = Body(..., description="Objeto contendo a questão"),
         answer: Answer = Body(..., description="Objeto contendo a resposta"),
-        current_user: dict = Depends(get_current_user)
+        current_user: dict = Depends(get_current_user),
+        service: AsyncGroqService = Depends(get_groq_service),
+        provider: str = Depends(select_analysis_provider)
 ):
     """
     Analisa a resposta fornecida para uma questão específica.
@@ -111,29 +331,211 @@ def analyze_response(
         question (Question): Objeto contendo a questão a ser analisada.
         answer (Answer): Objeto contendo a resposta a ser analisada.
         current_user (dict): Dicionário contendo as informações do usuário atual.
+        service (AsyncGroqService): Serviço Groq assíncrono compartilhado pela aplicação.
+        provider (str): Nome do provedor de LLM escolhido para a requisição.
 
     Returns:
         Assessment: Objeto contendo a avaliação da resposta.
 
     Raises:
-        HTTPException: Se a questão ou a resposta estiverem vazias, ou se ocorrer um erro interno ao analisar a resposta.
+        HTTPException: Se a questão ou a resposta estiverem vazias, se o serviço de IA estiver
+            indisponível (503) ou se ocorrer um erro interno ao analisar a resposta.
     """
-    logger.info(f"Usuário {current_user['id']} solicitou a análise de resposta.")
+    logger.info("Usuário %s solicitou a análise de resposta.", current_user["id"])
 
     if not question.question.strip():
-        logger.warning(f"Usuário {current_user['id']} enviou uma questão vazia.")
+        logger.warning("Usuário %s enviou uma questão vazia.", current_user["id"])
         raise HTTPException(status_code=422, detail="A questão não pode ser vazia.")
     if not answer.answer.strip():
-        logger.warning(f"Usuário {current_user['id']} enviou uma resposta vazia.")
+        logger.warning("Usuário %s enviou uma resposta vazia.", current_user["id"])
         raise HTTPException(status_code=422, detail="A resposta não pode ser vazia.")
 
-    service = GroqService()
     try:
-        assessment = service.analyze_response(question.question, answer.answer)
+        assessment = await service.analyze_response(question.question, answer.answer, provider)
+    except UpstreamUnavailableError as e:
+        logger.warning("Serviço de IA indisponível para o usuário %s: %s", current_user.get("id"), str(e))
+        raise _service_unavailable(e)
     except Exception as e:
-        logger.error(
-            f"Erro ao analisar resposta para a questão '{question.question}' pelo usuário {current_user['id']}: {str(e)}")
+        logger.error("Erro ao analisar resposta para a questão '%s' pelo usuário %s: %s",
+                     question.question, current_user["id"], e)
         raise HTTPException(status_code=500, detail="Erro interno ao analisar resposta.")
 
-    logger.info(f"Análise realizada com sucesso para o usuário {current_user['id']}.")
+    logger.info("Análise realizada com sucesso para o usuário %s.", current_user["id"])
     return assessment
+
+
+@router.post("/v1/analyze-response/stream",
+             response_class=StreamingResponse,
+             summary="Análise de resposta (streaming)")
+async def analyze_response_stream(
+        question: Question = Body(..., description="Objeto contendo a questão"),
+        answer: Answer = Body(..., description="Objeto contendo a resposta"),
+        current_user: dict = Depends(get_current_user),
+        service: AsyncGroqService = Depends(get_groq_service),
+        provider: str = Depends(select_analysis_provider)
+):
+    """
+    Analisa a resposta fornecida para uma questão, enviando a análise via Server-Sent Events
+    conforme é gerada pelo modelo.
+
+    São emitidos eventos `token` com cada trecho (`delta`), um evento final `done` com o
+    Assessment completo ou, em caso de falha, um evento `error`.
+
+    Args:
+        question (Question): Objeto contendo a questão a ser analisada.
+        answer (Answer): Objeto contendo a resposta a ser analisada.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        service (AsyncGroqService): Serviço Groq assíncrono compartilhado pela aplicação.
+        provider (str): Nome do provedor de LLM escolhido para a requisição.
+
+    Returns:
+        StreamingResponse: Fluxo `text/event-stream` com os eventos da análise.
+
+    Raises:
+        HTTPException: Se a questão ou a resposta estiverem vazias, a cota do usuário for excedida
+            (429) ou o serviço de IA estiver indisponível (503).
+    """
+    logger.info("Usuário %s solicitou a análise de resposta (streaming).", current_user["id"])
+
+    if not question.question.strip():
+        logger.warning("Usuário %s enviou uma questão vazia.", current_user["id"])
+        raise HTTPException(status_code=422, detail="A questão não pode ser vazia.")
+    if not answer.answer.strip():
+        logger.warning("Usuário %s enviou uma resposta vazia.", current_user["id"])
+        raise HTTPException(status_code=422, detail="A resposta não pode ser vazia.")
+
+    _ensure_available(service, current_user)
+
+    async def events():
+        parts = []
+        try:
+            async for delta in service.stream_analysis(question.question, answer.answer, provider):
+                parts.append(delta)
+                yield _sse_event("token", {"delta": delta})
+            assessment = parse_assessment("".join(parts))
+        except Exception as e:
+            logger.error("Erro ao analisar resposta (streaming) pelo usuário %s: %s", current_user["id"], str(e))
+            yield _sse_event("error", {"detail": "Erro interno ao analisar resposta."})
+            return
+        logger.info("Análise realizada com sucesso (streaming) para o usuário %s.", current_user["id"])
+        yield _sse_event("done", assessment.model_dump())
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=STREAMING_HEADERS)
+
+
+@router.post("/v1/analyze-responses",
+             response_model=List[GradingResult],
+             summary="Correção em lote de respostas")
+async def analyze_responses(
+        items: List[GradingItem] = Body(..., description="Pares de questão e resposta a serem avaliados"),
+        current_user: dict = Depends(get_current_user),
+        service: AsyncGroqService = Depends(get_groq_service),
+        provider: str = Depends(select_analysis_provider),
+        settings: Settings = Depends(get_settings)
+):
+    """
+    Avalia vários pares de questão e resposta (ex.: uma prova inteira) em uma única requisição.
+
+    Pares repetidos são avaliados uma única vez e os demais concorrentemente, com limite
+    de concorrência. Os resultados seguem a ordem dos itens enviados; a falha de um item
+    é informada no campo `error` do seu resultado, sem interromper os demais.
+
+    Args:
+        items (List[GradingItem]): Os pares de questão e resposta.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        service (AsyncGroqService): Serviço Groq assíncrono compartilhado pela aplicação.
+        provider (str): Nome do provedor de LLM escolhido para a requisição.
+        settings (Settings): Configurações da aplicação.
+
+    Returns:
+        List[GradingResult]: O resultado de cada item, na ordem enviada.
+
+    Raises:
+        HTTPException: Se a lista estiver vazia ou exceder o máximo de itens permitido.
+    """
+    logger.info("Usuário %s solicitou a correção em lote de %d item(ns).", current_user.get("id"), len(items))
+
+    if not items:
+        raise HTTPException(status_code=422, detail="A lista de itens não pode ser vazia.")
+    if len(items) > settings.bulk_grading_max_items:
+        raise HTTPException(status_code=422,
+                            detail=f"A lista deve ter no máximo {settings.bulk_grading_max_items} itens.")
+
+    results = await service.analyze_responses([(item.question, item.answer) for item in items], provider)
+    grading_results = [grading_result(index, result) for index, result in enumerate(results)]
+
+    logger.info("Correção em lote concluída para o usuário %s: %d item(ns) com erro.",
+                current_user.get("id"), sum(result.error is not None for result in grading_results))
+    return grading_results
+
+
+@router.post("/v1/analyze-responses/stream",
+             response_class=StreamingResponse,
+             summary="Correção em lote de respostas (NDJSON)")
+async def analyze_responses_stream(
+        request: Request,
+        current_user: dict = Depends(get_current_user),
+        service: AsyncGroqService = Depends(get_groq_service),
+        provider: str = Depends(select_analysis_provider),
+        settings: Settings = Depends(get_settings)
+):
+    """
+    Avalia vários pares de questão e resposta enviados em NDJSON (um GradingItem por linha),
+    retornando em NDJSON um GradingResult por item, na ordem enviada, assim que ele e os
+    anteriores ficam prontos.
+
+    Linhas que não formam um GradingItem válido recebem um resultado com `error`.
+
+    Args:
+        request (Request): Requisição atual, cujo corpo contém os itens em NDJSON.
+        current_user (dict): Dicionário contendo as informações do usuário atual.
+        service (AsyncGroqService): Serviço Groq assíncrono compartilhado pela aplicação.
+        provider (str): Nome do provedor de LLM escolhido para a requisição.
+        settings (Settings): Configurações da aplicação.
+
+    Returns:
+        StreamingResponse: Fluxo `application/x-ndjson` com os resultados.
+
+    Raises:
+        HTTPException: Se não houver itens ou se exceder o máximo de itens permitido.
+    """
+    entries: List[Optional[GradingItem]] = []
+
+    def add_entry(line: bytes):
+        if len(entries) >= settings.bulk_grading_max_items:
+            raise HTTPException(status_code=422,
+                                detail=f"A lista deve ter no máximo {settings.bulk_grading_max_items} itens.")
+        try:
+            entries.append(GradingItem.model_validate_json(line))
+        except ValidationError:
+            entries.append(None)
+
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in filter(bytes.strip, lines):
+            add_entry(line)
+    if buffer.strip():
+        add_entry(buffer)
+
+    logger.info("Usuário %s solicitou a correção em lote (streaming) de %d item(ns).",
+                current_user.get("id"), len(entries))
+    if not entries:
+        raise HTTPException(status_code=422, detail="A lista de itens não pode ser vazia.")
+
+    async def lines():
+        results = service.iter_analyses([(item.question, item.answer) for item in entries if item is not None],
+                                        provider)
+        try:
+            for index, item in enumerate(entries):
+                if item is None:
+                    result = GradingResult(index=index, error="Item inválido.")
+                else:
+                    _, assessment = await anext(results)
+                    result = grading_result(index, assessment)
+                yield result.model_dump_json() + "\n"
+        finally:
+            await results.aclose()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers=STREAMING_HEADERS)
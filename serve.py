@@ -0,0 +1,118 @@
+import logging
+import math
+import os
+
+import uvicorn
+
+from config import Settings, get_settings
+from main import setup_logging
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+
+def available_cpus() -> int:
+    """
+    Retorna a quantidade de CPUs que o processo pode usar, respeitando a afinidade de CPUs
+    e a cota de CPU do contêiner (cgroup v2), quando houver.
+
+    Returns:
+        int: A quantidade de CPUs disponíveis (ao menos 1).
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as file:
+            quota, period = file.read().split()
+        if quota != "max":
+            cpus = min(cpus, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def server_workers(settings: Settings) -> int:
+    """
+    Retorna a quantidade de processos do servidor: `SERVER_WORKERS` ou, se 0, uma por CPU
+    disponível.
+
+    Com a fila de tarefas em memória, cada tarefa só é visível no processo que a recebeu
+    (as consultas em `/jobs` chegariam a outros processos e retornariam 404); nesse caso o
+    servidor usa um único processo.
+
+    Args:
+        settings (Settings): Configurações da aplicação.
+
+    Returns:
+        int: A quantidade de processos.
+    """
+    workers = settings.server_workers or available_cpus()
+    if workers > 1 and settings.job_queue_backend == "memory":
+        logger.error("Fila de tarefas em memória não funciona com %d processos; iniciando um único processo. "
+                     "Use JOB_QUEUE_BACKEND=sqlite para vários processos.", workers)
+        return 1
+    return workers
+
+
+def server_options(settings: Settings) -> dict:
+    """
+    Monta as opções do Uvicorn a partir das configurações.
+
+    Usa uvloop e httptools, os processos de `server_workers`, a fila
+    de conexões pendentes e o keep-alive configurados e o prazo de desligamento gradual:
+    ao receber SIGTERM, cada processo deixa de aceitar conexões e aguarda as requisições em
+    andamento (inclusive as chamadas ao modelo) antes de encerrar o AsyncGroqService.
+
+    Args:
+        settings (Settings): Configurações da aplicação.
+
+    Returns:
+        dict: Os parâmetros de `uvicorn.run`.
+    """
+    return {
+        "host": settings.server_host,
+        "port": settings.server_port,
+        "workers": server_workers(settings),
+        "loop": "uvloop",
+        "http": "httptools",
+        "backlog": settings.server_backlog,
+        "timeout_keep_alive": settings.server_keepalive_timeout,
+        "limit_concurrency": settings.server_limit_concurrency,
+        "limit_max_requests": settings.server_limit_max_requests,
+        "timeout_graceful_shutdown": settings.server_graceful_timeout,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.server_forwarded_allow_ips,
+        # Os loggers do uvicorn propagam para a raiz, configurada com o registro assíncrono
+        # (ver `main.setup_logging`); o log de acesso é síncrono e desabilitado por padrão
+        "log_config": None,
+        "access_log": settings.server_access_log,
+    }
+
+
+def main():
+    """
+    Inicia a API em modo de produção, com vários processos de trabalho.
+
+    Cada processo tem o seu próprio AsyncGroqService (pool de conexões, controle de ritmo,
+    cotas por usuário e caches em memória): as cotas por minuto da API Groq e as cotas de
+    tokens por usuário valem por processo.
+    """
+    settings = get_settings()
+    pipeline = setup_logging(settings)
+    options = server_options(settings)
+    quotas = settings.groq_requests_per_minute or settings.groq_tokens_per_minute or settings.tenant_tokens_per_minute
+    if options["workers"] > 1 and quotas:
+        logger.warning("As cotas por minuto (API Groq e por usuário) são aplicadas por processo: "
+                       "o limite efetivo é %d vezes o configurado.", options["workers"])
+    logger.info("Iniciando a API com %d processo(s) em %s:%d.",
+                options["workers"], options["host"], options["port"])
+    try:
+        uvicorn.run("main:app", **options)
+    finally:
+        pipeline.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,3 @@
-from .groq_service import GroqService
+from .groq_service import AsyncGroqService
 
-__all__ = ["GroqService"]
+__all__ = ["AsyncGroqService"]
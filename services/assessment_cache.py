@@ -0,0 +1,300 @@
+import abc
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from models import Assessment
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza um texto para comparação: remove espaços extras e ignora maiúsculas/minúsculas.
+
+    Args:
+        text (str): O texto original.
+
+    Returns:
+        str: O texto normalizado.
+    """
+    return " ".join(text.split()).casefold()
+
+
+def make_cache_key(question: str, answer: str, model: str, prompt_version: str) -> str:
+    """
+    Gera a chave de cache de uma avaliação a partir da pergunta e da resposta normalizadas,
+    do modelo e da versão do prompt utilizados.
+
+    Args:
+        question (str): A pergunta.
+        answer (str): A resposta.
+        model (str): O modelo que realiza a avaliação.
+        prompt_version (str): A versão do prompt de análise.
+
+    Returns:
+        str: O hash SHA-256 (hexadecimal) que identifica a avaliação.
+    """
+    payload = json.dumps(
+        [normalize_text(question), normalize_text(answer), model, prompt_version],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AssessmentCache(abc.ABC):
+    """
+    Interface dos caches de avaliações, com contagem de acertos (hits) e faltas (misses).
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[Assessment]:
+        """
+        Busca uma avaliação no cache, contabilizando o acerto ou a falta.
+
+        Args:
+            key (str): A chave da avaliação.
+
+        Returns:
+            Optional[Assessment]: A avaliação armazenada, ou None se ausente ou expirada.
+        """
+        assessment = await self._get(key)
+        if assessment is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return assessment
+
+    async def set(self, key: str, assessment: Assessment):
+        """
+        Armazena uma avaliação no cache.
+
+        Args:
+            key (str): A chave da avaliação.
+            assessment (Assessment): A avaliação a ser armazenada.
+        """
+        await self._set(key, assessment)
+
+    async def close(self):
+        """
+        Libera os recursos do cache.
+        """
+
+    def stats(self) -> dict:
+        """
+        Retorna as estatísticas de uso do cache.
+
+        Returns:
+            dict: Acertos, faltas e taxa de acerto.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+    @abc.abstractmethod
+    async def _get(self, key: str) -> Optional[Assessment]:
+        """
+        Busca uma avaliação no armazenamento, sem contabilizar acertos e faltas.
+        """
+
+    @abc.abstractmethod
+    async def _set(self, key: str, assessment: Assessment):
+        """
+        Armazena uma avaliação no armazenamento.
+        """
+
+
+class LRUAssessmentCache(AssessmentCache):
+    """
+    Cache em memória do processo, com descarte LRU e expiração por tempo (TTL).
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 3600.0):
+        """
+        Args:
+            max_size (int): Número máximo de avaliações mantidas.
+            ttl (float): Tempo de vida, em segundos, de cada avaliação.
+        """
+        super().__init__()
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Assessment]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def _get(self, key: str) -> Optional[Assessment]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, assessment = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return assessment.model_copy()
+
+    async def _set(self, key: str, assessment: Assessment):
+        self._entries[key] = (time.monotonic() + self.ttl, assessment.model_copy())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+class SQLiteAssessmentCache(AssessmentCache):
+    """
+    Cache compartilhado entre processos, persistido em SQLite.
+
+    Serve como substituto local de um backend compartilhado (ex.: Redis); as operações
+    são executadas em uma thread para não bloquear o event loop.
+
+    As avaliações expiradas são removidas durante as gravações, no máximo uma vez a cada
+    `purge_interval` segundos; na mesma ocasião, se houver mais de `max_size` avaliações,
+    as mais antigas são descartadas.
+    """
+
+    def __init__(self, path: str = "assessment_cache.db", ttl: float = 3600.0,
+                 max_size: int = 100000, purge_interval: float = 60.0):
+        """
+        Args:
+            path (str): Caminho do arquivo SQLite.
+            ttl (float): Tempo de vida, em segundos, de cada avaliação.
+            max_size (int): Número máximo de avaliações mantidas após cada limpeza.
+            purge_interval (float): Intervalo mínimo, em segundos, entre as limpezas.
+        """
+        super().__init__()
+        self.ttl = ttl
+        self.max_size = max_size
+        self.purge_interval = purge_interval
+        self._last_purge = time.time()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._lock = asyncio.Lock()
+        with self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS assessments "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS assessments_expires_at ON assessments (expires_at)"
+            )
+
+    def _select(self, key: str) -> Optional[str]:
+        row = self._connection.execute(
+            "SELECT value FROM assessments WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        return row[0] if row else None
+
+    def _upsert(self, key: str, value: str):
+        now = time.time()
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO assessments (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, now + self.ttl)
+            )
+            if now - self._last_purge >= self.purge_interval:
+                self._last_purge = now
+                self._purge(now)
+
+    def _purge(self, now: float):
+        expired = self._connection.execute("DELETE FROM assessments WHERE expires_at <= ?", (now,)).rowcount
+        excess = self._connection.execute("SELECT COUNT(*) FROM assessments").fetchone()[0] - self.max_size
+        if excess > 0:
+            # Com o mesmo TTL para todas, as que expiram primeiro são as gravadas há mais tempo
+            self._connection.execute(
+                "DELETE FROM assessments WHERE key IN "
+                "(SELECT key FROM assessments ORDER BY expires_at LIMIT ?)", (excess,)
+            )
+        logger.debug("Limpeza do cache de avaliações: %d expirada(s) e %d excedente(s) removida(s).",
+                     expired, max(0, excess))
+
+    async def _get(self, key: str) -> Optional[Assessment]:
+        async with self._lock:
+            value = await asyncio.to_thread(self._select, key)
+        return Assessment.model_validate_json(value) if value else None
+
+    async def _set(self, key: str, assessment: Assessment):
+        async with self._lock:
+            await asyncio.to_thread(self._upsert, key, assessment.model_dump_json())
+
+    async def close(self):
+        self._connection.close()
+
+
+class TieredAssessmentCache(AssessmentCache):
+    """
+    Combina um cache local (rápido) com um cache compartilhado: a busca consulta primeiro
+    o local e, em caso de acerto no compartilhado, popula o local.
+    """
+
+    def __init__(self, local: AssessmentCache, shared: AssessmentCache):
+        """
+        Args:
+            local (AssessmentCache): Cache em memória do processo.
+            shared (AssessmentCache): Cache compartilhado entre processos.
+        """
+        super().__init__()
+        self.local = local
+        self.shared = shared
+
+    async def _get(self, key: str) -> Optional[Assessment]:
+        assessment = await self.local.get(key)
+        if assessment is None:
+            assessment = await self.shared.get(key)
+            if assessment is not None:
+                await self.local.set(key, assessment)
+        return assessment
+
+    async def _set(self, key: str, assessment: Assessment):
+        await self.local.set(key, assessment)
+        await self.shared.set(key, assessment)
+
+    async def close(self):
+        await self.local.close()
+        await self.shared.close()
+
+
+def build_assessment_cache(
+        backend: str = "memory",
+        max_size: int = 10000,
+        ttl: float = 3600.0,
+        sqlite_path: str = "assessment_cache.db",
+        sqlite_max_size: int = 100000
+) -> Optional[AssessmentCache]:
+    """
+    Cria o cache de avaliações conforme o backend configurado.
+
+    Args:
+        backend (str): `memory` (LRU local), `sqlite` (LRU local + SQLite compartilhado) ou `none`.
+        max_size (int): Número máximo de avaliações no cache local.
+        ttl (float): Tempo de vida, em segundos, de cada avaliação.
+        sqlite_path (str): Caminho do arquivo SQLite, usado pelo backend `sqlite`.
+        sqlite_max_size (int): Número máximo de avaliações no arquivo SQLite.
+
+    Returns:
+        Optional[AssessmentCache]: O cache criado, ou None se desabilitado.
+
+    Raises:
+        ValueError: Se o backend não for reconhecido.
+    """
+    if backend == "none":
+        return None
+    local = LRUAssessmentCache(max_size=max_size, ttl=ttl)
+    if backend == "memory":
+        return local
+    if backend == "sqlite":
+        return TieredAssessmentCache(local, SQLiteAssessmentCache(path=sqlite_path, ttl=ttl,
+                                                                       max_size=sqlite_max_size))
+    raise ValueError(f"Backend de cache de avaliações desconhecido: {backend}")
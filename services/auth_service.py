@@ -1,32 +1,116 @@
-import os
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Optional, Tuple
 
 import jwt
-from dotenv import load_dotenv
 
-# Carrega as variáveis de ambiente do arquivo .env
-load_dotenv()
+from config import Settings, get_settings
+from services import metrics
 
 # Configura o logger para o módulo atual
 logger = logging.getLogger(__name__)
 
 
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+class TokenCache:
+    """
+    Cache LRU limitado de tokens JWT já verificados.
+
+    A chave é o hash do token (junto com a chave secreta e o algoritmo usados na
+    verificação), e cada entrada expira no `exp` do token, de modo que tokens frequentes
+    são validados com uma única consulta ao dicionário.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 300.0):
+        """
+        Args:
+            max_size (int): Número máximo de tokens mantidos.
+            ttl (float): Tempo de vida máximo, em segundos, de cada entrada (usado para tokens sem `exp`).
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(token: str, secret_key: str, algorithm: str) -> str:
+        """
+        Gera a chave de cache de um token.
+        """
+        return hashlib.sha256(f"{algorithm}\n{secret_key}\n{token}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Retorna o payload do token, se estiver no cache e ainda não tiver expirado.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, payload: dict):
+        """
+        Armazena o payload de um token verificado até o seu `exp` (limitado ao `ttl`).
+        """
+        expires_at = time.time() + self.ttl
+        if isinstance(payload.get("exp"), (int, float)):
+            expires_at = min(expires_at, payload["exp"])
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Remove todas as entradas do cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """
+        Retorna as estatísticas de uso do cache.
+
+        Returns:
+            dict: Acertos, faltas e número de tokens armazenados.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+# Cache dos tokens verificados, compartilhado por todas as requisições do processo
+token_cache = TokenCache()
+
+
+def create_access_token(
+        data: dict,
+        expires_delta: Optional[timedelta] = None,
+        settings: Optional[Settings] = None
+) -> str:
     """
     Cria um token de acesso JWT.
 
     Args:
         data (dict): Dados a serem codificados no token.
         expires_delta (Optional[timedelta]): Tempo até a expiração do token. Se não fornecido, o padrão é 15 minutos.
+        settings (Optional[Settings]): Configurações da aplicação. Se não fornecidas, usa `get_settings()`.
 
     Returns:
         str: Token JWT codificado.
 
     Raises:
-        ValueError: Se `SECRET_KEY` ou `ALGORITHM` não estiverem configurados.
-        Exception: Para outros erros durante a geração do token.
+        Exception: Se ocorrer um erro durante a geração do token (ex.: algoritmo não suportado).
     """
     try:
         to_encode = data.copy()
@@ -36,21 +120,46 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             expire = datetime.now(timezone.utc) + timedelta(minutes=15)
         to_encode.update({"exp": expire})
 
-        secret_key = os.getenv("SECRET_KEY")
-        algorithm = os.getenv("ALGORITHM")
-        if not secret_key or not algorithm:
-            logger.error("SECRET_KEY ou ALGORITHM não configurados corretamente.")
-            raise ValueError("Configuração de segurança não encontrada.")
+        settings = settings or get_settings()
 
         logger.info("Iniciando a geração do token de acesso.")
-        encoded_jwt = jwt.encode(to_encode, secret_key, algorithm=algorithm)
+        encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
         logger.info("Token gerado com sucesso.")
         return encoded_jwt
     except Exception as e:
-        logger.error(f"Erro ao gerar o token: {e}")
+        logger.error("Erro ao gerar o token: %s", e)
         raise
 
 
+def decode_access_token(token: str, secret_key: str, algorithm: str) -> dict:
+    """
+    Decodifica e verifica um token de acesso JWT, reaproveitando verificações anteriores.
+
+    Tokens já verificados são servidos do cache até expirarem; apenas tokens novos ou
+    expirados no cache passam pela verificação completa da assinatura.
+
+    Args:
+        token (str): Token JWT.
+        secret_key (str): Chave secreta usada na assinatura.
+        algorithm (str): Algoritmo da assinatura.
+
+    Returns:
+        dict: O payload do token.
+
+    Raises:
+        jwt.PyJWTError: Se o token for inválido ou estiver expirado.
+    """
+    started = time.perf_counter()
+    key = TokenCache.make_key(token, secret_key, algorithm)
+    payload = token_cache.get(key)
+    cached = payload is not None
+    if not cached:
+        payload = jwt.decode(token, secret_key, algorithms=[algorithm])
+        token_cache.set(key, payload)
+    metrics.AUTH_DECODE_DURATION.labels("true" if cached else "false").observe(time.perf_counter() - started)
+    return payload
+
+
 def verify_user(username: str, password: str) -> Optional[dict]:
     """
     Verifica as credenciais do usuário.
@@ -62,10 +171,10 @@ def verify_user(username: str, password: str) -> Optional[dict]:
     Returns:
         Optional[dict]: Um dicionário com os dados do usuário se a autenticação for bem-sucedida, caso contrário, None.
     """
-    logger.info(f"Verificando credenciais para o usuário: {username}")
+    logger.info("Verificando credenciais para o usuário: %s", username)
     if username == "admin" and password == "admin":
-        logger.info(f"Usuário {username} autenticado com sucesso.")
+        logger.info("Usuário %s autenticado com sucesso.", username)
         return {"id": "123", "username": username}
 
-    logger.warning(f"Tentativa de autenticação falhou para o usuário: {username}")
+    logger.warning("Tentativa de autenticação falhou para o usuário: %s", username)
     return None
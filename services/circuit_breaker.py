@@ -0,0 +1,145 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from services.exceptions import UpstreamUnavailableError
+from services.resilience import is_retryable
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Disjuntor (circuit breaker) das chamadas ao serviço de IA.
+
+    - Fechado: as chamadas passam normalmente; falhas consecutivas do serviço são contadas.
+    - Aberto: após `failure_threshold` falhas consecutivas, as chamadas falham imediatamente
+      com UpstreamUnavailableError (sem aguardar o tempo limite) durante `recovery_timeout`.
+    - Meio-aberto: passado esse tempo, uma única chamada de teste é liberada; se for
+      bem-sucedida o disjuntor fecha, caso contrário volta a abrir.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        """
+        Args:
+            failure_threshold (int): Falhas consecutivas que abrem o disjuntor.
+            recovery_timeout (float): Tempo, em segundos, que o disjuntor permanece aberto.
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @staticmethod
+    def is_failure(error: BaseException) -> bool:
+        """
+        Indica se o erro revela indisponibilidade do serviço (tempo esgotado da chamada ao
+        modelo, falha de conexão ou 5xx). Recusas por limite de taxa (429), recusas locais de
+        admissão (fila, controle de ritmo ou cota do usuário) e erros de validação não contam.
+        """
+        if isinstance(error, UpstreamUnavailableError):
+            return False
+        return is_retryable(error) and getattr(error, "status_code", None) != 429
+
+    def _retry_after(self) -> float:
+        return max(1.0, self._opened_at + self.recovery_timeout - time.monotonic())
+
+    def check(self):
+        """
+        Verifica se uma chamada seria recusada agora, sem reservar a chamada de teste (ex.:
+        antes de iniciar uma resposta em streaming).
+
+        Raises:
+            UpstreamUnavailableError: Se o disjuntor estiver aberto ou já houver chamada de teste.
+        """
+        recovered = time.monotonic() >= self._opened_at + self.recovery_timeout
+        if (self.state == self.OPEN and not recovered) or (self.state == self.HALF_OPEN and self._trial_in_flight):
+            self.rejected += 1
+            raise UpstreamUnavailableError("Serviço de IA indisponível (disjuntor aberto).",
+                                           retry_after=self._retry_after())
+
+    def _before_call(self) -> bool:
+        """
+        Verifica se a chamada pode ser feita, retornando True se ela for a chamada de teste.
+
+        Raises:
+            UpstreamUnavailableError: Se o disjuntor estiver aberto ou já houver chamada de teste.
+        """
+        if self.state == self.OPEN and time.monotonic() >= self._opened_at + self.recovery_timeout:
+            self.state = self.HALF_OPEN
+            logger.info("Disjuntor meio-aberto: liberando chamada de teste.")
+        self.check()
+        if self.state == self.HALF_OPEN:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened += 1
+        self._opened_at = time.monotonic()
+        logger.error("Disjuntor aberto após %d falha(s); chamadas suspensas por %.0fs.",
+                     self.failures, self.recovery_timeout)
+
+    def record_success(self):
+        """
+        Registra uma chamada bem-sucedida, fechando o disjuntor.
+        """
+        if self.state != self.CLOSED:
+            logger.info("Disjuntor fechado: serviço de IA recuperado.")
+        self.state = self.CLOSED
+        self.failures = 0
+
+    def record_failure(self, error: BaseException):
+        """
+        Registra uma chamada com falha, abrindo o disjuntor se necessário.
+
+        Args:
+            error (BaseException): O erro lançado pela chamada.
+        """
+        if not self.is_failure(error):
+            return
+        self.failures += 1
+        # Falhas de chamadas iniciadas antes da abertura não prorrogam o disjuntor aberto
+        if self.state != self.OPEN and (self.state == self.HALF_OPEN or self.failures >= self.failure_threshold):
+            self._open()
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """
+        Protege uma chamada: falha imediatamente se o disjuntor estiver aberto e registra
+        o resultado ao final.
+
+        Raises:
+            UpstreamUnavailableError: Se o disjuntor estiver aberto.
+        """
+        trial = self._before_call()
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        else:
+            self.record_success()
+        finally:
+            if trial:
+                self._trial_in_flight = False
+
+    def stats(self) -> dict:
+        """
+        Retorna o estado do disjuntor.
+
+        Returns:
+            dict: Estado, falhas consecutivas, vezes que abriu e chamadas rejeitadas.
+        """
+        return {"state": self.state, "failures": self.failures, "opened": self.opened, "rejected": self.rejected}
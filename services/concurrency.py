@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Sequence, TypeVar
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+async def _run_bounded(
+        factory: Callable[[], Awaitable[T]],
+        local_semaphore: asyncio.Semaphore,
+        shared_semaphore: Optional[asyncio.Semaphore]
+) -> T:
+    """
+    Executa a corrotina criada por `factory` após obter vaga nos semáforos fornecidos.
+    """
+    async with local_semaphore:
+        if shared_semaphore is None:
+            return await factory()
+        async with shared_semaphore:
+            return await factory()
+
+
+async def gather_bounded(
+        factories: Sequence[Callable[[], Awaitable[T]]],
+        limit: int,
+        shared_semaphore: Optional[asyncio.Semaphore] = None
+) -> List[T]:
+    """
+    Executa as corrotinas concorrentemente, com limite de concorrência, preservando a ordem.
+
+    Cada corrotina só é criada quando consegue uma vaga no limite por chamada (`limit`) e,
+    se fornecido, no limite global compartilhado (`shared_semaphore`). Na primeira falha,
+    as demais tarefas são canceladas e a exceção é propagada (fail fast).
+
+    Args:
+        factories (Sequence[Callable[[], Awaitable[T]]]): Funções que criam as corrotinas.
+        limit (int): Número máximo de corrotinas em execução simultânea nesta chamada.
+        shared_semaphore (Optional[asyncio.Semaphore]): Semáforo global entre chamadas.
+
+    Returns:
+        List[T]: Resultados na mesma ordem das funções fornecidas.
+
+    Raises:
+        Exception: A primeira exceção lançada por uma das corrotinas.
+    """
+    local_semaphore = asyncio.Semaphore(max(1, limit))
+
+    tasks = [asyncio.ensure_future(_run_bounded(factory, local_semaphore, shared_semaphore))
+             for factory in factories]
+    if not tasks:
+        return []
+    try:
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    if pending:
+        logger.warning("Cancelando %d tarefa(s) após falha em tarefa concorrente.", len(pending))
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    for task in tasks:
+        if task.done() and not task.cancelled() and task.exception() is not None:
+            raise task.exception()
+    return [task.result() for task in tasks]
+
+
+async def iterate_bounded(
+        factories: Sequence[Callable[[], Awaitable[T]]],
+        limit: int,
+        shared_semaphore: Optional[asyncio.Semaphore] = None
+) -> AsyncIterator[T]:
+    """
+    Executa as corrotinas concorrentemente, com limite de concorrência, entregando cada
+    resultado assim que fica pronto (ordem de conclusão).
+
+    Na primeira falha, ou se o consumidor interromper a iteração, as tarefas restantes
+    são canceladas.
+
+    Args:
+        factories (Sequence[Callable[[], Awaitable[T]]]): Funções que criam as corrotinas.
+        limit (int): Número máximo de corrotinas em execução simultânea nesta chamada.
+        shared_semaphore (Optional[asyncio.Semaphore]): Semáforo global entre chamadas.
+
+    Yields:
+        T: Os resultados, na ordem em que são concluídos.
+
+    Raises:
+        Exception: A primeira exceção lançada por uma das corrotinas.
+    """
+    local_semaphore = asyncio.Semaphore(max(1, limit))
+
+    pending = {asyncio.ensure_future(_run_bounded(factory, local_semaphore, shared_semaphore))
+               for factory in factories}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,35 @@
+class UpstreamUnavailableError(Exception):
+    """
+    Erro lançado quando o serviço de IA não pode atender a chamada no momento (ex.: cota
+    de requisições esgotada dentro do prazo de espera), indicando quando tentar novamente.
+
+    Attributes:
+        retry_after (float): Tempo sugerido, em segundos, antes de uma nova tentativa.
+    """
+
+    def __init__(self, message: str = "Serviço de IA temporariamente indisponível.", retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class LLMProviderError(Exception):
+    """
+    Erro HTTP retornado por um provedor de LLM (ex.: backend compatível com a API da OpenAI
+    ou falha simulada do provedor local).
+
+    Attributes:
+        status_code (int): Código HTTP da resposta.
+        response (Optional[httpx.Response]): A resposta HTTP, se houver (usada para `Retry-After`).
+    """
+
+    def __init__(self, message: str, status_code: int, response=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+
+class QuotaExceededError(UpstreamUnavailableError):
+    """
+    Erro lançado quando o usuário excede a sua cota (tokens por minuto ou chamadas
+    simultâneas ao modelo), indicando quando tentar novamente. Convertido em HTTP 429.
+    """
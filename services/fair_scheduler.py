@@ -0,0 +1,317 @@
+import asyncio
+import contextlib
+import contextvars
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, Iterator, Optional
+
+from services.exceptions import QuotaExceededError, UpstreamUnavailableError
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+# Usuário (campo `sub` do token) em nome de quem as chamadas ao modelo são feitas
+_current_tenant: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_tenant", default=None)
+
+# Identificador usado para as chamadas sem usuário (ex.: reabastecimento da reserva de perguntas)
+BACKGROUND_TENANT = "-"
+
+
+def current_tenant() -> str:
+    """
+    Retorna o usuário em nome de quem a requisição ou tarefa atual é executada, ou
+    `BACKGROUND_TENANT` se não houver.
+    """
+    return _current_tenant.get() or BACKGROUND_TENANT
+
+
+def set_current_tenant(tenant: Optional[str]):
+    """
+    Define o usuário da requisição atual. O valor é herdado pelas tarefas criadas a partir
+    dela (ex.: chamadas concorrentes das rotas em lote e respostas em streaming).
+
+    Args:
+        tenant (Optional[str]): O identificador do usuário.
+    """
+    _current_tenant.set(tenant)
+
+
+@contextlib.contextmanager
+def tenant_scope(tenant: Optional[str]) -> Iterator[None]:
+    """
+    Define o usuário atual durante o bloco (ex.: execução de uma tarefa da fila).
+
+    Args:
+        tenant (Optional[str]): O identificador do usuário.
+    """
+    token = _current_tenant.set(tenant)
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def parse_tenant_weights(value: str) -> Dict[str, float]:
+    """
+    Interpreta os pesos por usuário no formato `usuario=peso,usuario=peso`.
+
+    Ex.: `123=2,456=0.5` dá ao usuário 123 o dobro da vazão de um usuário sem peso definido.
+
+    Args:
+        value (str): Os pesos configurados.
+
+    Returns:
+        Dict[str, float]: O peso de cada usuário.
+
+    Raises:
+        ValueError: Se algum item estiver fora do formato ou tiver peso não positivo.
+    """
+    weights = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        tenant, separator, weight = item.partition("=")
+        try:
+            weights[tenant.strip()] = float(weight)
+        except ValueError:
+            raise ValueError(f"Peso de usuário inválido: {item}")
+        if not separator or not tenant.strip() or weights[tenant.strip()] <= 0:
+            raise ValueError(f"Peso de usuário inválido: {item}")
+    return weights
+
+
+class _Budget:
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+
+
+class TenantBudgets:
+    """
+    Cota de tokens por minuto de cada usuário, em baldes de fichas independentes.
+
+    O consumo é debitado após cada chamada ao modelo (tokens informados pela API ou
+    estimados) e o saldo pode ficar negativo; enquanto estiver negativo, as chamadas do
+    usuário são recusadas com QuotaExceededError, indicando quando o saldo volta a ser positivo.
+    """
+
+    def __init__(self, tokens_per_minute: int, burst: Optional[int] = None, max_tenants: int = 10000):
+        """
+        Args:
+            tokens_per_minute (int): Tokens adicionados por minuto ao saldo de cada usuário.
+            burst (Optional[int]): Saldo máximo de cada usuário. Se omitido, igual à cota por minuto.
+            max_tenants (int): Quantidade de usuários acompanhados antes de descartar os saldos cheios.
+        """
+        self.rate = tokens_per_minute / 60.0
+        self.capacity = float(burst or tokens_per_minute)
+        self.max_tenants = max_tenants
+        self.rejected = 0
+        self._budgets: Dict[str, _Budget] = {}
+
+    def _budget(self, tenant: str) -> _Budget:
+        now = time.monotonic()
+        budget = self._budgets.get(tenant)
+        if budget is None:
+            if len(self._budgets) >= self.max_tenants:
+                self._prune()
+            budget = self._budgets[tenant] = _Budget(self.capacity, now)
+        budget.tokens = min(self.capacity, budget.tokens + (now - budget.updated) * self.rate)
+        budget.updated = now
+        return budget
+
+    def _prune(self):
+        # Saldos cheios equivalem a usuários novos e podem ser descartados
+        for tenant in [tenant for tenant, budget in self._budgets.items() if budget.tokens >= self.capacity]:
+            del self._budgets[tenant]
+
+    def check(self, tenant: str):
+        """
+        Verifica se o usuário ainda tem saldo.
+
+        Args:
+            tenant (str): O identificador do usuário.
+
+        Raises:
+            QuotaExceededError: Se o saldo do usuário estiver esgotado.
+        """
+        budget = self._budget(tenant)
+        if budget.tokens <= 0:
+            self.rejected += 1
+            logger.info("Cota de tokens esgotada para o usuário %s.", tenant)
+            raise QuotaExceededError("Cota de tokens do usuário esgotada.",
+                                     retry_after=(1 - budget.tokens) / self.rate)
+
+    def charge(self, tenant: str, tokens: int):
+        """
+        Debita do saldo do usuário os tokens consumidos por uma chamada.
+
+        Args:
+            tenant (str): O identificador do usuário.
+            tokens (int): Tokens consumidos.
+        """
+        self._budget(tenant).tokens -= tokens
+
+    def balance(self, tenant: str) -> float:
+        """
+        Retorna o saldo atual de tokens do usuário.
+        """
+        return self._budget(tenant).tokens
+
+    def stats(self) -> dict:
+        """
+        Retorna a quantidade de usuários acompanhados e de chamadas recusadas.
+        """
+        return {"tenants": len(self._budgets), "rejected": self.rejected}
+
+
+class FairScheduler:
+    """
+    Fila justa ponderada (weighted fair queuing) das chamadas ao modelo entre usuários.
+
+    Até `concurrency` chamadas são executadas simultaneamente. Quando não há vaga, as
+    chamadas aguardam na fila do seu usuário, e cada vaga liberada vai para o usuário com
+    a menor etiqueta de término virtual (`início + 1 / peso`): usuários com muitas chamadas
+    pendentes (ex.: geração de centenas de questões) dividem a vazão com os demais, na
+    proporção dos pesos, em vez de ocupá-la por inteiro.
+
+    Cada usuário pode ter um limite próprio de chamadas simultâneas e de chamadas em
+    espera; acima deste, as novas chamadas são recusadas com QuotaExceededError.
+    """
+
+    def __init__(
+            self,
+            concurrency: int,
+            tenant_concurrency: int = 0,
+            tenant_max_queued: int = 0,
+            weights: Optional[Dict[str, float]] = None,
+            queue_timeout: float = 30.0
+    ):
+        """
+        Args:
+            concurrency (int): Chamadas simultâneas ao modelo, somando todos os usuários.
+            tenant_concurrency (int): Chamadas simultâneas por usuário (0 não limita).
+            tenant_max_queued (int): Chamadas em espera por usuário antes das recusas (0 não limita).
+            weights (Optional[Dict[str, float]]): Peso de cada usuário (padrão 1).
+            queue_timeout (float): Tempo máximo, em segundos, de espera na fila.
+        """
+        self.concurrency = concurrency
+        self.tenant_concurrency = tenant_concurrency
+        self.tenant_max_queued = tenant_max_queued
+        self.weights = weights or {}
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.rejected = 0
+        self._virtual_time = 0.0
+        self._finish: Dict[str, float] = {}
+        self._running: Dict[str, int] = {}
+        self._waiting: Dict[str, Deque[asyncio.Future]] = {}
+
+    def _eligible(self, tenant: str) -> bool:
+        return not self.tenant_concurrency or self._running.get(tenant, 0) < self.tenant_concurrency
+
+    def _tag(self, tenant: str) -> float:
+        return max(self._virtual_time, self._finish.get(tenant, 0.0)) + 1 / self.weights.get(tenant, 1.0)
+
+    def _grant(self, tenant: str):
+        start = max(self._virtual_time, self._finish.get(tenant, 0.0))
+        self._finish[tenant] = start + 1 / self.weights.get(tenant, 1.0)
+        self._virtual_time = start
+        self._running[tenant] = self._running.get(tenant, 0) + 1
+        self.in_flight += 1
+
+    def _release(self, tenant: str):
+        self.in_flight -= 1
+        self._running[tenant] -= 1
+        if not self._running[tenant]:
+            del self._running[tenant]
+        if not self.in_flight and not self._waiting:
+            # Sem chamadas pendentes, as etiquetas antigas não influenciam mais a ordem
+            self._finish.clear()
+            self._virtual_time = 0.0
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.in_flight < self.concurrency:
+            candidates = [tenant for tenant in self._waiting if self._eligible(tenant)]
+            if not candidates:
+                return
+            tenant = min(candidates, key=self._tag)
+            queue = self._waiting[tenant]
+            future = queue.popleft()
+            if not queue:
+                del self._waiting[tenant]
+            if not future.done():
+                self._grant(tenant)
+                future.set_result(None)
+
+    async def acquire(self, tenant: str, deadline: float):
+        """
+        Obtém uma vaga de execução para o usuário, aguardando a sua vez até o prazo.
+
+        Args:
+            tenant (str): O identificador do usuário.
+            deadline (float): Instante (`time.monotonic()`) limite para a aquisição.
+
+        Raises:
+            QuotaExceededError: Se o usuário já tiver o máximo de chamadas em espera.
+            UpstreamUnavailableError: Se nenhuma vaga for liberada até o prazo.
+        """
+        if self.in_flight < self.concurrency and tenant not in self._waiting and self._eligible(tenant):
+            self._grant(tenant)
+            return
+        queue = self._waiting.get(tenant)
+        if self.tenant_max_queued and queue is not None and len(queue) >= self.tenant_max_queued:
+            self.rejected += 1
+            logger.info("Usuário %s excedeu o limite de chamadas em espera.", tenant)
+            raise QuotaExceededError("Limite de chamadas simultâneas do usuário excedido.", retry_after=1.0)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(tenant, deque()).append(future)
+        try:
+            await asyncio.wait_for(future, max(0.0, deadline - time.monotonic()))
+        except BaseException as e:
+            if future.done() and not future.cancelled():
+                # A vaga foi concedida junto com o cancelamento: devolve-a
+                self._release(tenant)
+            else:
+                future.cancel()
+                queue = self._waiting.get(tenant)
+                if queue is not None and future in queue:
+                    queue.remove(future)
+                    if not queue:
+                        del self._waiting[tenant]
+            if isinstance(e, asyncio.TimeoutError):
+                raise UpstreamUnavailableError("Serviço de IA sobrecarregado.", retry_after=1.0)
+            raise
+
+    @asynccontextmanager
+    async def slot(self, tenant: str) -> AsyncIterator[None]:
+        """
+        Aguarda a vez do usuário e mantém a vaga de execução durante a chamada.
+
+        Args:
+            tenant (str): O identificador do usuário.
+
+        Raises:
+            QuotaExceededError: Se o usuário já tiver o máximo de chamadas em espera.
+            UpstreamUnavailableError: Se a chamada não for liberada dentro do prazo da fila.
+        """
+        await self.acquire(tenant, time.monotonic() + self.queue_timeout)
+        try:
+            yield
+        finally:
+            self._release(tenant)
+
+    def stats(self) -> dict:
+        """
+        Retorna o estado atual da fila.
+
+        Returns:
+            dict: Chamadas em andamento, chamadas em espera, usuários com chamadas em espera e recusas.
+        """
+        return {
+            "in_flight": self.in_flight,
+            "queued": sum(len(queue) for queue in self._waiting.values()),
+            "queued_tenants": len(self._waiting),
+            "rejected": self.rejected,
+        }
@@ -1,136 +1,1044 @@
-import json
+import asyncio
+import contextlib
+import hashlib
 import logging
 import os
+import time
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Tuple, Union
 
-from dotenv import load_dotenv
-from groq import Groq
+import httpx
+from groq import AsyncGroq
+from pydantic import ValidationError
 
-from models import Assessment
-
-# Carrega as variáveis de ambiente do arquivo .env
-load_dotenv()
+from models import Assessment, GradingResult, Question
+from services.assessment_cache import AssessmentCache, make_cache_key, normalize_text
+from services.circuit_breaker import CircuitBreaker
+from services.concurrency import gather_bounded, iterate_bounded
+from services.exceptions import QuotaExceededError, UpstreamUnavailableError
+from services import metrics
+from services.fair_scheduler import FairScheduler, TenantBudgets, current_tenant
+from services.llm_providers import GroqProvider, LLMProvider
+from services.model_router import ModelRouter
+from services.rate_limiter import RateGovernor, estimate_tokens
+from services.resilience import RetryPolicy, is_retryable, retry_after_from
+from services.similarity_index import SimilarAssessmentIndex, make_question_key
+from services.single_flight import SingleFlight
+from services.structured_output import extract_json
+from services.tracing import tracer
 
 # Configura o logger para o módulo atual
 logger = logging.getLogger(__name__)
 
+# Modelo utilizado nas chamadas à API Groq
+MODEL = "llama3-70b-8192"
+
+# Versão do prompt de análise; deve ser alterada sempre que o prompt mudar, para
+# invalidar as avaliações armazenadas em cache
+ANALYSIS_PROMPT_VERSION = "2"
+
+
+def _resolve_api_key(api_key: Optional[str]) -> str:
+    """
+    Obtém a chave da API Groq, usando `GROQ_API_KEY` quando não fornecida.
+
+    Args:
+        api_key (Optional[str]): Chave da API informada explicitamente.
+
+    Returns:
+        str: A chave da API.
+
+    Raises:
+        ValueError: Se a chave da API não estiver configurada.
+    """
+    api_key = api_key or os.getenv("GROQ_API_KEY")
+    if not api_key:
+        logger.error("GROQ_API_KEY não configurada nas variáveis de ambiente.")
+        raise ValueError("GROQ_API_KEY não definida.")
+    return api_key
+
+
+def _build_pool_options(
+        max_connections: int,
+        max_keepalive_connections: int,
+        keepalive_expiry: float,
+        timeout: float
+) -> dict:
+    """
+    Monta os parâmetros do pool de conexões HTTP keep-alive usado pelo cliente Groq.
+
+    Returns:
+        dict: Argumentos `limits` e `timeout` para `httpx.AsyncClient`.
+    """
+    return {
+        "limits": httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry
+        ),
+        "timeout": httpx.Timeout(timeout, connect=5.0),
+    }
+
+
+def _prompt_key(prompt: str, model: str = MODEL) -> str:
+    """
+    Gera o identificador de uma chamada ao modelo a partir do prompt e do modelo.
+
+    Args:
+        prompt (str): O prompt enviado.
+        model (str): O modelo utilizado.
+
+    Returns:
+        str: O hash SHA-256 (hexadecimal) da chamada.
+    """
+    return hashlib.sha256(f"{model}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+def _build_question_prompt(theme: str) -> str:
+    """
+    Monta o prompt de geração de pergunta para o tema fornecido.
+
+    Args:
+        theme (str): O tema da pergunta.
+
+    Returns:
+        str: O prompt a ser enviado ao modelo.
+    """
+    return f"""
+        Por favor, crie uma pergunta interessante e desafiadora sobre {theme}.
+        A pergunta deve:
+        - Ser clara, bem formulada e direta
+        - Ter valor educacional
+        Orientações:
+        - O retorno deve ser somente a pergunta
+        - O retorno não deve incluir o pensamento da LLM
+        - O retorno deve ser em Português
+        - O retorno não deve ter nada além da pergunta
+        """
+
+
+def _build_analysis_prompt(question: str, answer: str) -> str:
+    """
+    Monta o prompt de análise da resposta para a pergunta fornecida.
+
+    Args:
+        question (str): A pergunta.
+        answer (str): A resposta a ser analisada.
 
-class GroqService:
+    Returns:
+        str: O prompt a ser enviado ao modelo.
+    """
+    return f"""
+        Analise a resposta dada para a pergunta abaixo:
+
+        Pergunta: {question}
+        Resposta: {answer}
+
+        Sua tarefa é:
+        1. Avaliar a resposta comparando com a resposta ideal.
+        2. Fornecer um feedback detalhado, apontando os acertos, erros e sugestões de melhoria.
+        3. Atribuir um score em percentual (0% a 100%) que indique o quão correta a resposta está.
+
+        Por favor, retorne somente um objeto JSON no seguinte formato:
+        {{
+            "score": "XX%",
+            "feedback": "Seu feedback detalhado aqui..."
+        }}
+        """
+
+
+def _build_repair_prompt(response_content: str) -> str:
+    """
+    Monta o prompt que pede ao modelo para reescrever uma análise fora do formato esperado.
+
+    Args:
+        response_content (str): O conteúdo que não pôde ser interpretado.
+
+    Returns:
+        str: O prompt a ser enviado ao modelo.
+    """
+    return f"""
+        O texto abaixo deveria ser a análise de uma resposta, mas não está no formato esperado.
+
+        Texto: {response_content}
+
+        Reescreva-o somente como um objeto JSON no seguinte formato, sem nenhum texto adicional:
+        {{
+            "score": "XX%",
+            "feedback": "Feedback detalhado..."
+        }}
+        """
+
+
+def _build_question_batch_prompt(theme: str, quantity: int) -> str:
+    """
+    Monta o prompt que pede ao modelo várias perguntas distintas em uma única completion.
+
+    Args:
+        theme (str): O tema das perguntas.
+        quantity (int): Quantidade de perguntas desejadas.
+
+    Returns:
+        str: O prompt a ser enviado ao modelo.
+    """
+    return f"""
+        Por favor, crie {quantity} perguntas interessantes, desafiadoras e distintas entre si sobre {theme}.
+        Cada pergunta deve:
+        - Ser clara, bem formulada e direta
+        - Ter valor educacional
+        Orientações:
+        - O retorno deve ser em Português
+        - O retorno não deve incluir o pensamento da LLM
+        - O retorno deve ser somente um objeto JSON no seguinte formato:
+        {{
+            "questions": ["Primeira pergunta?", "Segunda pergunta?"]
+        }}
+        """
+
+
+def _parse_question_batch(response_content: str) -> List[str]:
+    """
+    Converte o conteúdo retornado pelo modelo em uma lista de perguntas válidas.
+
+    Aceita tanto um objeto com a chave `questions` quanto um array JSON, cujos itens podem
+    ser textos ou objetos com a chave `question`. Itens inválidos ou repetidos são descartados.
+
+    Args:
+        response_content (str): Conteúdo JSON retornado pelo modelo.
+
+    Returns:
+        List[str]: As perguntas válidas encontradas, na ordem em que aparecem.
+    """
+    try:
+        result = extract_json(response_content)
+    except ValueError as e:
+        logger.warning("Erro ao interpretar lote de perguntas em JSON: %s", str(e))
+        return []
+
+    if isinstance(result, dict):
+        result = result.get("questions", [])
+    if not isinstance(result, list):
+        return []
+
+    questions = []
+    for item in result:
+        if isinstance(item, dict):
+            item = item.get("question")
+        try:
+            question = Question(question=item).question
+        except ValidationError:
+            continue
+        if question not in questions:
+            questions.append(question)
+    return questions
+
+
+def parse_assessment(response_content: str) -> Assessment:
+    """
+    Converte o conteúdo retornado pelo modelo em um objeto Assessment.
+
+    O JSON é extraído mesmo quando vem envolto em texto ou em blocos de código, e o
+    score é normalizado (ex.: `8/10` -> `80%`, com `score_value` igual a 80).
+
+    Args:
+        response_content (str): Conteúdo JSON retornado pelo modelo.
+
+    Returns:
+        Assessment: Um objeto contendo o feedback e o score da análise.
+
+    Raises:
+        ValueError: Se a resposta recebida não contiver uma avaliação JSON válida.
+    """
+    try:
+        result = extract_json(response_content)
+        if not isinstance(result, dict):
+            raise ValueError("A avaliação deve ser um objeto JSON.")
+        with tracer.span("assessment.validate"):
+            assessment = Assessment(feedback=result.get("feedback"), score=result.get("score"))
+    except ValueError as e:
+        logger.error("Erro ao interpretar resposta JSON: %s", str(e))
+        raise ValueError("Resposta em formato inválido.")
+
+    logger.info("Análise concluída com sucesso, score: %s", assessment.score)
+    return assessment
+
+
+def grading_result(index: int, result: Union[Assessment, Exception]) -> GradingResult:
+    """
+    Converte o resultado da avaliação de um item da correção em lote em um GradingResult,
+    transformando a falha do item em uma mensagem de erro.
+
+    Args:
+        index (int): Posição do item na lista enviada.
+        result (Union[Assessment, Exception]): A avaliação ou o erro do item.
+
+    Returns:
+        GradingResult: O resultado do item.
+    """
+    if isinstance(result, Assessment):
+        return GradingResult(index=index, assessment=result)
+    if isinstance(result, QuotaExceededError):
+        error = "Cota do usuário excedida."
+    elif isinstance(result, UpstreamUnavailableError):
+        error = "Serviço de IA temporariamente indisponível."
+    elif isinstance(result, ValueError):
+        error = "Resposta do modelo em formato inválido."
+    else:
+        error = "Erro interno ao analisar resposta."
+    return GradingResult(index=index, error=error)
+
+
+def _dedupe_pairs(pairs: Sequence[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], List[int]]:
+    """
+    Remove pares de questão e resposta repetidos (após normalização do texto).
+
+    Args:
+        pairs (Sequence[Tuple[str, str]]): Os pares de questão e resposta.
+
+    Returns:
+        Tuple[List[Tuple[str, str]], List[int]]: Os pares distintos e, para cada par original,
+            a posição do par distinto correspondente.
+    """
+    unique: Dict[Tuple[str, str], int] = {}
+    distinct = []
+    positions = []
+    for question, answer in pairs:
+        key = (normalize_text(question), normalize_text(answer))
+        if key not in unique:
+            unique[key] = len(distinct)
+            distinct.append((question, answer))
+        positions.append(unique[key])
+    return distinct, positions
+
+
+class AsyncGroqService:
     """
     Serviço para interagir com a API Groq.
+
+    Usa o cliente `AsyncGroq`, de modo que as chamadas à API não ocupam uma thread do
+    threadpool enquanto aguardam a rede: um único worker consegue manter centenas de
+    completions em andamento simultaneamente.
     """
 
-    def __init__(self):
+    def __init__(
+            self,
+            api_key: Optional[str] = None,
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            keepalive_expiry: float = 30.0,
+            timeout: float = 60.0,
+            max_concurrency_per_request: int = 5,
+            max_concurrency: int = 50,
+            batch_size: int = 10,
+            batch_generation: bool = False,
+            assessment_cache: Optional[AssessmentCache] = None,
+            coalesce_requests: bool = True,
+            rate_governor: Optional[RateGovernor] = None,
+            retry_policy: Optional[RetryPolicy] = None,
+            circuit_breaker: Optional[CircuitBreaker] = None,
+            model: str = MODEL,
+            providers: Optional[Dict[str, LLMProvider]] = None,
+            default_provider: str = "groq",
+            model_router: Optional[ModelRouter] = None,
+            json_mode: bool = True,
+            bulk_concurrency: int = 20,
+            tenant_budgets: Optional[TenantBudgets] = None,
+            fair_scheduler: Optional[FairScheduler] = None,
+            similarity_index: Optional[SimilarAssessmentIndex] = None
+    ):
+        """
+        Inicializa o serviço Groq assíncrono com um pool de conexões keep-alive próprio.
+
+        Args:
+            api_key (Optional[str]): Chave da API. Se não fornecida, é lida de `GROQ_API_KEY`.
+            max_connections (int): Número máximo de conexões simultâneas no pool.
+            max_keepalive_connections (int): Número máximo de conexões ociosas mantidas abertas.
+            keepalive_expiry (float): Tempo, em segundos, que uma conexão ociosa permanece aberta.
+            timeout (float): Tempo limite, em segundos, de cada chamada à API.
+            max_concurrency_per_request (int): Máximo de chamadas simultâneas em uma geração múltipla.
+            max_concurrency (int): Máximo de chamadas simultâneas de geração múltipla no serviço todo.
+            batch_size (int): Máximo de perguntas pedidas em uma única completion no modo em lote.
+            batch_generation (bool): Se o modo em lote é o padrão da geração múltipla.
+            assessment_cache (Optional[AssessmentCache]): Cache das avaliações de respostas.
+            coalesce_requests (bool): Se chamadas concorrentes idênticas compartilham uma única chamada ao modelo.
+            rate_governor (Optional[RateGovernor]): Controle de ritmo das chamadas à API (cota e concorrência).
+            retry_policy (Optional[RetryPolicy]): Política de novas tentativas, tempo limite e hedge das
+                chamadas. Quando fornecida, substitui as novas tentativas internas do SDK da Groq.
+            circuit_breaker (Optional[CircuitBreaker]): Disjuntor que suspende as chamadas enquanto
+                a API estiver indisponível.
+            model (str): Modelo utilizado nas chamadas à API Groq.
+            providers (Optional[Dict[str, LLMProvider]]): Provedores de LLM adicionais, por nome.
+                O provedor `groq` é sempre registrado.
+            default_provider (str): Nome do provedor usado quando nenhum é informado na chamada.
+            model_router (Optional[ModelRouter]): Política de escolha do modelo por tarefa e tamanho
+                da entrada, com métricas de latência e custo por modelo.
+            json_mode (bool): Se a análise de respostas pede ao provedor saída em modo JSON.
+            bulk_concurrency (int): Máximo de análises simultâneas em uma correção em lote.
+            tenant_budgets (Optional[TenantBudgets]): Cota de tokens por minuto de cada usuário.
+            fair_scheduler (Optional[FairScheduler]): Fila justa das chamadas ao modelo entre usuários.
+            similarity_index (Optional[SimilarAssessmentIndex]): Índice das respostas já avaliadas, para
+                reaproveitar a avaliação de respostas quase idênticas à mesma pergunta.
+
+        Raises:
+            ValueError: Se a chave da API não estiver configurada ou o provedor padrão não existir.
+        """
+        api_key = _resolve_api_key(api_key)
+        self.http_client = httpx.AsyncClient(
+            **_build_pool_options(max_connections, max_keepalive_connections, keepalive_expiry, timeout)
+        )
+        self.client = AsyncGroq(
+            api_key=api_key,
+            http_client=self.http_client,
+            **({"max_retries": 0} if retry_policy is not None else {})
+        )
+        self.max_concurrency_per_request = max_concurrency_per_request
+        self._fanout_semaphore = asyncio.Semaphore(max_concurrency)
+        self.batch_size = max(1, batch_size)
+        self.batch_generation = batch_generation
+        self.assessment_cache = assessment_cache
+        self.single_flight = SingleFlight() if coalesce_requests else None
+        self.rate_governor = rate_governor
+        self.retry_policy = retry_policy
+        self.circuit_breaker = circuit_breaker
+        self.providers: Dict[str, LLMProvider] = {"groq": GroqProvider(self.client, model), **(providers or {})}
+        self.default_provider = default_provider
+        self.provider(default_provider)
+        self.model_router = model_router
+        self.json_mode = json_mode
+        self.analysis_repairs = 0
+        self.bulk_concurrency = max(1, bulk_concurrency)
+        self.tenant_budgets = tenant_budgets
+        self.fair_scheduler = fair_scheduler
+        self.similarity_index = similarity_index
+        logger.info("AsyncGroqService inicializado com sucesso (max_connections=%d).", max_connections)
+
+    async def close(self):
+        """
+        Encerra o pool de conexões HTTP do serviço.
+        """
+        for provider in self.providers.values():
+            await provider.close()
+        await self.http_client.aclose()
+        if self.assessment_cache is not None:
+            await self.assessment_cache.close()
+        logger.info("AsyncGroqService encerrado.")
+
+    def provider(self, name: Optional[str] = None) -> LLMProvider:
+        """
+        Retorna o provedor de LLM registrado com o nome fornecido.
+
+        Args:
+            name (Optional[str]): Nome do provedor. Se omitido, usa o provedor padrão.
+
+        Returns:
+            LLMProvider: O provedor correspondente.
+
+        Raises:
+            ValueError: Se o provedor não estiver registrado.
+        """
+        name = name or self.default_provider
+        if name not in self.providers:
+            raise ValueError(f"Provedor de LLM desconhecido: {name}")
+        return self.providers[name]
+
+    def _select_model(self, task: str, prompt: str, provider: Optional[str] = None) -> str:
+        """
+        Escolhe o modelo da chamada conforme a política de roteamento, se houver.
+
+        Args:
+            task (str): A tarefa (`question`, `question_batch` ou `analysis`).
+            prompt (str): O prompt a ser enviado.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+
+        Returns:
+            str: O modelo escolhido, ou o modelo do provedor se nenhuma regra se aplicar.
+        """
+        llm = self.provider(provider)
+        if self.model_router is not None:
+            model = self.model_router.select(provider or self.default_provider, task,
+                                             estimate_tokens(prompt, completion_reserve=0))
+            if model:
+                return model
+        return llm.model
+
+    def _record_model(self, provider: Optional[str], model: str, started: float,
+                      total_tokens: Optional[int] = None, error: bool = False):
+        """
+        Registra a latência e o consumo de uma chamada nas métricas do processo e, se houver
+        roteamento, nas métricas por modelo do roteador.
+        """
+        latency = time.monotonic() - started
+        provider = provider or self.default_provider
+        metrics.LLM_REQUESTS.labels(provider, model, "error" if error else "success").inc()
+        if not error:
+            metrics.LLM_REQUEST_DURATION.labels(provider, model).observe(latency)
+            if total_tokens:
+                metrics.LLM_TOKENS.labels(provider, model).inc(total_tokens)
+        if self.model_router is not None:
+            self.model_router.record(model, latency, total_tokens, error)
+
+    @contextlib.asynccontextmanager
+    async def _governed(self, estimated_tokens: int) -> AsyncIterator[None]:
+        """
+        Libera a chamada na vez do usuário atual na fila justa e conforme o controle de
+        ritmo, se houver.
+        """
+        fair = self.fair_scheduler.slot(current_tenant()) if self.fair_scheduler is not None else None
+        governed = self.rate_governor.slot(estimated_tokens) if self.rate_governor is not None else None
+        async with fair or contextlib.nullcontext(), governed or contextlib.nullcontext():
+            yield
+
+    def _check_budget(self):
+        """
+        Recusa a chamada se o usuário atual tiver esgotado a sua cota de tokens.
+        """
+        if self.tenant_budgets is not None:
+            self.tenant_budgets.check(current_tenant())
+
+    def _charge_budget(self, tokens: int):
+        """
+        Debita da cota do usuário atual os tokens consumidos por uma chamada.
+        """
+        if self.tenant_budgets is not None:
+            self.tenant_budgets.charge(current_tenant(), tokens)
+
+    def check_available(self):
+        """
+        Verifica se as chamadas ao modelo do usuário atual seriam recusadas de imediato, para
+        que as rotas em streaming respondam com o código HTTP adequado antes de iniciar a
+        resposta.
+
+        Raises:
+            QuotaExceededError: Se a cota de tokens do usuário atual estiver esgotada.
+            UpstreamUnavailableError: Se o disjuntor estiver aberto.
+        """
+        self._check_budget()
+        if self.circuit_breaker is not None:
+            self.circuit_breaker.check()
+
+    def _flight_key(self, key: str, provider: Optional[str] = None) -> str:
         """
-        Inicializa o serviço Groq, carregando a chave da API das variáveis de ambiente.
-        Lança um erro se a chave da API não estiver configurada.
+        Chave do agrupamento de chamadas concorrentes idênticas, por usuário e provedor.
+
+        A chamada compartilhada é executada no contexto de quem a iniciou (cota de tokens e
+        fila justa); agrupando apenas chamadas do mesmo usuário, cada um é admitido e cobrado
+        pelas suas chamadas e nunca recebe o erro de cota de outro usuário.
+        """
+        return f"{current_tenant()}\n{provider or self.default_provider}\n{key}"
+
+    def _guarded(self):
+        """
+        Retorna o contexto que protege a chamada com o disjuntor, se houver.
+        """
+        if self.circuit_breaker is None:
+            return contextlib.nullcontext()
+        return self.circuit_breaker.guard()
+
+    async def _complete(self, prompt: str, task: str, provider: Optional[str] = None, **options) -> str:
+        """
+        Envia o prompt ao modelo escolhido para a tarefa e retorna o conteúdo da completion.
+
+        Com o disjuntor aberto ou a cota de tokens do usuário atual esgotada, a chamada falha
+        imediatamente. Cada tentativa passa pela fila justa entre usuários e pelo controle de
+        ritmo; falhas transitórias são repetidas conforme a política de novas
+        tentativas, se houver.
+
+        Args:
+            prompt (str): O prompt de sistema a ser enviado.
+            task (str): A tarefa, usada na escolha do modelo (`question`, `question_batch` ou `analysis`).
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+            **options: Parâmetros adicionais repassados à API (ex.: `response_format`).
+
+        Returns:
+            str: O conteúdo retornado pelo modelo.
+
+        Raises:
+            QuotaExceededError: Se o usuário atual exceder a sua cota.
+            UpstreamUnavailableError: Se a cota de chamadas não for liberada a tempo, se o
+                disjuntor estiver aberto, se o tempo limite se esgotar em todas as tentativas
+                ou se o serviço indicar quando tentar novamente (`Retry-After`).
+        """
+        llm = self.provider(provider)
+        model = self._select_model(task, prompt, provider)
+        estimated_tokens = estimate_tokens(prompt)
+        self._check_budget()
+
+        async def attempt():
+            # Executada após a admissão: o tempo limite e a latência cobrem apenas o modelo
+            with tracer.span("llm.attempt", **{"llm.model": model}) as span:
+                started = time.monotonic()
+                try:
+                    response = await llm.complete(prompt, model, **options)
+                except Exception:
+                    self._record_model(provider, model, started, error=True)
+                    raise
+                self._record_model(provider, model, started, response.total_tokens)
+                span.set_attribute("llm.usage.total_tokens", response.total_tokens)
+                return response
+
+        def admission():
+            return self._governed(estimated_tokens)
+
+        with tracer.span("llm.call", **{"llm.task": task, "llm.provider": provider or self.default_provider,
+                                        "llm.model": model, "llm.estimated_tokens": estimated_tokens}) as span:
+            try:
+                async with self._guarded():
+                    if self.retry_policy is None:
+                        async with admission():
+                            response = await attempt()
+                    else:
+                        response = await self.retry_policy.call(attempt, admission)
+            except asyncio.TimeoutError as e:
+                # Tempo limite esgotado em todas as tentativas: indisponibilidade momentânea (503)
+                logger.warning("Tempo limite esgotado na chamada ao modelo %s.", model)
+                raise UpstreamUnavailableError("Tempo limite do serviço de IA esgotado.", retry_after=1.0) from e
+            except Exception as e:
+                # Falha transitória com espera indicada pelo servidor (ex.: 429 com Retry-After):
+                # repassada como indisponibilidade momentânea, preservando o Retry-After
+                retry_after = retry_after_from(e)
+                if retry_after is None or not is_retryable(e):
+                    raise
+                logger.warning("Serviço de IA pediu nova tentativa em %.1fs: %s", retry_after, str(e))
+                raise UpstreamUnavailableError("Serviço de IA temporariamente indisponível.",
+                                               retry_after=retry_after) from e
+            span.set_attribute("llm.usage.total_tokens", response.total_tokens)
+        if self.rate_governor is not None:
+            self.rate_governor.record_usage(estimated_tokens, response.total_tokens)
+        self._charge_budget(response.total_tokens or estimated_tokens)
+        return response.content
+
+    async def _stream(self, prompt: str, task: str, provider: Optional[str] = None, **options) -> AsyncIterator[str]:
+        """
+        Envia o prompt ao modelo em modo streaming, repassando os trechos conforme chegam.
+
+        Chamadas em streaming não são repetidas, pois trechos já podem ter sido entregues.
+
+        Args:
+            prompt (str): O prompt de sistema a ser enviado.
+            task (str): A tarefa, usada na escolha do modelo (`question` ou `analysis`).
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+            **options: Parâmetros adicionais repassados à API.
+
+        Yields:
+            str: Os trechos de texto gerados pelo modelo.
+
+        Raises:
+            QuotaExceededError: Se o usuário atual exceder a sua cota.
+            UpstreamUnavailableError: Se a cota de chamadas não for liberada a tempo ou se o
+                disjuntor estiver aberto.
         """
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            logger.error("GROQ_API_KEY não configurada nas variáveis de ambiente.")
-            raise ValueError("GROQ_API_KEY não definida.")
-        self.client = Groq(api_key=api_key)
-        logger.info("GroqService inicializado com sucesso.")
+        llm = self.provider(provider)
+        model = self._select_model(task, prompt, provider)
+        self._check_budget()
+        # O span não se torna o atual, pois o gerador pode ser encerrado em outro contexto
+        span = tracer.start_span("llm.stream", {"llm.task": task, "llm.provider": provider or self.default_provider,
+                                                "llm.model": model})
+        try:
+            estimated_tokens = estimate_tokens(prompt)
+            async with self._guarded(), self._governed(estimated_tokens):
+                started = time.monotonic()
+                try:
+                    async for delta in llm.stream(prompt, model, **options):
+                        yield delta
+                except Exception as e:
+                    self._record_model(provider, model, started, error=True)
+                    span.set_error(e)
+                    raise
+                self._record_model(provider, model, started)
+            self._charge_budget(estimated_tokens)
+        finally:
+            span.end()
 
-    def create_question(self, theme: str):
+    async def create_question(self, theme: str, provider: Optional[str] = None) -> str:
         """
-        Cria uma pergunta baseada no tema fornecido.
+        Cria, de forma assíncrona, uma pergunta baseada no tema fornecido.
 
         Args:
             theme (str): O tema para o qual a pergunta será criada.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
 
         Returns:
             str: A pergunta gerada.
 
         Raises:
+            UpstreamUnavailableError: Se o serviço de IA não puder atender a chamada no momento.
             Exception: Se ocorrer um erro ao gerar a pergunta.
         """
         logger.info("Iniciando criação de pergunta para o tema: '%s'", theme)
-        prompt = f"""
-        Por favor, crie uma pergunta interessante e desafiadora sobre {theme}.
-        A pergunta deve:
-        - Ser clara, bem formulada e direta
-        - Ter valor educacional
-        Orientações:
-        - O retorno deve ser somente a pergunta
-        - O retorno não deve incluir o pensamento da LLM
-        - O retorno deve ser em Português
-        - O retorno não deve ter nada além da pergunta
-        """
+        prompt = _build_question_prompt(theme)
 
         try:
-            completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": prompt
-                    }
-                ],
-                model="llama3-70b-8192"
-            )
-            question_text = completion.choices[0].message.content
+            question_text = await self._complete(prompt, "question", provider)
             logger.info("Pergunta gerada com sucesso para o tema: '%s'", theme)
             return question_text
+        except UpstreamUnavailableError:
+            raise
         except Exception as e:
             logger.error("Erro ao criar pergunta para o tema '%s': %s", theme, str(e), exc_info=True)
             raise Exception("Erro interno ao gerar a pergunta.")
 
-    def analyze_response(self, question: str, answer: str) -> Assessment:
+    async def create_shared_question(self, theme: str, provider: Optional[str] = None) -> str:
+        """
+        Cria uma pergunta para o tema, compartilhando a chamada ao modelo entre requisições
+        concorrentes idênticas (mesmo usuário, provedor e prompt): todas recebem a mesma
+        pergunta ou a mesma exceção.
+
+        Args:
+            theme (str): O tema para o qual a pergunta será criada.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+
+        Returns:
+            str: A pergunta gerada.
+
+        Raises:
+            UpstreamUnavailableError: Se o serviço de IA não puder atender a chamada no momento.
+            Exception: Se ocorrer um erro ao gerar a pergunta.
+        """
+        if self.single_flight is None:
+            return await self.create_question(theme, provider)
+        prompt = _build_question_prompt(theme)
+        key = self._flight_key(_prompt_key(prompt, self._select_model("question", prompt, provider)), provider)
+        return await self.single_flight.do(key, lambda: self.create_question(theme, provider))
+
+    async def create_questions(self, theme: str, quantity: int, provider: Optional[str] = None) -> List[str]:
+        """
+        Cria várias perguntas para o tema fornecido, disparando as chamadas concorrentemente.
+
+        A concorrência é limitada por requisição e globalmente no serviço. A ordem dos
+        resultados é preservada e, na primeira falha, as chamadas restantes são canceladas.
+
+        Args:
+            theme (str): O tema para o qual as perguntas serão criadas.
+            quantity (int): Quantidade de perguntas a serem criadas.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+
+        Returns:
+            List[str]: As perguntas geradas.
+
+        Raises:
+            Exception: Se ocorrer um erro ao gerar alguma das perguntas.
+        """
+        logger.info("Iniciando criação concorrente de %d pergunta(s) para o tema: '%s'", quantity, theme)
+        return await gather_bounded(
+            [lambda: self.create_question(theme, provider) for _ in range(quantity)],
+            limit=self.max_concurrency_per_request,
+            shared_semaphore=self._fanout_semaphore
+        )
+
+    async def _create_question_batch(self, theme: str, quantity: int, provider: Optional[str] = None) -> List[str]:
+        """
+        Pede ao modelo até `quantity` perguntas distintas em uma única completion JSON.
+
+        Args:
+            theme (str): O tema das perguntas.
+            quantity (int): Quantidade de perguntas pedidas.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+
+        Returns:
+            List[str]: As perguntas válidas retornadas (pode haver menos que o pedido).
+
+        Raises:
+            Exception: Se ocorrer um erro na chamada à API.
+        """
+        prompt = _build_question_batch_prompt(theme, quantity)
+        try:
+            response_content = await self._complete(prompt, "question_batch", provider, response_format={"type": "json_object"})
+        except UpstreamUnavailableError:
+            raise
+        except Exception as e:
+            logger.error("Erro ao criar lote de perguntas para o tema '%s': %s", theme, str(e), exc_info=True)
+            raise Exception("Erro interno ao gerar a pergunta.")
+        return _parse_question_batch(response_content)[:quantity]
+
+    async def create_questions_batch(self, theme: str, quantity: int, provider: Optional[str] = None) -> List[str]:
         """
-        Analisa a resposta fornecida para uma pergunta específica.
+        Cria várias perguntas pedindo-as em lote ao modelo, em vez de uma chamada por pergunta.
+
+        As perguntas são pedidas em blocos de até `batch_size` por completion. Se o modelo
+        retornar menos perguntas válidas que o pedido, a diferença é completada com
+        chamadas individuais (`create_questions`).
+
+        Args:
+            theme (str): O tema para o qual as perguntas serão criadas.
+            quantity (int): Quantidade de perguntas a serem criadas.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+
+        Returns:
+            List[str]: As perguntas geradas.
+
+        Raises:
+            Exception: Se ocorrer um erro ao gerar as perguntas.
+        """
+        logger.info("Iniciando criação em lote de %d pergunta(s) para o tema: '%s'", quantity, theme)
+        sizes = [min(self.batch_size, quantity - start) for start in range(0, quantity, self.batch_size)]
+        batches = await gather_bounded(
+            [lambda size=size: self._create_question_batch(theme, size, provider) for size in sizes],
+            limit=self.max_concurrency_per_request,
+            shared_semaphore=self._fanout_semaphore
+        )
+
+        questions = []
+        for batch in batches:
+            questions.extend(question for question in batch if question not in questions)
+
+        shortfall = quantity - len(questions)
+        if shortfall > 0:
+            logger.warning("Lote retornou %d pergunta(s) a menos para o tema '%s'; completando individualmente.",
+                           shortfall, theme)
+            questions.extend(await self.create_questions(theme, shortfall, provider))
+        return questions[:quantity]
+
+    async def stream_question(self, theme: str, provider: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Cria uma pergunta baseada no tema fornecido, repassando os trechos conforme são gerados.
+
+        Args:
+            theme (str): O tema para o qual a pergunta será criada.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+
+        Yields:
+            str: Os trechos de texto da pergunta.
+
+        Raises:
+            UpstreamUnavailableError: Se o serviço de IA não puder atender a chamada no momento.
+            Exception: Se ocorrer um erro ao gerar a pergunta.
+        """
+        logger.info("Iniciando criação de pergunta (streaming) para o tema: '%s'", theme)
+        prompt = _build_question_prompt(theme)
+        try:
+            async for delta in self._stream(prompt, "question", provider):
+                yield delta
+        except UpstreamUnavailableError:
+            raise
+        except Exception as e:
+            logger.error("Erro ao criar pergunta (streaming) para o tema '%s': %s", theme, str(e), exc_info=True)
+            raise Exception("Erro interno ao gerar a pergunta.")
+
+    async def iter_questions(self, theme: str, quantity: int, provider: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Cria várias perguntas concorrentemente, entregando cada uma assim que fica pronta.
+
+        Args:
+            theme (str): O tema para o qual as perguntas serão criadas.
+            quantity (int): Quantidade de perguntas a serem criadas.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+
+        Yields:
+            str: As perguntas, na ordem em que são concluídas.
+
+        Raises:
+            Exception: Se ocorrer um erro ao gerar alguma das perguntas.
+        """
+        logger.info("Iniciando criação incremental de %d pergunta(s) para o tema: '%s'", quantity, theme)
+        async for question_text in iterate_bounded(
+                [lambda: self.create_question(theme, provider) for _ in range(quantity)],
+                limit=self.max_concurrency_per_request,
+                shared_semaphore=self._fanout_semaphore
+        ):
+            yield question_text
+
+    async def analyze_response(self, question: str, answer: str, provider: Optional[str] = None) -> Assessment:
+        """
+        Analisa, de forma assíncrona, a resposta fornecida para uma pergunta específica.
+
+        Se houver cache de avaliações, respostas equivalentes (mesma pergunta e resposta
+        normalizadas, mesmo provedor, modelo e versão do prompt) reaproveitam a avaliação
+        anterior. Se houver índice de similaridade, respostas quase idênticas (ex.: outra
+        pontuação, acentuação ou ordem das palavras) também a reaproveitam, marcada com
+        `reused`. Análises equivalentes concorrentes do mesmo usuário compartilham uma única
+        chamada ao modelo.
 
         Args:
             question (str): A pergunta para a qual a resposta será analisada.
             answer (str): A resposta que será analisada.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
 
         Returns:
             Assessment: Um objeto contendo o feedback e o score da análise.
 
         Raises:
+            UpstreamUnavailableError: Se o serviço de IA não puder atender a chamada no momento.
             Exception: Se ocorrer um erro ao analisar a resposta.
             ValueError: Se a resposta recebida não estiver em formato JSON válido.
         """
         logger.info("Iniciando análise de resposta para a pergunta: '%.50s...'", question)
-        prompt = f"""
-        Analise a resposta dada para a pergunta abaixo:
+        with tracer.span("prompt.build", **{"llm.task": "analysis"}) as span:
+            prompt = _build_analysis_prompt(question, answer)
+            model = self._select_model("analysis", prompt, provider)
+            # Modelos de mesmo nome em provedores diferentes não compartilham avaliações
+            qualified_model = f"{provider or self.default_provider}/{model}"
+            key = make_cache_key(question, answer, qualified_model, ANALYSIS_PROMPT_VERSION)
+            span.set_attribute("llm.model", model)
+        if self.assessment_cache is not None:
+            with tracer.span("assessment_cache.get") as span:
+                cached = await self.assessment_cache.get(key)
+                span.set_attribute("cache.hit", cached is not None)
+            if cached is not None:
+                logger.info("Avaliação obtida do cache para a pergunta: '%.50s...'", question)
+                return cached
+        if self.similarity_index is not None:
+            question_key = make_question_key(question, qualified_model, ANALYSIS_PROMPT_VERSION)
+            with tracer.span("similarity_index.lookup") as span:
+                similar = self.similarity_index.lookup(question_key, answer)
+                span.set_attribute("cache.hit", similar is not None)
+            if similar is not None:
+                logger.info("Avaliação reaproveitada de resposta semelhante para a pergunta: '%.50s...'", question)
+                return similar
 
-        Pergunta: {question}
-        Resposta: {answer}
+        if self.single_flight is None:
+            assessment = await self._analyze_response(question, answer, key, provider, prompt)
+        else:
+            assessment = await self.single_flight.do(
+                self._flight_key(key, provider), lambda: self._analyze_response(question, answer, key, provider, prompt))
+        if self.similarity_index is not None:
+            self.similarity_index.add(question_key, answer, assessment)
+        return assessment
 
-        Sua tarefa é:
-        1. Avaliar a resposta comparando com a resposta ideal.
-        2. Fornecer um feedback detalhado, apontando os acertos, erros e sugestões de melhoria.
-        3. Atribuir um score em percentual (0% a 100%) que indique o quão correta a resposta está.
+    async def _analyze_response(self, question: str, answer: str, key: str, provider: Optional[str] = None,
+                                prompt: Optional[str] = None) -> Assessment:
+        """
+        Analisa a resposta chamando o modelo e armazena a avaliação no cache, se houver.
 
-        Por favor, retorne a análise no seguinte formato:
-        {{
-            "score": "XX%",
-            "feedback": "Seu feedback detalhado aqui..."
-        }}
+        Se a avaliação não puder ser extraída da resposta do modelo, é feita uma única
+        chamada de reparo pedindo que o conteúdo seja reescrito no formato JSON esperado.
+
+        Args:
+            question (str): A pergunta para a qual a resposta será analisada.
+            answer (str): A resposta que será analisada.
+            key (str): Chave da avaliação no cache.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+            prompt (Optional[str]): O prompt de análise, se já construído.
+
+        Returns:
+            Assessment: Um objeto contendo o feedback e o score da análise.
+
+        Raises:
+            UpstreamUnavailableError: Se o serviço de IA não puder atender a chamada no momento.
+            Exception: Se ocorrer um erro ao analisar a resposta.
+            ValueError: Se a resposta recebida não estiver em formato JSON válido.
         """
+        prompt = prompt or _build_analysis_prompt(question, answer)
+        options = {"response_format": {"type": "json_object"}} if self.json_mode else {}
 
         try:
-            completion = self.client.chat.completions.create(
-                messages=[
-                    {
-                        "role": "system",
-                        "content": prompt
-                    }
-                ],
-                model="llama3-70b-8192"
-            )
-            response_content = completion.choices[0].message.content
-            logger.info("Resposta recebida com sucesso (primeiros 100 caracteres): %.100s", response_content)
+            response_content = await self._complete(prompt, "analysis", provider, **options)
+            logger.debug("Resposta recebida com sucesso (primeiros 100 caracteres): %.100s", response_content)
+            try:
+                with tracer.span("response.parse"):
+                    assessment = parse_assessment(response_content)
+            except ValueError:
+                self.analysis_repairs += 1
+                logger.warning("Avaliação fora do formato esperado; solicitando reparo ao modelo.")
+                response_content = await self._complete(_build_repair_prompt(response_content), "analysis",
+                                                         provider, **options)
+                with tracer.span("response.parse", **{"llm.repair": True}):
+                    assessment = parse_assessment(response_content)
+        except (UpstreamUnavailableError, ValueError):
+            raise
         except Exception as e:
             logger.error("Erro ao analisar resposta para a pergunta '%.50s...': %s", question, str(e), exc_info=True)
             raise Exception("Erro interno ao analisar a resposta.")
 
+        if self.assessment_cache is not None:
+            await self.assessment_cache.set(key, assessment)
+        return assessment
+
+    async def _grade(self, index: int, question: str, answer: str,
+                     provider: Optional[str] = None) -> Tuple[int, Union[Assessment, Exception]]:
+        """
+        Analisa um item da correção em lote, retornando a exceção em vez de lançá-la.
+        """
         try:
-            result = json.loads(response_content, strict=False)
+            return index, await self.analyze_response(question, answer, provider)
         except Exception as e:
-            logger.error("Erro ao interpretar resposta JSON: %s", str(e), exc_info=True)
-            raise ValueError("Resposta em formato inválido.")
+            return index, e
+
+    async def analyze_responses(
+            self,
+            pairs: Sequence[Tuple[str, str]],
+            provider: Optional[str] = None
+    ) -> List[Union[Assessment, Exception]]:
+        """
+        Analisa vários pares de questão e resposta (ex.: uma prova inteira) concorrentemente.
+
+        Pares repetidos são avaliados uma única vez e a concorrência é limitada por
+        `bulk_concurrency` e pelo limite global do serviço. A falha de um item não
+        interrompe os demais: o resultado do item é a exceção correspondente.
+
+        Args:
+            pairs (Sequence[Tuple[str, str]]): Os pares de questão e resposta.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
 
-        score = result.get("score")
-        feedback = result.get("feedback")
-        logger.info("Análise concluída com sucesso, score: %s", score)
-        return Assessment(feedback=feedback, score=score)
+        Returns:
+            List[Union[Assessment, Exception]]: A avaliação (ou o erro) de cada par, na ordem recebida.
+        """
+        distinct, positions = _dedupe_pairs(pairs)
+        logger.info("Iniciando correção em lote de %d item(ns) (%d distinto(s)).", len(pairs), len(distinct))
+        results = await gather_bounded(
+            [lambda index=index, pair=pair: self._grade(index, *pair, provider)
+             for index, pair in enumerate(distinct)],
+            limit=self.bulk_concurrency,
+            shared_semaphore=self._fanout_semaphore
+        )
+        return [results[position][1] for position in positions]
+
+    async def iter_analyses(
+            self,
+            pairs: Sequence[Tuple[str, str]],
+            provider: Optional[str] = None
+    ) -> AsyncIterator[Tuple[int, Union[Assessment, Exception]]]:
+        """
+        Variante incremental de `analyze_responses`: entrega o resultado de cada par, na
+        ordem recebida, assim que ele e todos os anteriores estão prontos.
+
+        Args:
+            pairs (Sequence[Tuple[str, str]]): Os pares de questão e resposta.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+
+        Yields:
+            Tuple[int, Union[Assessment, Exception]]: A posição do par e a sua avaliação (ou o erro).
+        """
+        distinct, positions = _dedupe_pairs(pairs)
+        logger.info("Iniciando correção em lote (streaming) de %d item(ns) (%d distinto(s)).",
+                    len(pairs), len(distinct))
+        done: Dict[int, Union[Assessment, Exception]] = {}
+        emitted = 0
+        async for index, result in iterate_bounded(
+                [lambda index=index, pair=pair: self._grade(index, *pair, provider)
+                 for index, pair in enumerate(distinct)],
+                limit=self.bulk_concurrency,
+                shared_semaphore=self._fanout_semaphore
+        ):
+            done[index] = result
+            while emitted < len(positions) and positions[emitted] in done:
+                yield emitted, done[positions[emitted]]
+                emitted += 1
+
+    async def stream_analysis(self, question: str, answer: str, provider: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Analisa a resposta fornecida, repassando os trechos da análise conforme são gerados.
+
+        O texto completo pode ser convertido em um Assessment com `parse_assessment`.
+
+        Args:
+            question (str): A pergunta para a qual a resposta será analisada.
+            answer (str): A resposta que será analisada.
+            provider (Optional[str]): Nome do provedor de LLM. Se omitido, usa o padrão.
+
+        Yields:
+            str: Os trechos de texto da análise.
+
+        Raises:
+            UpstreamUnavailableError: Se o serviço de IA não puder atender a chamada no momento.
+            Exception: Se ocorrer um erro ao analisar a resposta.
+        """
+        logger.info("Iniciando análise de resposta (streaming) para a pergunta: '%.50s...'", question)
+        prompt = _build_analysis_prompt(question, answer)
+        try:
+            async for delta in self._stream(prompt, "analysis", provider):
+                yield delta
+        except UpstreamUnavailableError:
+            raise
+        except Exception as e:
+            logger.error("Erro ao analisar resposta (streaming) para a pergunta '%.50s...': %s",
+                         question, str(e), exc_info=True)
+            raise Exception("Erro interno ao analisar a resposta.")
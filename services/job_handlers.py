@@ -0,0 +1,36 @@
+from typing import Dict
+
+from services.groq_service import AsyncGroqService, grading_result
+from services.job_queue import JobHandler
+
+
+def build_job_handlers(service: AsyncGroqService) -> Dict[str, JobHandler]:
+    """
+    Cria as funções que executam cada tipo de tarefa da fila usando o AsyncGroqService.
+
+    - `generate_questions`: parâmetros `theme`, `quantity`, `batched` e `provider`; retorna
+      a lista de questões geradas.
+    - `analyze_responses`: parâmetros `items` (lista de `{question, answer}`) e `provider`;
+      retorna o resultado de cada item, na ordem enviada (ver `GradingResult`).
+
+    Args:
+        service (AsyncGroqService): O serviço usado nas chamadas ao modelo.
+
+    Returns:
+        Dict[str, JobHandler]: A função de cada tipo de tarefa.
+    """
+
+    async def generate_questions(payload: dict) -> list:
+        batched = payload.get("batched")
+        if batched is None:
+            batched = service.batch_generation
+        create_questions = service.create_questions_batch if batched else service.create_questions
+        questions = await create_questions(payload["theme"], payload["quantity"], payload.get("provider"))
+        return [{"question": question} for question in questions]
+
+    async def analyze_responses(payload: dict) -> list:
+        pairs = [(item["question"], item["answer"]) for item in payload["items"]]
+        results = await service.analyze_responses(pairs, payload.get("provider"))
+        return [grading_result(index, result).model_dump(mode="json") for index, result in enumerate(results)]
+
+    return {"generate_questions": generate_questions, "analyze_responses": analyze_responses}
@@ -0,0 +1,499 @@
+import asyncio
+import contextlib
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from models import Job
+from services.exceptions import QuotaExceededError, UpstreamUnavailableError
+from services.fair_scheduler import tenant_scope
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+# Função que executa uma tarefa a partir dos seus parâmetros, retornando um resultado serializável em JSON
+JobHandler = Callable[[dict], Awaitable[Any]]
+
+
+class JobStore:
+    """
+    Interface dos armazenamentos da fila de tarefas.
+    """
+
+    async def add(self, job: Job, payload: dict):
+        """
+        Enfileira uma nova tarefa.
+
+        Args:
+            job (Job): A tarefa.
+            payload (dict): Os parâmetros da tarefa.
+        """
+        raise NotImplementedError
+
+    async def claim(self) -> Optional[Tuple[Job, dict]]:
+        """
+        Retira a tarefa mais antiga da fila, marcando-a como em execução.
+
+        Returns:
+            Optional[Tuple[Job, dict]]: A tarefa e os seus parâmetros, ou None se a fila estiver vazia.
+        """
+        raise NotImplementedError
+
+    async def save(self, job: Job):
+        """
+        Atualiza a situação e o resultado de uma tarefa.
+
+        Args:
+            job (Job): A tarefa.
+        """
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """
+        Busca uma tarefa.
+
+        Args:
+            job_id (str): O identificador da tarefa.
+
+        Returns:
+            Optional[Job]: A tarefa, ou None se não existir.
+        """
+        raise NotImplementedError
+
+    async def purge(self, finished_before: float) -> int:
+        """
+        Remove as tarefas concluídas antes do momento informado.
+
+        Args:
+            finished_before (float): Timestamp Unix limite.
+
+        Returns:
+            int: Quantidade de tarefas removidas.
+        """
+        raise NotImplementedError
+
+    async def recover(self, started_before: float) -> int:
+        """
+        Devolve à fila as tarefas em execução iniciadas antes do momento informado, isto é,
+        abandonadas por um processo de trabalho interrompido.
+
+        Args:
+            started_before (float): Timestamp Unix limite.
+
+        Returns:
+            int: Quantidade de tarefas devolvidas à fila.
+        """
+        return 0
+
+    async def close(self):
+        """
+        Libera os recursos do armazenamento.
+        """
+
+
+class MemoryJobStore(JobStore):
+    """
+    Armazenamento em memória do processo. As tarefas são perdidas se o processo reiniciar.
+    """
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._payloads: Dict[str, dict] = {}
+        self._queue: Deque[str] = deque()
+
+    async def add(self, job: Job, payload: dict):
+        self._jobs[job.id] = job.model_copy()
+        self._payloads[job.id] = payload
+        self._queue.append(job.id)
+
+    async def claim(self) -> Optional[Tuple[Job, dict]]:
+        while self._queue:
+            job_id = self._queue.popleft()
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == "queued":
+                job.status, job.started_at = "running", time.time()
+                return job.model_copy(), self._payloads.pop(job_id)
+        return None
+
+    async def save(self, job: Job):
+        self._jobs[job.id] = job.model_copy()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        return job.model_copy() if job is not None else None
+
+    async def purge(self, finished_before: float) -> int:
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.done and job.finished_at is not None and job.finished_at < finished_before]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Armazenamento durável em SQLite: as tarefas sobrevivem a reinícios e podem ser
+    consumidas por vários processos de trabalho (ver `worker.py`) que compartilham o arquivo.
+
+    As operações são executadas em uma thread para não bloquear o event loop.
+    """
+
+    _COLUMNS = "id, kind, status, owner, created_at, started_at, finished_at, result, error"
+
+    def __init__(self, path: str = "jobs.db"):
+        """
+        Args:
+            path (str): Caminho do arquivo SQLite.
+        """
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._lock = asyncio.Lock()
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, kind TEXT NOT NULL, status TEXT NOT NULL, owner TEXT, "
+            "payload TEXT, created_at REAL NOT NULL, started_at REAL, finished_at REAL, "
+            "result TEXT, error TEXT)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    @staticmethod
+    def _to_job(row: tuple) -> Job:
+        job_id, kind, status, owner, created_at, started_at, finished_at, result, error = row
+        return Job(id=job_id, kind=kind, status=status, owner=owner, created_at=created_at, started_at=started_at,
+                   finished_at=finished_at, result=json.loads(result) if result is not None else None, error=error)
+
+    def _insert(self, job: Job, payload: dict):
+        self._connection.execute(
+            "INSERT INTO jobs (id, kind, status, owner, payload, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (job.id, job.kind, job.status, job.owner, json.dumps(payload, ensure_ascii=False), job.created_at)
+        )
+
+    def _claim(self) -> Optional[Tuple[Job, dict]]:
+        # BEGIN IMMEDIATE garante que apenas um processo retire cada tarefa
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._connection.execute(
+                f"SELECT {self._COLUMNS}, payload FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            started_at = time.time()
+            if row is not None:
+                self._connection.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (started_at, row[0])
+                )
+            self._connection.execute("COMMIT")
+        except BaseException:
+            # Em caso de falha, nada é confirmado e a transação não fica aberta na conexão
+            if self._connection.in_transaction:
+                self._connection.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        job = self._to_job(row[:-1])
+        job.status, job.started_at = "running", started_at
+        return job, json.loads(row[-1])
+
+    def _update(self, job: Job):
+        self._connection.execute(
+            "UPDATE jobs SET status = ?, started_at = ?, finished_at = ?, result = ?, error = ?, "
+            "payload = CASE WHEN ? THEN NULL ELSE payload END WHERE id = ?",
+            (job.status, job.started_at, job.finished_at,
+             json.dumps(job.result, ensure_ascii=False) if job.result is not None else None, job.error,
+             job.done, job.id)
+        )
+
+    def _select(self, job_id: str) -> Optional[Job]:
+        row = self._connection.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_job(row) if row else None
+
+    def _delete_finished(self, finished_before: float) -> int:
+        return self._connection.execute(
+            "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND finished_at < ?", (finished_before,)
+        ).rowcount
+
+    def _requeue_running(self, started_before: float) -> int:
+        return self._connection.execute(
+            "UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running' AND started_at < ?",
+            (started_before,)
+        ).rowcount
+
+    async def _run(self, function, *args):
+        async with self._lock:
+            return await asyncio.to_thread(function, *args)
+
+    async def add(self, job: Job, payload: dict):
+        await self._run(self._insert, job, payload)
+
+    async def claim(self) -> Optional[Tuple[Job, dict]]:
+        return await self._run(self._claim)
+
+    async def save(self, job: Job):
+        await self._run(self._update, job)
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return await self._run(self._select, job_id)
+
+    async def purge(self, finished_before: float) -> int:
+        return await self._run(self._delete_finished, finished_before)
+
+    async def recover(self, started_before: float) -> int:
+        return await self._run(self._requeue_running, started_before)
+
+    async def close(self):
+        self._connection.close()
+
+
+def build_job_store(backend: str = "memory", sqlite_path: str = "jobs.db") -> JobStore:
+    """
+    Cria o armazenamento da fila de tarefas conforme a configuração.
+
+    Args:
+        backend (str): `memory` ou `sqlite`.
+        sqlite_path (str): Caminho do arquivo SQLite (backend `sqlite`).
+
+    Returns:
+        JobStore: O armazenamento configurado.
+
+    Raises:
+        ValueError: Se o backend não for suportado.
+    """
+    if backend == "memory":
+        return MemoryJobStore()
+    if backend == "sqlite":
+        return SQLiteJobStore(sqlite_path)
+    raise ValueError(f"Backend de fila de tarefas não suportado: {backend}")
+
+
+class JobQueue:
+    """
+    Fila de tarefas assíncronas executadas em segundo plano por um conjunto de workers
+    asyncio do processo.
+
+    Cada worker retira a próxima tarefa da fila assim que termina a anterior, de modo que a
+    carga se distribui entre os workers (e entre processos, quando vários consomem o mesmo
+    armazenamento SQLite). Tarefas abandonadas por um processo interrompido voltam à fila
+    após `job_timeout`, e as concluídas são removidas após `result_ttl`.
+    """
+
+    def __init__(
+            self,
+            store: JobStore,
+            handlers: Dict[str, JobHandler],
+            workers: int = 4,
+            poll_interval: float = 0.5,
+            job_timeout: float = 3600.0,
+            result_ttl: float = 86400.0,
+            maintenance_interval: float = 60.0
+    ):
+        """
+        Args:
+            store (JobStore): Armazenamento das tarefas.
+            handlers (Dict[str, JobHandler]): Função que executa cada tipo de tarefa.
+            workers (int): Quantidade de workers asyncio no processo (0 apenas enfileira).
+            poll_interval (float): Intervalo, em segundos, entre consultas à fila vazia.
+            job_timeout (float): Tempo máximo, em segundos, de execução de uma tarefa.
+            result_ttl (float): Tempo, em segundos, que o resultado de uma tarefa é mantido.
+            maintenance_interval (float): Intervalo, em segundos, entre as rotinas de manutenção.
+        """
+        self.store = store
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.job_timeout = job_timeout
+        self.result_ttl = result_ttl
+        self.maintenance_interval = maintenance_interval
+        self.succeeded = 0
+        self.failed = 0
+        self._wakeup = asyncio.Event()
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._waiters: Dict[str, int] = {}
+        self._workers: List[asyncio.Task] = []
+        self._maintenance: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    async def submit(self, kind: str, payload: dict, owner: Optional[str] = None) -> Job:
+        """
+        Enfileira uma tarefa, retornando imediatamente.
+
+        Args:
+            kind (str): O tipo da tarefa.
+            payload (dict): Os parâmetros da tarefa (serializáveis em JSON).
+            owner (Optional[str]): O usuário que submeteu a tarefa.
+
+        Returns:
+            Job: A tarefa enfileirada.
+
+        Raises:
+            ValueError: Se o tipo da tarefa não for suportado.
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Tipo de tarefa não suportado: {kind}")
+        job = Job(id=uuid.uuid4().hex, kind=kind, owner=owner, created_at=time.time())
+        await self.store.add(job, payload)
+        self._wakeup.set()
+        logger.info("Tarefa %s (%s) enfileirada.", job.id, kind)
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """
+        Busca uma tarefa.
+
+        Args:
+            job_id (str): O identificador da tarefa.
+
+        Returns:
+            Optional[Job]: A tarefa, ou None se não existir.
+        """
+        return await self.store.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """
+        Aguarda, por até `timeout` segundos, o término de uma tarefa.
+
+        Args:
+            job_id (str): O identificador da tarefa.
+            timeout (float): Tempo máximo de espera, em segundos.
+
+        Returns:
+            Optional[Job]: A tarefa (concluída ou não, se o prazo esgotar), ou None se não existir.
+        """
+        deadline = time.monotonic() + timeout
+        finished = self._finished.setdefault(job_id, asyncio.Event())
+        self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+        try:
+            while True:
+                job = await self.store.get(job_id)
+                # Evento acionado: a execução neste processo terminou (mesmo sem registro do resultado)
+                if job is None or job.done or finished.is_set():
+                    return job
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return job
+                # A tarefa pode ser concluída por outro processo; por isso a espera é limitada
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(finished.wait(), min(remaining, self.poll_interval))
+        finally:
+            # O último a aguardar remove o evento (a tarefa pode nunca terminar neste processo)
+            self._waiters[job_id] -= 1
+            if not self._waiters[job_id]:
+                del self._waiters[job_id]
+                if self._finished.get(job_id) is finished:
+                    del self._finished[job_id]
+
+    async def start(self):
+        """
+        Inicia os workers e a rotina de manutenção em segundo plano.
+        """
+        self._stopping = False
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._maintenance = asyncio.create_task(self._maintain())
+        logger.info("Fila de tarefas iniciada com %d worker(s).", self.workers)
+
+    async def stop(self, drain_timeout: float = 0):
+        """
+        Interrompe os workers e libera o armazenamento.
+
+        Os workers deixam de retirar novas tarefas e as que estão em execução têm até
+        `drain_timeout` segundos para terminar; as interrompidas no armazenamento SQLite
+        voltam à fila após `job_timeout`.
+
+        Args:
+            drain_timeout (float): Tempo máximo, em segundos, de espera pelas tarefas em execução.
+        """
+        self._stopping = True
+        self._wakeup.set()
+        if self._workers and drain_timeout > 0:
+            await asyncio.wait(self._workers, timeout=drain_timeout)
+        tasks = self._workers + ([self._maintenance] if self._maintenance else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers, self._maintenance = [], None
+        await self.store.close()
+        logger.info("Fila de tarefas encerrada.")
+
+    def stats(self) -> dict:
+        """
+        Retorna as estatísticas da fila neste processo.
+
+        Returns:
+            dict: Workers, tarefas concluídas com sucesso e tarefas com falha.
+        """
+        return {"workers": self.workers, "succeeded": self.succeeded, "failed": self.failed}
+
+    async def _worker(self):
+        """
+        Executa tarefas da fila até o encerramento, aguardando novas tarefas quando ela está vazia.
+        """
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                claimed = await self.store.claim()
+            except Exception as e:
+                logger.error("Erro ao retirar tarefa da fila: %s", str(e), exc_info=True)
+                claimed = None
+            if claimed is None:
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                continue
+            await self._execute(*claimed)
+
+    async def _execute(self, job: Job, payload: dict):
+        """
+        Executa uma tarefa e registra o resultado ou o erro no armazenamento.
+        """
+        logger.info("Executando tarefa %s (%s).", job.id, job.kind)
+        try:
+            # As chamadas ao modelo da tarefa contam na cota e na fila justa do seu dono
+            with tenant_scope(job.owner):
+                job.result = await asyncio.wait_for(self.handlers[job.kind](payload), self.job_timeout)
+            job.status = "succeeded"
+            self.succeeded += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if isinstance(e, QuotaExceededError):
+                job.error = "Cota do usuário excedida."
+            elif isinstance(e, UpstreamUnavailableError):
+                job.error = "Serviço de IA temporariamente indisponível."
+            elif isinstance(e, asyncio.TimeoutError):
+                job.error = "Tempo máximo de execução da tarefa excedido."
+            else:
+                job.error = "Erro interno ao executar a tarefa."
+            job.status = "failed"
+            self.failed += 1
+            logger.error("Tarefa %s (%s) falhou: %s", job.id, job.kind, str(e))
+        job.finished_at = time.time()
+        try:
+            await self.store.save(job)
+            logger.info("Tarefa %s concluída com situação '%s'.", job.id, job.status)
+        except Exception as e:
+            # Ex.: banco de dados bloqueado ou resultado não serializável; o worker continua e
+            # a tarefa volta à fila na manutenção (`recover`)
+            logger.error("Erro ao registrar o resultado da tarefa %s: %s", job.id, str(e), exc_info=True)
+        finally:
+            # Acorda quem aguarda a tarefa (`?wait=` e eventos), que consulta o armazenamento
+            finished = self._finished.pop(job.id, None)
+            if finished is not None:
+                finished.set()
+
+    async def _maintain(self):
+        """
+        Remove periodicamente os resultados expirados e devolve à fila as tarefas abandonadas.
+        """
+        while True:
+            try:
+                now = time.time()
+                purged = await self.store.purge(now - self.result_ttl)
+                recovered = await self.store.recover(now - self.job_timeout - self.maintenance_interval)
+                if purged or recovered:
+                    logger.info("Manutenção da fila: %d tarefa(s) removida(s), %d devolvida(s) à fila.",
+                                purged, recovered)
+                    if recovered:
+                        self._wakeup.set()
+            except Exception as e:
+                logger.error("Erro na manutenção da fila de tarefas: %s", str(e), exc_info=True)
+            await asyncio.sleep(self.maintenance_interval)
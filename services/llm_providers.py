@@ -0,0 +1,294 @@
+import abc
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import re
+from typing import AsyncIterator, Callable, Optional
+
+import httpx
+from groq import AsyncGroq
+
+from services.exceptions import LLMProviderError
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+
+class LLMResponse:
+    """
+    Resultado de uma completion: o conteúdo gerado e, se informado pelo provedor, o total
+    de tokens consumidos.
+    """
+
+    def __init__(self, content: str, total_tokens: Optional[int] = None):
+        self.content = content
+        self.total_tokens = total_tokens
+
+
+def _system_messages(prompt: str) -> list:
+    return [
+        {
+            "role": "system",
+            "content": prompt
+        }
+    ]
+
+
+class LLMProvider(abc.ABC):
+    """
+    Interface dos provedores de LLM usados pelo AsyncGroqService.
+
+    Subclasses implementam `complete` e `stream`; `model` identifica o modelo utilizado
+    (e compõe as chaves de cache e de agrupamento de chamadas).
+    """
+
+    model: str = ""
+
+    @abc.abstractmethod
+    async def complete(self, prompt: str, model: Optional[str] = None, **options) -> LLMResponse:
+        """
+        Envia o prompt ao modelo e retorna a completion.
+
+        Args:
+            prompt (str): O prompt de sistema a ser enviado.
+            model (Optional[str]): Modelo a ser usado. Se omitido, usa o modelo do provedor.
+            **options: Parâmetros adicionais da API (ex.: `response_format`).
+
+        Returns:
+            LLMResponse: O conteúdo gerado e o total de tokens consumidos.
+        """
+
+    @abc.abstractmethod
+    def stream(self, prompt: str, model: Optional[str] = None, **options) -> AsyncIterator[str]:
+        """
+        Envia o prompt ao modelo em modo streaming.
+
+        Args:
+            prompt (str): O prompt de sistema a ser enviado.
+            model (Optional[str]): Modelo a ser usado. Se omitido, usa o modelo do provedor.
+            **options: Parâmetros adicionais da API.
+
+        Yields:
+            str: Os trechos de texto gerados pelo modelo.
+        """
+
+    async def close(self):
+        """
+        Libera os recursos do provedor.
+        """
+
+
+class GroqProvider(LLMProvider):
+    """
+    Provedor que usa o cliente `AsyncGroq` (e o pool de conexões) do AsyncGroqService.
+    """
+
+    def __init__(self, client: AsyncGroq, model: str):
+        """
+        Args:
+            client (AsyncGroq): Cliente assíncrono da API Groq.
+            model (str): Modelo utilizado nas chamadas.
+        """
+        self.client = client
+        self.model = model
+
+    async def complete(self, prompt: str, model: Optional[str] = None, **options) -> LLMResponse:
+        completion = await self.client.chat.completions.create(
+            messages=_system_messages(prompt),
+            model=model or self.model,
+            **options
+        )
+        usage = getattr(completion, "usage", None)
+        return LLMResponse(completion.choices[0].message.content, getattr(usage, "total_tokens", None))
+
+    async def stream(self, prompt: str, model: Optional[str] = None, **options) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            messages=_system_messages(prompt),
+            model=model or self.model,
+            stream=True,
+            **options
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    Provedor para qualquer backend HTTP compatível com a API de chat completions da OpenAI
+    (ex.: vLLM, Ollama, OpenRouter).
+    """
+
+    def __init__(
+            self,
+            base_url: str,
+            model: str,
+            api_key: Optional[str] = None,
+            http_client: Optional[httpx.AsyncClient] = None,
+            timeout: float = 60.0
+    ):
+        """
+        Args:
+            base_url (str): URL base da API (ex.: `http://localhost:8000/v1`).
+            model (str): Modelo utilizado nas chamadas.
+            api_key (Optional[str]): Chave enviada no cabeçalho `Authorization`, se houver.
+            http_client (Optional[httpx.AsyncClient]): Cliente HTTP a ser usado. Se omitido,
+                o provedor cria (e encerra) o seu próprio.
+            timeout (float): Tempo limite, em segundos, do cliente HTTP próprio.
+        """
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.model = model
+        self.headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._owns_client = http_client is None
+        self.http_client = http_client or httpx.AsyncClient(timeout=httpx.Timeout(timeout, connect=5.0))
+
+    def _payload(self, prompt: str, model: Optional[str], **options) -> dict:
+        return {"model": model or self.model, "messages": _system_messages(prompt), **options}
+
+    @staticmethod
+    async def _raise_for_status(response: httpx.Response):
+        if response.status_code >= 400:
+            await response.aread()
+            raise LLMProviderError(f"HTTP {response.status_code}: {response.text[:200]}",
+                                   status_code=response.status_code, response=response)
+
+    async def complete(self, prompt: str, model: Optional[str] = None, **options) -> LLMResponse:
+        payload = self._payload(prompt, model, **options)
+        response = await self.http_client.post(self.url, json=payload, headers=self.headers)
+        await self._raise_for_status(response)
+        data = response.json()
+        usage = data.get("usage") or {}
+        return LLMResponse(data["choices"][0]["message"]["content"], usage.get("total_tokens"))
+
+    async def stream(self, prompt: str, model: Optional[str] = None, **options) -> AsyncIterator[str]:
+        payload = self._payload(prompt, model, stream=True, **options)
+        async with self.http_client.stream("POST", self.url, json=payload, headers=self.headers) as response:
+            await self._raise_for_status(response)
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or []
+                content = choices[0].get("delta", {}).get("content") if choices else None
+                if content:
+                    yield content
+
+    async def close(self):
+        if self._owns_client:
+            await self.http_client.aclose()
+
+
+def stub_response(prompt: str, options: dict) -> str:
+    """
+    Resposta padrão do provedor local, determinística para cada prompt: uma avaliação
+    quando o prompt pede um score, um lote JSON de perguntas no modo JSON, ou uma pergunta.
+
+    Args:
+        prompt (str): O prompt recebido.
+        options (dict): Parâmetros adicionais da chamada.
+
+    Returns:
+        str: O conteúdo simulado.
+    """
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+    if '"score"' in prompt:
+        return json.dumps({"score": f"{int(digest, 16) % 101}%", "feedback": "Feedback simulado pelo provedor local."},
+                          ensure_ascii=False)
+    if (options.get("response_format") or {}).get("type") == "json_object":
+        match = re.search(r"crie (\d+) perguntas", prompt)
+        quantity = int(match.group(1)) if match else 1
+        questions = [f"Pergunta simulada {index} ({digest})?" for index in range(1, quantity + 1)]
+        return json.dumps({"questions": questions}, ensure_ascii=False)
+    return f"Pergunta simulada ({digest})?"
+
+
+class StubProvider(LLMProvider):
+    """
+    Provedor local, em processo, para testes de carga e desenvolvimento sem acesso à rede.
+
+    Cada chamada aguarda uma latência simulada e falha com probabilidade `error_rate`. A
+    latência segue a distribuição `latency_distribution`:
+
+    - `uniform`: `latency` ± `latency_jitter`;
+    - `lognormal`: mediana `latency` e desvio `latency_jitter` no logaritmo (cauda longa, como
+      a de uma API real);
+    - `exponential`: média `latency`.
+
+    Com `seed`, a sequência de latências e falhas é reproduzível.
+    """
+
+    def __init__(
+            self,
+            model: str = "stub",
+            latency: float = 0.0,
+            latency_jitter: float = 0.0,
+            latency_distribution: str = "uniform",
+            error_rate: float = 0.0,
+            error_status: int = 503,
+            seed: Optional[int] = None,
+            responder: Callable[[str, dict], str] = stub_response
+    ):
+        """
+        Args:
+            model (str): Nome do modelo simulado.
+            latency (float): Latência média, em segundos, de cada chamada.
+            latency_jitter (float): Variação máxima, em segundos, em torno da latência média
+                (na distribuição `lognormal`, o desvio padrão do logaritmo da latência).
+            latency_distribution (str): Distribuição da latência: `uniform`, `lognormal` ou `exponential`.
+            error_rate (float): Probabilidade (0 a 1) de uma chamada falhar.
+            error_status (int): Código HTTP das falhas simuladas.
+            seed (Optional[int]): Semente do gerador de latências e falhas.
+            responder (Callable[[str, dict], str]): Função que gera o conteúdo a partir do prompt e das opções.
+        """
+        self.model = model
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        if latency_distribution not in ("uniform", "lognormal", "exponential"):
+            raise ValueError(f"Distribuição de latência não suportada: {latency_distribution}")
+        self.latency_distribution = latency_distribution
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.responder = responder
+        self._random = random.Random(seed)
+        self.calls = 0
+
+    def _delay(self) -> float:
+        """
+        Sorteia a latência de uma chamada conforme a distribuição configurada.
+        """
+        if self.latency <= 0:
+            return 0.0
+        if self.latency_distribution == "lognormal":
+            return self._random.lognormvariate(math.log(self.latency), self.latency_jitter)
+        if self.latency_distribution == "exponential":
+            return self._random.expovariate(1 / self.latency)
+        return max(0.0, self.latency + self._random.uniform(-self.latency_jitter, self.latency_jitter))
+
+    async def _simulate(self):
+        """
+        Aguarda a latência simulada e lança a falha simulada, se sorteada.
+
+        Raises:
+            LLMProviderError: Se a chamada for sorteada para falhar.
+        """
+        self.calls += 1
+        delay = self._delay()
+        if delay:
+            await asyncio.sleep(delay)
+        if self._random.random() < self.error_rate:
+            raise LLMProviderError("Falha simulada pelo provedor local.", status_code=self.error_status)
+
+    async def complete(self, prompt: str, model: Optional[str] = None, **options) -> LLMResponse:
+        await self._simulate()
+        content = self.responder(prompt, options)
+        return LLMResponse(content, len(prompt) // 4 + len(content) // 4)
+
+    async def stream(self, prompt: str, model: Optional[str] = None, **options) -> AsyncIterator[str]:
+        await self._simulate()
+        for part in re.findall(r"\S+\s*", self.responder(prompt, options)):
+            yield part
@@ -0,0 +1,187 @@
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from services.tracing import current_request_id
+
+# Formato das linhas de log em texto (LOG_FORMAT=text)
+TEXT_FORMAT = "%(asctime)s - %(process)d - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+
+# Atributos padrão de um LogRecord; os demais (passados em `extra=`) são exportados como campos
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formata cada registro como um objeto JSON em uma linha, com data/hora, nível, logger,
+    mensagem, processo, identificador da requisição e os campos passados em `extra=`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "process": record.process,
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            data["exception"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Amostra os registros de nível INFO (e inferiores) sob alto volume: até `max_per_second`
+    registros por segundo passam todos; acima disso, apenas uma fração `sample_rate` deles.
+    Avisos e erros nunca são descartados.
+
+    A amostragem é determinística (um a cada `1 / sample_rate` registros excedentes), sem
+    sorteio por registro.
+    """
+
+    def __init__(self, max_per_second: int = 0, sample_rate: float = 1.0):
+        super().__init__()
+        self.max_per_second = max_per_second
+        self.every = round(1 / sample_rate) if sample_rate > 0 else 0
+        self.dropped = 0
+        self._window = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or self.max_per_second <= 0:
+            return True
+        window = int(time.monotonic())
+        with self._lock:
+            if window != self._window:
+                self._window = window
+                self._count = 0
+            self._count += 1
+            excess = self._count - self.max_per_second
+            if excess <= 0 or (self.every and excess % self.every == 0):
+                return True
+            self.dropped += 1
+            return False
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Handler que apenas enfileira os registros; a formatação e a escrita ficam com a thread
+    do QueueListener, fora do caminho da requisição.
+
+    Diferente do QueueHandler padrão, a mensagem não é formatada ao enfileirar (os
+    argumentos são formatados depois, na thread de escrita); apenas o identificador da
+    requisição, que depende do contexto atual, é capturado. Com a fila cheia, o registro é
+    descartado em vez de bloquear a requisição.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.request_id = current_request_id()
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _RequestIdDefault(logging.Filter):
+    # Garante o atributo `request_id` no formato de texto (ex.: registros sem requisição)
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = current_request_id()
+        record.request_id = record.request_id or "-"
+        return True
+
+
+class LoggingPipeline:
+    """
+    Registro assíncrono do processo: o handler da raiz enfileira os registros e um
+    QueueListener os formata e escreve em stderr em uma thread própria.
+    """
+
+    def __init__(self, handler: AsyncQueueHandler, listener: QueueListener,
+                 sampler: Optional[SamplingFilter] = None):
+        self.handler = handler
+        self.listener = listener
+        self.sampler = sampler
+
+    def stats(self) -> dict:
+        """
+        Retorna a quantidade de registros descartados pela amostragem e pela fila cheia.
+        """
+        return {
+            "sampled_out": self.sampler.dropped if self.sampler is not None else 0,
+            "queue_full": self.handler.dropped,
+        }
+
+    def stop(self):
+        """
+        Escreve os registros pendentes e remove o handler da raiz.
+        """
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+
+
+def configure_logging(level: str = "INFO", log_format: str = "json", queue_size: int = 10000,
+                      sample_after: int = 0, sample_rate: float = 1.0, stream=None) -> LoggingPipeline:
+    """
+    Configura o registro do processo com um handler assíncrono na raiz, substituindo os
+    handlers de console existentes (ex.: de `logging.basicConfig`).
+
+    Args:
+        level (str): Nível mínimo dos registros.
+        log_format (str): Formato das linhas: `json` (uma linha por registro) ou `text`.
+        queue_size (int): Capacidade da fila de registros; com a fila cheia, os registros são
+            descartados. 0 não limita a fila.
+        sample_after (int): Registros INFO por segundo antes de iniciar a amostragem; 0
+            desabilita a amostragem.
+        sample_rate (float): Fração dos registros INFO mantidos acima de `sample_after`.
+        stream: Destino dos registros (padrão: stderr).
+
+    Returns:
+        LoggingPipeline: O registro configurado, a ser encerrado com `stop`.
+    """
+    output = logging.StreamHandler(stream if stream is not None else sys.stderr)
+    if log_format == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.addFilter(_RequestIdDefault())
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    handler = AsyncQueueHandler(queue.Queue(maxsize=queue_size))
+    sampler = None
+    if sample_after > 0:
+        sampler = SamplingFilter(sample_after, sample_rate)
+        handler.addFilter(sampler)
+    listener = QueueListener(handler.queue, output, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        # Mantém handlers de outros tipos (ex.: captura de logs dos testes)
+        if type(existing) in (logging.StreamHandler, AsyncQueueHandler):
+            root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    listener.start()
+    return LoggingPipeline(handler, listener, sampler)
@@ -0,0 +1,339 @@
+import bisect
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Limites, em segundos, dos histogramas de latência das requisições HTTP
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Limites, em segundos, dos histogramas de latência das chamadas ao modelo
+LLM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+# Limites, em segundos, dos histogramas de operações rápidas (ex.: verificação de tokens)
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05)
+
+# Amostra coletada no momento da exposição: (sufixo do nome, rótulos, valor)
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """
+    Base das métricas: nome, descrição, tipo e nomes dos rótulos. Cada combinação de
+    valores dos rótulos tem a sua série (ver `labels`).
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._series: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str, **labels: str):
+        """
+        Retorna a série correspondente aos valores dos rótulos, criando-a se necessário.
+
+        Args:
+            *values (str): Valores dos rótulos, na ordem de `labelnames`.
+            **labels (str): Valores dos rótulos, por nome.
+
+        Returns:
+            A série da métrica.
+
+        Raises:
+            ValueError: Se os rótulos não corresponderem aos declarados.
+        """
+        if labels:
+            if values or set(labels) != set(self.labelnames):
+                raise ValueError(f"Rótulos inválidos para a métrica {self.name}: {sorted(labels)}")
+            values = tuple(labels[name] for name in self.labelnames)
+        elif len(values) != len(self.labelnames):
+            raise ValueError(f"A métrica {self.name} espera os rótulos {self.labelnames}.")
+        key = tuple(str(value) for value in values)
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, self._new_series())
+        return series
+
+    def _default(self):
+        # Métricas sem rótulos usam uma série única
+        return self.labels()
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def samples(self) -> List[Sample]:
+        """
+        Retorna as amostras atuais da métrica.
+        """
+        samples = []
+        for key, series in self._series.items():
+            labels = dict(zip(self.labelnames, key))
+            samples.extend(series.samples(labels))
+        return samples
+
+
+# As séries usam um lock porque também são atualizadas por dependências síncronas,
+# executadas pelo FastAPI em threads (ex.: verificação de tokens)
+class _Value:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self, labels: Dict[str, str]) -> List[Sample]:
+        return [("", labels, self.value)]
+
+
+class Counter(Metric):
+    """
+    Contador monotônico (ex.: total de requisições).
+    """
+
+    type = "counter"
+
+    def _new_series(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+
+class Gauge(Metric):
+    """
+    Valor que sobe e desce (ex.: requisições em andamento).
+    """
+
+    type = "gauge"
+
+    def _new_series(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+
+class _HistogramSeries:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def samples(self, labels: Dict[str, str]) -> List[Sample]:
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        samples = []
+        cumulative = 0
+        for bound, count_in_bucket in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count_in_bucket
+            samples.append(("_bucket", {**labels, "le": _format_value(bound)}, cumulative))
+        samples.append(("_sum", labels, total))
+        samples.append(("_count", labels, count))
+        return samples
+
+
+class Histogram(Metric):
+    """
+    Histograma de observações (ex.: latências), com contagens acumuladas por limite.
+    """
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_series(self):
+        return _HistogramSeries(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+
+class CollectedMetric:
+    """
+    Métrica cujas amostras são lidas no momento da exposição (ex.: estatísticas de caches).
+    """
+
+    def __init__(self, name: str, documentation: str, type: str, samples: Iterable[Tuple[Dict[str, str], float]]):
+        self.name = name
+        self.documentation = documentation
+        self.type = type
+        self._samples = list(samples)
+
+    def samples(self) -> List[Sample]:
+        return [("", labels, value) for labels, value in self._samples]
+
+
+class MetricsRegistry:
+    """
+    Registro das métricas do processo, exportadas no formato de texto do Prometheus.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"Métrica já registrada com outra definição: {metric.name}")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = HTTP_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self, collected: Iterable[CollectedMetric] = ()) -> str:
+        """
+        Exporta as métricas no formato de texto do Prometheus (versão 0.0.4).
+
+        Args:
+            collected (Iterable[CollectedMetric]): Métricas lidas no momento da exposição,
+                exportadas junto com as registradas.
+
+        Returns:
+            str: As métricas formatadas.
+        """
+        metrics = list(self._metrics.values()) + list(collected)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Registro das métricas do processo. Com vários processos (ver serve.py), cada um expõe as suas.
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "http_requests_total", "Requisições HTTP atendidas.", ("method", "route", "status"))
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Duração das requisições HTTP, até o fim da resposta.", ("method", "route"))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento.")
+
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "Chamadas ao modelo de linguagem.", ("provider", "model", "outcome"))
+LLM_REQUEST_DURATION = REGISTRY.histogram(
+    "llm_request_duration_seconds", "Duração das chamadas ao modelo de linguagem.", ("provider", "model"),
+    buckets=LLM_BUCKETS)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total", "Tokens consumidos nas chamadas ao modelo de linguagem.", ("provider", "model"))
+
+AUTH_DECODE_DURATION = REGISTRY.histogram(
+    "auth_token_decode_seconds", "Duração da verificação dos tokens de acesso.", ("cached",),
+    buckets=FAST_BUCKETS)
+
+
+def cache_metrics(caches: Dict[str, Optional[dict]]) -> List[CollectedMetric]:
+    """
+    Converte as estatísticas de acertos e faltas de caches nas métricas correspondentes.
+
+    Args:
+        caches (Dict[str, Optional[dict]]): As estatísticas (`hits` e `misses`) de cada cache,
+            pelo nome; caches desabilitados (None) são ignorados.
+
+    Returns:
+        List[CollectedMetric]: Acertos, faltas e taxa de acerto por cache.
+    """
+    stats = {name: value for name, value in caches.items() if value is not None}
+    ratios = []
+    for name, value in stats.items():
+        total = value["hits"] + value["misses"]
+        ratios.append(({"cache": name}, value["hits"] / total if total else 0.0))
+    return [
+        CollectedMetric("cache_hits_total", "Acertos dos caches.", "counter",
+                        [({"cache": name}, value["hits"]) for name, value in stats.items()]),
+        CollectedMetric("cache_misses_total", "Faltas dos caches.", "counter",
+                        [({"cache": name}, value["misses"]) for name, value in stats.items()]),
+        CollectedMetric("cache_hit_ratio", "Taxa de acerto dos caches desde o início do processo.", "gauge", ratios),
+    ]
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede as requisições HTTP: total por rota e status, duração até o
+    fim da resposta (inclusive em streaming) e requisições em andamento.
+
+    A rota é o caminho declarado no roteador (ex.: `/jobs/v1/{job_id}`), de modo que
+    identificadores na URL não multiplicam as séries; caminhos sem rota correspondente
+    são agrupados em `unmatched`.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUESTS.labels(scope["method"], route, str(status)).inc()
+            HTTP_REQUEST_DURATION.labels(scope["method"], route).observe(time.perf_counter() - started)
@@ -0,0 +1,180 @@
+import logging
+from typing import Dict, List, Optional
+
+from services.resilience import LatencyTracker
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+# Tarefas roteáveis do serviço de IA
+TASKS = {"question", "question_batch", "analysis"}
+
+
+class ModelRule:
+    """
+    Regra de roteamento: usa `model` para a tarefa `task` quando o prompt tiver até
+    `max_input_tokens` tokens estimados (sem limite se None).
+    """
+
+    def __init__(self, task: str, model: str, max_input_tokens: Optional[int] = None):
+        if task not in TASKS and task != "*":
+            raise ValueError(f"Tarefa desconhecida na regra de roteamento: {task}")
+        self.task = task
+        self.model = model
+        self.max_input_tokens = max_input_tokens
+
+    def matches(self, task: str, input_tokens: int) -> bool:
+        if self.task not in (task, "*"):
+            return False
+        return self.max_input_tokens is None or input_tokens <= self.max_input_tokens
+
+
+def parse_model_routes(spec: str) -> List[ModelRule]:
+    """
+    Converte a configuração de roteamento em regras, na ordem em que aparecem.
+
+    Cada regra tem o formato `tarefa[<=tokens]:modelo`, separadas por vírgula. Ex.:
+    `question:llama3-8b-8192,analysis<=600:llama3-8b-8192` usa o modelo de 8B para gerar
+    perguntas e para analisar respostas curtas; os demais casos usam o modelo do provedor.
+
+    Args:
+        spec (str): A configuração de roteamento (vazia desabilita o roteamento).
+
+    Returns:
+        List[ModelRule]: As regras de roteamento.
+
+    Raises:
+        ValueError: Se alguma regra estiver em formato inválido.
+    """
+    rules = []
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        condition, separator, model = item.partition(":")
+        task, _, max_tokens = condition.partition("<=")
+        if not separator or not model.strip() or not task.strip():
+            raise ValueError(f"Regra de roteamento inválida: {item}")
+        try:
+            max_input_tokens = int(max_tokens) if max_tokens.strip() else None
+        except ValueError:
+            raise ValueError(f"Regra de roteamento inválida: {item}")
+        rules.append(ModelRule(task.strip(), model.strip(), max_input_tokens))
+    return rules
+
+
+def parse_model_prices(spec: str) -> Dict[str, float]:
+    """
+    Converte a tabela de preços (`modelo:preço`, separados por vírgula) em um dicionário.
+
+    Args:
+        spec (str): Os preços em dólares por milhão de tokens.
+
+    Returns:
+        Dict[str, float]: O preço por milhão de tokens de cada modelo.
+
+    Raises:
+        ValueError: Se algum item estiver em formato inválido.
+    """
+    prices = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        model, _, price = item.rpartition(":")
+        try:
+            prices[model.strip()] = float(price)
+        except ValueError:
+            raise ValueError(f"Preço de modelo inválido: {item}")
+        if not model.strip():
+            raise ValueError(f"Preço de modelo inválido: {item}")
+    return prices
+
+
+class ModelMetrics:
+    """
+    Métricas de um modelo: chamadas, falhas, tokens, custo estimado e latências recentes.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.tokens = 0
+        self.cost = 0.0
+        self.latencies = LatencyTracker()
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "tokens": self.tokens,
+            "cost": round(self.cost, 6),
+            "p50_latency": self.latencies.percentile(0.5),
+            "p95_latency": self.latencies.percentile(0.95),
+        }
+
+
+class ModelRouter:
+    """
+    Política de roteamento de modelos por tarefa e tamanho da entrada (ex.: um modelo
+    pequeno e rápido para gerar perguntas e o modelo grande para avaliar respostas
+    longas), com métricas de latência e custo por modelo.
+
+    As regras se aplicam às chamadas do provedor `provider`; a primeira regra que
+    corresponder à tarefa e ao tamanho do prompt define o modelo. Sem regra
+    correspondente, é usado o modelo configurado no provedor.
+    """
+
+    def __init__(self, rules: List[ModelRule], prices: Optional[Dict[str, float]] = None, provider: str = "groq"):
+        """
+        Args:
+            rules (List[ModelRule]): As regras de roteamento, em ordem de prioridade.
+            prices (Optional[Dict[str, float]]): Preço, em dólares por milhão de tokens, de cada modelo.
+            provider (str): Nome do provedor de LLM ao qual as regras se aplicam.
+        """
+        self.rules = rules
+        self.prices = prices or {}
+        self.provider = provider
+        self.metrics: Dict[str, ModelMetrics] = {}
+
+    def select(self, provider: str, task: str, input_tokens: int) -> Optional[str]:
+        """
+        Escolhe o modelo de uma chamada.
+
+        Args:
+            provider (str): Nome do provedor da chamada.
+            task (str): A tarefa (`question`, `question_batch` ou `analysis`).
+            input_tokens (int): Tokens estimados do prompt.
+
+        Returns:
+            Optional[str]: O modelo escolhido, ou None para usar o modelo do provedor.
+        """
+        if provider != self.provider:
+            return None
+        for rule in self.rules:
+            if rule.matches(task, input_tokens):
+                return rule.model
+        return None
+
+    def record(self, model: str, latency: float, total_tokens: Optional[int] = None, error: bool = False):
+        """
+        Registra o resultado de uma chamada ao modelo.
+
+        Args:
+            model (str): O modelo chamado.
+            latency (float): Duração da chamada, em segundos.
+            total_tokens (Optional[int]): Tokens consumidos (prompt e completion), se informados.
+            error (bool): Se a chamada falhou.
+        """
+        metrics = self.metrics.setdefault(model, ModelMetrics())
+        metrics.calls += 1
+        if error:
+            metrics.errors += 1
+            return
+        metrics.latencies.record(latency)
+        if total_tokens:
+            metrics.tokens += total_tokens
+            metrics.cost += total_tokens * self.prices.get(model, 0.0) / 1_000_000
+
+    def stats(self) -> dict:
+        """
+        Retorna as métricas por modelo.
+
+        Returns:
+            dict: Chamadas, falhas, tokens, custo estimado e latências p50/p95 de cada modelo.
+        """
+        return {model: metrics.as_dict() for model, metrics in self.metrics.items()}
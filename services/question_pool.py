@@ -0,0 +1,236 @@
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from typing import Deque, Iterable, List, Optional, Set
+
+from services.assessment_cache import normalize_text
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+
+class QuestionPool:
+    """
+    Reserva de perguntas pré-geradas por tema, reabastecida em segundo plano.
+
+    Cada tema possui uma fila de perguntas. Quando a fila chega à marca inferior
+    (`low_watermark`), uma tarefa em segundo plano gera perguntas até a marca superior
+    (`high_watermark`). Assim, atender uma requisição passa a ser apenas retirar uma
+    pergunta da fila, e a carga sobre o modelo é suavizada.
+
+    Apenas os temas configurados (`warm`) são pré-gerados. Como cada tema reservado custa
+    até `high_watermark` gerações especulativas, os demais são atendidos sob demanda; com
+    `auto_register_after`, um tema passa a ser reservado após esse número de requisições.
+    """
+
+    def __init__(
+            self,
+            service,
+            low_watermark: int = 5,
+            high_watermark: int = 20,
+            max_themes: int = 1000,
+            refill_concurrency: int = 2,
+            refill_interval: float = 30.0,
+            retry_delay: float = 5.0,
+            auto_register_after: int = 0
+    ):
+        """
+        Args:
+            service: Serviço usado para gerar as perguntas (ex.: AsyncGroqService).
+            low_watermark (int): Tamanho da fila a partir do qual o tema é reabastecido (com 0,
+                apenas quando a fila se esvazia).
+            high_watermark (int): Tamanho da fila após o reabastecimento.
+            max_themes (int): Número máximo de temas mantidos; os menos usados são descartados.
+            refill_concurrency (int): Número máximo de temas reabastecidos simultaneamente.
+            refill_interval (float): Intervalo, em segundos, entre verificações periódicas.
+            retry_delay (float): Espera, em segundos, após uma falha de reabastecimento.
+            auto_register_after (int): Requisições de um tema não configurado antes de passar
+                a reservá-lo (0 reserva apenas os temas configurados).
+        """
+        self.service = service
+        self.low_watermark = low_watermark
+        self.high_watermark = max(high_watermark, low_watermark + 1)
+        self.max_themes = max_themes
+        self.refill_interval = refill_interval
+        self.retry_delay = retry_delay
+        self.auto_register_after = auto_register_after
+        self.hits = 0
+        self.misses = 0
+        self._queues: "OrderedDict[str, Deque[str]]" = OrderedDict()
+        self._themes: dict = {}
+        self._warmed: Set[str] = set()
+        self._demand: "OrderedDict[str, int]" = OrderedDict()
+        self._refilling: Set[str] = set()
+        self._refill_semaphore = asyncio.Semaphore(max(1, refill_concurrency))
+        self._refill_tasks: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _register(self, key: str, theme: str) -> bool:
+        """
+        Cria a fila do tema, descartando o tema não configurado menos usado se necessário.
+        Retorna False se o limite de temas estiver ocupado apenas por temas configurados.
+        """
+        if len(self._queues) >= self.max_themes:
+            evicted = next((existing for existing in self._queues if existing not in self._warmed), None)
+            if evicted is None:
+                return False
+            del self._queues[evicted]
+            self._themes.pop(evicted, None)
+        self._queues[key] = deque()
+        self._themes[key] = theme
+        return True
+
+    def _requested(self, key: str, theme: str):
+        """
+        Contabiliza a requisição de um tema sem reserva, reservando-o após
+        `auto_register_after` requisições.
+        """
+        if self.auto_register_after <= 0:
+            return
+        count = self._demand.pop(key, 0) + 1
+        if count < self.auto_register_after:
+            self._demand[key] = count
+            while len(self._demand) > self.max_themes:
+                self._demand.popitem(last=False)
+        elif self._register(key, theme):
+            logger.info("Tema '%s' passou a ser reservado após %d requisição(ões).", theme, count)
+            self._wakeup.set()
+
+    def size(self, theme: str) -> int:
+        """
+        Retorna a quantidade de perguntas disponíveis para o tema.
+        """
+        queue = self._queues.get(normalize_text(theme))
+        return len(queue) if queue else 0
+
+    def take(self, theme: str, quantity: int) -> List[str]:
+        """
+        Retira até `quantity` perguntas da fila do tema, agendando o reabastecimento se
+        necessário. Temas sem reserva retornam uma lista vazia (geração sob demanda).
+
+        Args:
+            theme (str): O tema das perguntas.
+            quantity (int): Quantidade máxima de perguntas a retirar.
+
+        Returns:
+            List[str]: As perguntas retiradas (pode haver menos que o pedido).
+        """
+        key = normalize_text(theme)
+        queue = self._queues.get(key)
+        if queue is None:
+            self.misses += quantity
+            self._requested(key, theme.strip())
+            return []
+        self._queues.move_to_end(key)
+        questions = [queue.popleft() for _ in range(min(quantity, len(queue)))]
+        self.hits += len(questions)
+        self.misses += quantity - len(questions)
+        if len(queue) <= self.low_watermark:
+            self._wakeup.set()
+        return questions
+
+    def get(self, theme: str) -> Optional[str]:
+        """
+        Retira uma pergunta da fila do tema.
+
+        Args:
+            theme (str): O tema da pergunta.
+
+        Returns:
+            Optional[str]: A pergunta, ou None se a fila estiver vazia.
+        """
+        questions = self.take(theme, 1)
+        return questions[0] if questions else None
+
+    def warm(self, themes: Iterable[str]):
+        """
+        Registra temas a serem pré-gerados antes da primeira requisição.
+
+        Args:
+            themes (Iterable[str]): Os temas.
+        """
+        for theme in themes:
+            key = normalize_text(theme)
+            if key and (key in self._queues or self._register(key, theme.strip())):
+                self._warmed.add(key)
+        self._wakeup.set()
+
+    def stats(self) -> dict:
+        """
+        Retorna as estatísticas de uso da reserva.
+
+        Returns:
+            dict: Acertos, faltas, número de temas e de perguntas disponíveis.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "themes": len(self._queues),
+            "questions": sum(len(queue) for queue in self._queues.values()),
+        }
+
+    async def start(self):
+        """
+        Inicia a tarefa de reabastecimento em segundo plano.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+            logger.info("Reserva de perguntas iniciada (low=%d, high=%d).", self.low_watermark, self.high_watermark)
+
+    async def stop(self):
+        """
+        Interrompe a tarefa de reabastecimento e os reabastecimentos em andamento.
+        """
+        tasks = list(self._refill_tasks)
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("Reserva de perguntas encerrada.")
+
+    async def _run(self):
+        """
+        Laço principal: aguarda um sinal (ou o intervalo periódico) e agenda o
+        reabastecimento dos temas na marca inferior ou abaixo dela.
+        """
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            for key, queue in list(self._queues.items()):
+                if len(queue) <= self.low_watermark and key not in self._refilling:
+                    self._refilling.add(key)
+                    task = asyncio.create_task(self._refill(key))
+                    self._refill_tasks.add(task)
+                    task.add_done_callback(self._refill_tasks.discard)
+
+    async def _refill(self, key: str):
+        """
+        Gera perguntas para o tema até a marca superior.
+        """
+        try:
+            async with self._refill_semaphore:
+                queue = self._queues.get(key)
+                if queue is None:
+                    return
+                missing = self.high_watermark - len(queue)
+                if missing <= 0:
+                    return
+                theme = self._themes[key]
+                logger.info("Reabastecendo %d pergunta(s) para o tema '%s'.", missing, theme)
+                questions = await self.service.create_questions_batch(theme, missing)
+                queue = self._queues.get(key)
+                if queue is not None:
+                    queue.extend(questions)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Erro ao reabastecer perguntas para o tema '%s': %s", self._themes.get(key, key), str(e))
+            await asyncio.sleep(self.retry_delay)
+        finally:
+            self._refilling.discard(key)
@@ -0,0 +1,261 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from services.exceptions import UpstreamUnavailableError
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(prompt: str, completion_reserve: int = 512) -> int:
+    """
+    Estima os tokens consumidos por uma chamada a partir do tamanho do prompt
+    (aproximadamente 4 caracteres por token) mais uma reserva para a resposta.
+
+    Args:
+        prompt (str): O prompt enviado.
+        completion_reserve (int): Tokens reservados para a resposta do modelo.
+
+    Returns:
+        int: A estimativa de tokens da chamada.
+    """
+    return len(prompt) // 4 + completion_reserve
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """
+    Indica se o erro corresponde a uma recusa por limite de taxa (HTTP 429) da API.
+    """
+    return getattr(error, "status_code", None) == 429
+
+
+class TokenBucket:
+    """
+    Balde de fichas (token bucket) reabastecido continuamente a uma taxa por minuto.
+
+    As aquisições são atendidas em ordem de chegada; quem não puder ser atendido até o
+    prazo recebe um UpstreamUnavailableError.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute (float): Fichas adicionadas por minuto.
+            capacity (Optional[float]): Capacidade máxima do balde. Se omitida, igual à taxa por minuto.
+        """
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float, deadline: float):
+        """
+        Retira `amount` fichas do balde, aguardando o reabastecimento se necessário.
+
+        Args:
+            amount (float): Quantidade de fichas.
+            deadline (float): Instante (`time.monotonic()`) limite para a aquisição.
+
+        Raises:
+            UpstreamUnavailableError: Se as fichas não estiverem disponíveis até o prazo.
+        """
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+                if time.monotonic() + wait > deadline:
+                    raise UpstreamUnavailableError("Cota de chamadas ao serviço de IA esgotada.", retry_after=wait)
+                await asyncio.sleep(wait)
+
+    def debit(self, amount: float):
+        """
+        Ajusta o saldo do balde (ex.: diferença entre tokens estimados e consumidos).
+        O saldo pode ficar negativo, atrasando as próximas aquisições.
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite de concorrência adaptativo no estilo AIMD: cresce aditivamente enquanto as
+    chamadas são bem-sucedidas e rápidas, e cai multiplicativamente em recusas por limite
+    de taxa (429) ou picos de latência.
+    """
+
+    def __init__(
+            self,
+            initial: int = 16,
+            minimum: int = 1,
+            maximum: int = 64,
+            latency_threshold: float = 10.0,
+            backoff: float = 0.5
+    ):
+        """
+        Args:
+            initial (int): Limite inicial de chamadas simultâneas.
+            minimum (int): Limite mínimo.
+            maximum (int): Limite máximo.
+            latency_threshold (float): Latência, em segundos, acima da qual o limite é reduzido.
+            backoff (float): Fator multiplicativo aplicado ao limite ao reduzi-lo.
+        """
+        self.minimum = minimum
+        self.maximum = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.latency_threshold = latency_threshold
+        self.backoff = backoff
+        self.in_flight = 0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, deadline: float):
+        """
+        Obtém uma vaga de execução, aguardando até o prazo.
+
+        Args:
+            deadline (float): Instante (`time.monotonic()`) limite para a aquisição.
+
+        Raises:
+            UpstreamUnavailableError: Se nenhuma vaga for liberada até o prazo.
+        """
+        async with self._condition:
+            while self.in_flight >= int(self.limit):
+                timeout = deadline - time.monotonic()
+                try:
+                    if timeout <= 0:
+                        raise asyncio.TimeoutError
+                    await asyncio.wait_for(self._condition.wait(), timeout)
+                except asyncio.TimeoutError:
+                    raise UpstreamUnavailableError("Serviço de IA sobrecarregado.", retry_after=1.0)
+            self.in_flight += 1
+
+    async def release(self, latency: Optional[float], overloaded: bool):
+        """
+        Libera a vaga e ajusta o limite conforme o resultado da chamada.
+
+        Args:
+            latency (Optional[float]): Latência da chamada, ou None se ela falhou.
+            overloaded (bool): Se a chamada foi recusada por limite de taxa.
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if overloaded or (latency is not None and latency > self.latency_threshold):
+                self.limit = max(self.minimum, self.limit * self.backoff)
+                logger.warning("Limite de concorrência reduzido para %.1f.", self.limit)
+            elif latency is not None:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class RateGovernor:
+    """
+    Controla o ritmo das chamadas ao serviço de IA para aproveitar ao máximo a cota
+    contratada: balde de requisições por minuto, balde de tokens por minuto e
+    concorrência adaptativa, com fila de espera limitada por prazo.
+    """
+
+    def __init__(
+            self,
+            requests_per_minute: int = 0,
+            tokens_per_minute: int = 0,
+            initial_concurrency: int = 16,
+            min_concurrency: int = 1,
+            max_concurrency: int = 64,
+            latency_threshold: float = 10.0,
+            queue_timeout: float = 30.0
+    ):
+        """
+        Args:
+            requests_per_minute (int): Cota de requisições por minuto (0 desabilita).
+            tokens_per_minute (int): Cota de tokens por minuto (0 desabilita).
+            initial_concurrency (int): Limite inicial de chamadas simultâneas.
+            min_concurrency (int): Limite mínimo de chamadas simultâneas.
+            max_concurrency (int): Limite máximo de chamadas simultâneas.
+            latency_threshold (float): Latência, em segundos, considerada pico.
+            queue_timeout (float): Tempo máximo, em segundos, de espera na fila.
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial=initial_concurrency,
+            minimum=min_concurrency,
+            maximum=max_concurrency,
+            latency_threshold=latency_threshold
+        )
+        self.queue_timeout = queue_timeout
+        self.throttled = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self, estimated_tokens: int) -> AsyncIterator[None]:
+        """
+        Aguarda a liberação da cota e de uma vaga de concorrência para uma chamada,
+        registrando seu resultado ao final.
+
+        Args:
+            estimated_tokens (int): Tokens estimados da chamada.
+
+        Raises:
+            UpstreamUnavailableError: Se a chamada não puder ser liberada dentro do prazo da fila.
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        try:
+            if self.requests is not None:
+                await self.requests.acquire(1, deadline)
+            if self.tokens is not None:
+                await self.tokens.acquire(estimated_tokens, deadline)
+            await self.concurrency.acquire(deadline)
+        except UpstreamUnavailableError:
+            self.rejected += 1
+            raise
+
+        started = time.monotonic()
+        latency = None
+        overloaded = False
+        try:
+            yield
+            latency = time.monotonic() - started
+        except Exception as e:
+            overloaded = is_rate_limited(e)
+            if overloaded:
+                self.throttled += 1
+            raise
+        finally:
+            await self.concurrency.release(latency, overloaded)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """
+        Corrige o balde de tokens com o consumo real informado pela API.
+
+        Args:
+            estimated_tokens (int): Tokens estimados antes da chamada.
+            actual_tokens (Optional[int]): Tokens efetivamente consumidos, se conhecidos.
+        """
+        if self.tokens is not None and actual_tokens:
+            self.tokens.debit(actual_tokens - estimated_tokens)
+
+    def stats(self) -> dict:
+        """
+        Retorna o estado atual do controle de ritmo.
+
+        Returns:
+            dict: Limite de concorrência, chamadas em andamento, recusas 429 e rejeições por prazo.
+        """
+        return {
+            "concurrency_limit": self.concurrency.limit,
+            "in_flight": self.concurrency.in_flight,
+            "throttled": self.throttled,
+            "rejected": self.rejected,
+        }
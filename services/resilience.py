@@ -0,0 +1,309 @@
+import asyncio
+import contextlib
+import email.utils
+import logging
+import random
+import time
+from collections import deque
+from typing import AsyncContextManager, Awaitable, Callable, Deque, Optional, TypeVar
+
+import httpx
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Códigos HTTP que indicam falhas transitórias
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Indica se a falha é transitória e a chamada pode ser repetida: tempo esgotado, falha
+    de conexão, limite de taxa (429) ou erro do servidor (5xx). Erros de validação e
+    demais erros 4xx não são repetidos.
+
+    Args:
+        error (BaseException): O erro lançado pela chamada.
+
+    Returns:
+        bool: True se a chamada pode ser repetida.
+    """
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, httpx.TransportError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES or status_code >= 500
+    # Erros de conexão/timeout do SDK da Groq não possuem status_code
+    return type(error).__name__ in {"APIConnectionError", "APITimeoutError"}
+
+
+def retry_after_from(error: BaseException) -> Optional[float]:
+    """
+    Extrai do erro o tempo de espera indicado pelo servidor (`retry-after-ms` ou `Retry-After`).
+
+    Args:
+        error (BaseException): O erro lançado pela chamada.
+
+    Returns:
+        Optional[float]: O tempo de espera em segundos, ou None se não informado.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        retry_after = headers.get("retry-after")
+        if retry_after is None:
+            return None
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(retry_after)
+            return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """
+    Orçamento de novas tentativas: cada chamada deposita uma fração de ficha e cada nova
+    tentativa (ou requisição de hedge) consome uma ficha inteira. Assim, as repetições
+    ficam limitadas a uma proporção do tráfego e não amplificam uma indisponibilidade.
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        """
+        Args:
+            ratio (float): Fichas depositadas por chamada (proporção máxima de repetições).
+            max_tokens (float): Saldo máximo de fichas.
+        """
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        """
+        Registra uma nova chamada, acrescentando `ratio` fichas ao saldo.
+        """
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Consome uma ficha para uma nova tentativa.
+
+        Returns:
+            bool: True se havia saldo para a nova tentativa.
+        """
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class LatencyTracker:
+    """
+    Janela deslizante das latências das chamadas bem-sucedidas, usada para calcular
+    percentis (ex.: p95) recentes.
+    """
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, latency: float):
+        self._samples.append(latency)
+
+    def percentile(self, quantile: float) -> Optional[float]:
+        """
+        Retorna o percentil das latências registradas, ou None se não houver amostras.
+        """
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, int(quantile * len(ordered)))
+        return ordered[index]
+
+
+class RetryPolicy:
+    """
+    Camada de resiliência das chamadas ao serviço de IA: tempo limite por tentativa,
+    novas tentativas classificadas com backoff exponencial e jitter (respeitando
+    `Retry-After`), orçamento de repetições e, opcionalmente, requisições de hedge que
+    disparam uma segunda tentativa após a latência p95 e usam a que terminar primeiro.
+    """
+
+    def __init__(
+            self,
+            max_attempts: int = 3,
+            base_delay: float = 0.5,
+            max_delay: float = 8.0,
+            timeout: float = 30.0,
+            budget: Optional[RetryBudget] = None,
+            hedging: bool = False,
+            hedge_quantile: float = 0.95,
+            hedge_min_delay: float = 1.0,
+            hedge_min_samples: int = 20
+    ):
+        """
+        Args:
+            max_attempts (int): Número máximo de tentativas por chamada.
+            base_delay (float): Espera base, em segundos, do backoff exponencial.
+            max_delay (float): Espera máxima, em segundos, entre tentativas. Se o servidor
+                pedir uma espera maior (`Retry-After`), a falha é repassada sem nova tentativa.
+            timeout (float): Tempo limite, em segundos, de cada tentativa.
+            budget (Optional[RetryBudget]): Orçamento de repetições. Se omitido, usa o padrão.
+            hedging (bool): Se requisições de hedge estão habilitadas.
+            hedge_quantile (float): Percentil da latência após o qual o hedge é disparado.
+            hedge_min_delay (float): Espera mínima, em segundos, antes do hedge.
+            hedge_min_samples (int): Amostras de latência necessárias antes de usar hedge.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self.budget = budget or RetryBudget()
+        self.hedging = hedging
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = LatencyTracker()
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Calcula a espera antes da próxima tentativa (backoff exponencial com jitter completo).
+
+        Args:
+            attempt (int): Número da tentativa que falhou (a partir de 1).
+
+        Returns:
+            float: A espera em segundos.
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+    async def call(self, factory: Callable[[], Awaitable[T]],
+                   admission: Optional[Callable[[], AsyncContextManager]] = None) -> T:
+        """
+        Executa a chamada aplicando tempo limite, novas tentativas e hedge.
+
+        Se fornecida, a admissão (ex.: fila justa e controle de ritmo) é obtida a cada
+        tentativa antes de iniciar o tempo limite: a espera nas filas locais não conta no
+        tempo limite nem nas latências usadas pelo hedge.
+
+        Args:
+            factory (Callable[[], Awaitable[T]]): Função que cria a corrotina de uma tentativa.
+            admission (Optional[Callable[[], AsyncContextManager]]): Função que cria o contexto
+                de admissão de cada tentativa.
+
+        Returns:
+            T: O resultado da primeira tentativa bem-sucedida.
+
+        Raises:
+            Exception: O erro da última tentativa, se não for transitório, se as tentativas
+                ou o orçamento se esgotarem ou se o servidor pedir uma espera acima de `max_delay`.
+        """
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await self._attempt(factory, admission)
+            except Exception as e:
+                if attempt >= self.max_attempts or not is_retryable(e):
+                    raise
+                delay = retry_after_from(e)
+                if delay is not None and delay > self.max_delay:
+                    # Repetir antes do prazo pedido pelo servidor só agravaria o limite de taxa
+                    logger.warning("Servidor pediu espera de %.1fs (máximo %.1fs); falha repassada: %s",
+                                   delay, self.max_delay, str(e))
+                    raise
+                if not self.budget.withdraw():
+                    self.budget_exhausted += 1
+                    logger.warning("Orçamento de novas tentativas esgotado; falha repassada: %s", str(e))
+                    raise
+                if delay is None:
+                    delay = self.backoff(attempt)
+                self.retries += 1
+                logger.warning("Tentativa %d falhou (%s); nova tentativa em %.2fs.", attempt, str(e), delay)
+                await asyncio.sleep(delay)
+
+    async def _timed(self, factory: Callable[[], Awaitable[T]],
+                     admission: Optional[Callable[[], AsyncContextManager]] = None,
+                     admitted: Optional[asyncio.Event] = None) -> T:
+        """
+        Executa uma tentativa com tempo limite, após a admissão, registrando sua latência em
+        caso de sucesso.
+        """
+        async with admission() if admission is not None else contextlib.nullcontext():
+            if admitted is not None:
+                admitted.set()
+            started = time.monotonic()
+            result = await asyncio.wait_for(factory(), self.timeout)
+            self.latencies.record(time.monotonic() - started)
+            return result
+
+    async def _attempt(self, factory: Callable[[], Awaitable[T]],
+                       admission: Optional[Callable[[], AsyncContextManager]] = None) -> T:
+        """
+        Executa uma tentativa, disparando uma requisição de hedge se ela demorar mais que o
+        percentil configurado da latência recente (contada a partir da admissão).
+        """
+        if not self.hedging or len(self.latencies) < self.hedge_min_samples:
+            return await self._timed(factory, admission)
+
+        hedge_delay = max(self.hedge_min_delay, self.latencies.percentile(self.hedge_quantile))
+        admitted = asyncio.Event()
+        primary = asyncio.ensure_future(self._timed(factory, admission, admitted))
+        waiter = asyncio.ensure_future(admitted.wait())
+        try:
+            await asyncio.wait({primary, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            done, _ = await asyncio.wait({primary}, timeout=hedge_delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        finally:
+            waiter.cancel()
+        if done or not self.budget.withdraw():
+            return await primary
+
+        self.hedges += 1
+        hedge = asyncio.ensure_future(self._timed(factory, admission))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def stats(self) -> dict:
+        """
+        Retorna as estatísticas da camada de resiliência.
+
+        Returns:
+            dict: Novas tentativas, hedges, hedges vencedores, orçamento esgotado e p95 recente.
+        """
+        return {
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "budget_exhausted": self.budget_exhausted,
+            "p95_latency": self.latencies.percentile(0.95),
+        }
@@ -0,0 +1,249 @@
+import hashlib
+import json
+import logging
+import random
+import re
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from models import Assessment
+from services.assessment_cache import normalize_text
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+# Artigos, preposições e conjunções ignorados na comparação. Negações ("não", "nem",
+# "sem", "nunca") são mantidas, pois mudam o sentido da resposta.
+STOPWORDS = frozenset(
+    "a o as os um uma uns umas de da do das dos em na no nas nos por pela pelo pelas pelos "
+    "para pra com ao aos e ou que se".split()
+)
+
+# Primo de Mersenne usado nas permutações do MinHash
+_PRIME = (1 << 61) - 1
+
+_NON_WORD = re.compile(r"[^\w]+")
+
+
+def normalize_portuguese(text: str) -> Tuple[str, ...]:
+    """
+    Normaliza um texto em português para comparação, retornando a sequência das suas palavras:
+    ignora maiúsculas/minúsculas, acentos, pontuação e as palavras de ligação (ver
+    `STOPWORDS`), mas preserva a ordem, que pode mudar o sentido da resposta.
+
+    Ex.: "A fotossíntese produz oxigênio." e "fotossintese, produz oxigenio" resultam na
+    mesma sequência; "2 é maior que 3" e "3 é maior que 2", não.
+
+    Args:
+        text (str): O texto original.
+
+    Returns:
+        Tuple[str, ...]: As palavras normalizadas, na ordem do texto.
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return tuple(word for word in _NON_WORD.sub(" ", text).split() if word not in STOPWORDS)
+
+
+def shingles(words: Tuple[str, ...], size: int = 2) -> FrozenSet[str]:
+    """
+    Retorna o conjunto das sequências de `size` palavras consecutivas (shingles) de um texto
+    normalizado, para que a similaridade leve em conta a ordem das palavras. Textos mais
+    curtos que `size` resultam em um único shingle com todas as palavras.
+
+    Args:
+        words (Tuple[str, ...]): As palavras normalizadas (ver `normalize_portuguese`).
+        size (int): Quantidade de palavras por shingle.
+
+    Returns:
+        FrozenSet[str]: Os shingles do texto.
+    """
+    if len(words) < size:
+        return frozenset([" ".join(words)]) if words else frozenset()
+    return frozenset(" ".join(words[start:start + size]) for start in range(len(words) - size + 1))
+
+
+def jaccard(first: FrozenSet[str], second: FrozenSet[str]) -> float:
+    """
+    Retorna a similaridade de Jaccard (interseção sobre união) entre dois conjuntos de shingles.
+    """
+    if not first and not second:
+        return 1.0
+    return len(first & second) / len(first | second)
+
+
+def make_question_key(question: str, model: str, prompt_version: str) -> str:
+    """
+    Gera a chave do índice de respostas de uma pergunta, avaliada por um modelo com uma
+    versão do prompt (avaliações de outros modelos ou prompts não são reaproveitadas).
+
+    Args:
+        question (str): A pergunta.
+        model (str): O modelo que realiza a avaliação.
+        prompt_version (str): A versão do prompt de análise.
+
+    Returns:
+        str: O hash SHA-256 (hexadecimal) que identifica a pergunta.
+    """
+    payload = json.dumps([normalize_text(question), model, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _QuestionIndex:
+    """
+    Respostas avaliadas de uma pergunta, com os buckets LSH das assinaturas MinHash.
+    """
+
+    def __init__(self, bands: int):
+        self.entries: List[Tuple[FrozenSet[str], Assessment]] = []
+        self.words: Dict[Tuple[str, ...], int] = {}
+        self.buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+
+
+class SimilarAssessmentIndex:
+    """
+    Índice, por pergunta, das respostas já avaliadas, para reaproveitar a avaliação de uma
+    resposta quase idêntica (ex.: mesma resposta com outra pontuação ou acentuação) sem nova
+    chamada ao modelo.
+
+    Cada resposta é reduzida à sequência das suas palavras normalizadas, aos pares de palavras
+    consecutivas (shingles) e a uma assinatura MinHash desses pares; os candidatos são
+    encontrados por LSH (faixas da assinatura) e confirmados pela similaridade de Jaccard
+    exata dos shingles, que deve atingir `threshold`. Como os shingles preservam a ordem,
+    "2 é maior que 3" e "3 é maior que 2" não são considerados semelhantes. O índice fica em
+    memória do processo, com descarte LRU das perguntas.
+
+    Com o limiar padrão (1), apenas respostas com a mesma sequência de palavras normalizadas
+    são reaproveitadas. Limiares menores aumentam o reaproveitamento, mas trocam precisão por
+    acertos: uma única palavra trocada muda o sentido da resposta (ex.: "libera oxigênio" e
+    "libera nitrogênio") e, em respostas longas, ainda resulta em similaridade próxima de 1.
+    """
+
+    def __init__(
+            self,
+            threshold: float = 1.0,
+            num_perm: int = 64,
+            bands: int = 16,
+            max_questions: int = 1000,
+            max_answers: int = 1000,
+            seed: int = 1
+    ):
+        """
+        Args:
+            threshold (float): Similaridade mínima (de 0 a 1) para reaproveitar uma avaliação
+                (1 exige a mesma sequência de palavras normalizadas).
+            num_perm (int): Quantidade de permutações da assinatura MinHash.
+            bands (int): Quantidade de faixas do LSH (deve dividir `num_perm`).
+            max_questions (int): Número máximo de perguntas no índice.
+            max_answers (int): Número máximo de respostas indexadas por pergunta.
+            seed (int): Semente das permutações.
+
+        Raises:
+            ValueError: Se `bands` não dividir `num_perm`.
+        """
+        if num_perm % bands:
+            raise ValueError("A quantidade de faixas deve dividir a quantidade de permutações.")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_questions = max_questions
+        self.max_answers = max_answers
+        generator = random.Random(seed)
+        self._permutations = [(generator.randrange(1, _PRIME), generator.randrange(_PRIME)) for _ in range(num_perm)]
+        self._questions: "OrderedDict[str, _QuestionIndex]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _signature(self, terms: FrozenSet[str]) -> List[int]:
+        hashes = [int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "big")
+                  for term in terms]
+        return [min((a * value + b) % _PRIME for value in hashes) for a, b in self._permutations]
+
+    def _bands(self, signature: List[int]) -> List[Tuple[int, ...]]:
+        return [tuple(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def lookup(self, question_key: str, answer: str) -> Optional[Assessment]:
+        """
+        Busca a avaliação de uma resposta semelhante à fornecida, para a mesma pergunta.
+
+        Args:
+            question_key (str): A chave da pergunta (ver `make_question_key`).
+            answer (str): A resposta a ser avaliada.
+
+        Returns:
+            Optional[Assessment]: Uma cópia da avaliação reaproveitada, marcada com `reused` e
+                a similaridade, ou None se não houver resposta semelhante o suficiente.
+        """
+        words = normalize_portuguese(answer)
+        index = self._questions.get(question_key)
+        if index is None or not words:
+            self.misses += 1
+            return None
+        self._questions.move_to_end(question_key)
+
+        best, similarity = None, 0.0
+        position = index.words.get(words)
+        if position is not None:
+            best, similarity = position, 1.0
+        else:
+            terms = shingles(words)
+            candidates = set()
+            for band, bucket in zip(self._bands(self._signature(terms)), index.buckets):
+                candidates.update(bucket.get(band, ()))
+            for candidate in candidates:
+                score = jaccard(terms, index.entries[candidate][0])
+                if score > similarity:
+                    best, similarity = candidate, score
+        if best is None or similarity < self.threshold:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.debug("Avaliação reaproveitada de resposta semelhante (similaridade %.2f).", similarity)
+        return index.entries[best][1].model_copy(update={"reused": True, "similarity": round(similarity, 4)})
+
+    def add(self, question_key: str, answer: str, assessment: Assessment):
+        """
+        Indexa a avaliação de uma resposta feita pelo modelo.
+
+        Avaliações reaproveitadas não são indexadas, para que a similaridade seja sempre
+        medida em relação a uma resposta efetivamente avaliada.
+
+        Args:
+            question_key (str): A chave da pergunta (ver `make_question_key`).
+            answer (str): A resposta avaliada.
+            assessment (Assessment): A avaliação feita pelo modelo.
+        """
+        words = normalize_portuguese(answer)
+        if not words or assessment.reused:
+            return
+        index = self._questions.get(question_key)
+        if index is None:
+            index = self._questions[question_key] = _QuestionIndex(self.bands)
+            while len(self._questions) > self.max_questions:
+                self._questions.popitem(last=False)
+        self._questions.move_to_end(question_key)
+        if words in index.words or len(index.entries) >= self.max_answers:
+            return
+
+        terms = shingles(words)
+        position = len(index.entries)
+        index.entries.append((terms, assessment.model_copy()))
+        index.words[words] = position
+        for band, bucket in zip(self._bands(self._signature(terms)), index.buckets):
+            bucket.setdefault(band, []).append(position)
+
+    def stats(self) -> dict:
+        """
+        Retorna as estatísticas de uso do índice.
+
+        Returns:
+            dict: Acertos, faltas, taxa de acerto e quantidade de perguntas indexadas.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+            "questions": len(self._questions),
+        }
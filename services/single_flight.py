@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, TypeVar
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes idênticas (mesma chave) em uma única execução.
+
+    A primeira chamada para uma chave executa a operação; as chamadas que chegam enquanto
+    ela está em andamento aguardam o mesmo resultado ou a mesma exceção. O cancelamento
+    de um dos chamadores não cancela a operação compartilhada.
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.shared = 0
+        self._calls: Dict[str, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """
+        Executa a operação identificada por `key`, ou aguarda a execução já em andamento.
+
+        Args:
+            key (str): Identificador da operação (ex.: hash do prompt).
+            factory (Callable[[], Awaitable[T]]): Função que cria a corrotina da operação.
+
+        Returns:
+            T: O resultado da operação.
+
+        Raises:
+            Exception: A exceção lançada pela operação, repassada a todos os chamadores.
+        """
+        task = self._calls.get(key)
+        if task is None:
+            self.executions += 1
+            task = asyncio.ensure_future(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.shared += 1
+            logger.debug("Chamada agrupada com execução em andamento (chave %.12s).", key)
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        """
+        Remove a execução concluída e marca sua exceção como tratada, evitando avisos
+        quando todos os chamadores foram cancelados.
+        """
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> dict:
+        """
+        Retorna as estatísticas de agrupamento.
+
+        Returns:
+            dict: Execuções reais, chamadas agrupadas e execuções em andamento.
+        """
+        return {"executions": self.executions, "shared": self.shared, "in_flight": len(self._calls)}
@@ -0,0 +1,48 @@
+import json
+import re
+from typing import Any
+
+# Blocos de código Markdown (```json ... ``` ou ``` ... ```)
+_FENCE_PATTERN = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+
+_decoder = json.JSONDecoder(strict=False)
+
+
+def extract_json(text: str) -> Any:
+    """
+    Extrai o valor JSON de uma resposta do modelo, tolerando texto ao redor.
+
+    Tenta, em ordem: o conteúdo inteiro, os blocos de código Markdown e o primeiro
+    objeto ou array JSON embutido no texto (ex.: "Segue a análise: {...} Espero ter ajudado.").
+
+    Args:
+        text (str): O conteúdo retornado pelo modelo.
+
+    Returns:
+        Any: O valor JSON encontrado.
+
+    Raises:
+        ValueError: Se nenhum JSON válido for encontrado.
+    """
+    if not isinstance(text, str):
+        raise ValueError("Resposta vazia ou não textual.")
+    stripped = text.strip()
+    try:
+        return _decoder.decode(stripped)
+    except ValueError:
+        pass
+
+    for block in _FENCE_PATTERN.findall(stripped):
+        try:
+            return _decoder.decode(block.strip())
+        except ValueError:
+            continue
+
+    for match in re.finditer(r"[{\[]", stripped):
+        try:
+            value, _ = _decoder.raw_decode(stripped, match.start())
+        except ValueError:
+            continue
+        if isinstance(value, (dict, list)):
+            return value
+    raise ValueError("Nenhum JSON válido encontrado na resposta.")
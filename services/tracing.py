@@ -0,0 +1,412 @@
+import asyncio
+import contextlib
+import contextvars
+import functools
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from fastapi.routing import APIRoute
+
+# Nome do serviço informado nos spans exportados
+SERVICE_NAME = "fastapi-elearning"
+
+# Cabeçalho W3C Trace Context (`00-<trace_id>-<span_id>-<flags>`)
+_TRACEPARENT_PATTERN = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Span e identificador da requisição atuais (propagados para tarefas e threads)
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+
+
+def current_request_id() -> Optional[str]:
+    """
+    Retorna o identificador da requisição em andamento, se houver.
+    """
+    return _request_id.get()
+
+
+def current_span() -> Optional["Span"]:
+    """
+    Retorna o span atual, se houver.
+    """
+    return _current_span.get()
+
+
+class Span:
+    """
+    Trecho medido de uma requisição (ex.: verificação do token ou chamada ao modelo), no
+    modelo do OpenTelemetry: identificadores de trace e de span, span pai, início, fim,
+    atributos e status.
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent: Optional["Span"] = None,
+                 parent_id: Optional[str] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent = parent
+        self.parent_id = parent.span_id if parent is not None else parent_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status = "UNSET"
+        self.start_time = time.time_ns()
+        self.end_time: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException):
+        self.status = "ERROR"
+        self.attributes["exception.type"] = type(error).__name__
+        self.attributes["exception.message"] = str(error)[:200]
+
+    def end(self):
+        """
+        Encerra o span e o envia ao exportador (chamadas repetidas são ignoradas).
+        """
+        if self.end_time is None:
+            self.end_time = time.time_ns()
+            if self.tracer.exporter is not None:
+                self.tracer.exporter.export(self)
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def to_dict(self) -> dict:
+        """
+        Converte o span no formato JSON do exportador de console do OpenTelemetry.
+        """
+        return {
+            "name": self.name,
+            "context": {"trace_id": f"0x{self.trace_id}", "span_id": f"0x{self.span_id}"},
+            "parent_id": f"0x{self.parent_id}" if self.parent_id else None,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round((self.end_time - self.start_time) / 1e6, 3) if self.end_time else None,
+            "status": {"status_code": self.status},
+            "attributes": self.attributes,
+            "resource": {"service.name": SERVICE_NAME},
+        }
+
+
+class _NoOpSpan:
+    """
+    Span usado quando o rastreamento está desabilitado ou o trace não foi amostrado.
+    """
+
+    name = ""
+    parent = None
+    trace_id = None
+    span_id = None
+    traceparent = None
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_error(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoOpSpan()
+
+
+class SpanExporter:
+    """
+    Interface dos exportadores de spans.
+    """
+
+    def export(self, span: Span):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class StreamSpanExporter(SpanExporter):
+    """
+    Exporta cada span como uma linha JSON em um stream (ex.: stderr ou um arquivo).
+
+    As linhas são acumuladas e gravadas juntas, em uma única escrita, a cada `flush_every`
+    spans (o que também evita linhas intercaladas quando vários processos gravam no mesmo
+    arquivo).
+    """
+
+    def __init__(self, stream: TextIO, flush_every: int = 1, owns_stream: bool = False):
+        self.stream = stream
+        self.flush_every = flush_every
+        self.owns_stream = owns_stream
+        self._lines: List[str] = []
+        self._lock = threading.Lock()
+
+    def _flush(self):
+        if self._lines:
+            self.stream.write("".join(self._lines))
+            self.stream.flush()
+            self._lines.clear()
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._lines.append(line)
+            if len(self._lines) >= self.flush_every:
+                self._flush()
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self.owns_stream:
+                self.stream.close()
+
+
+class InMemorySpanExporter(SpanExporter):
+    """
+    Guarda os spans exportados em memória (usado nos testes).
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def export(self, span: Span):
+        self.spans.append(span)
+
+
+def build_span_exporter(exporter: str, file_path: str = "traces.jsonl") -> Optional[SpanExporter]:
+    """
+    Cria o exportador de spans conforme a configuração.
+
+    Args:
+        exporter (str): `none`, `console` (stderr) ou `file` (linhas JSON em `file_path`).
+        file_path (str): Caminho do arquivo do exportador `file`.
+
+    Returns:
+        Optional[SpanExporter]: O exportador, ou None se o rastreamento estiver desabilitado.
+
+    Raises:
+        ValueError: Se o exportador não for suportado.
+    """
+    if exporter == "none":
+        return None
+    if exporter == "console":
+        return StreamSpanExporter(sys.stderr)
+    if exporter == "file":
+        return StreamSpanExporter(open(file_path, "a", encoding="utf-8"), flush_every=64, owns_stream=True)
+    raise ValueError(f"Exportador de spans não suportado: {exporter}")
+
+
+class Tracer:
+    """
+    Rastreador de spans compatível com o modelo do OpenTelemetry (identificadores W3C e
+    spans aninhados pelo contexto atual, inclusive entre tarefas asyncio e threads).
+
+    Desabilitado (sem exportador), `span` não mede nada, de modo que a instrumentação
+    tem custo desprezível. A amostragem é decidida na raiz de cada trace.
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None, sample_rate: float = 1.0):
+        self.configure(exporter, sample_rate)
+
+    def configure(self, exporter: Optional[SpanExporter], sample_rate: float = 1.0):
+        """
+        Define o exportador (None desabilita o rastreamento) e a taxa de amostragem dos traces.
+
+        Args:
+            exporter (Optional[SpanExporter]): O exportador de spans.
+            sample_rate (float): Fração (0 a 1) das requisições rastreadas.
+        """
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, attributes: Optional[Dict[str, Any]] = None,
+                   traceparent: Optional[str] = None):
+        """
+        Inicia um span filho do span atual (ou a raiz de um novo trace), sem torná-lo o atual.
+
+        Args:
+            name (str): O nome do span.
+            attributes (Optional[Dict[str, Any]]): Atributos iniciais.
+            traceparent (Optional[str]): Cabeçalho W3C recebido, que define o trace de um span raiz.
+
+        Returns:
+            O span iniciado.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        parent = _current_span.get()
+        if parent is NOOP_SPAN:
+            return NOOP_SPAN
+        if parent is not None:
+            return Span(self, name, parent.trace_id, parent=parent, attributes=attributes)
+        match = _TRACEPARENT_PATTERN.match(traceparent or "")
+        if match:
+            return Span(self, name, match.group(1), parent_id=match.group(2), attributes=attributes)
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return NOOP_SPAN
+        return Span(self, name, uuid.uuid4().hex, attributes=attributes)
+
+    @contextlib.contextmanager
+    def use_span(self, span) -> Iterator[Any]:
+        """
+        Torna o span informado o atual durante o bloco, sem encerrá-lo.
+        """
+        token = _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.reset(token)
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Any]:
+        """
+        Mede o bloco em um span filho do span atual, registrando o erro, se houver.
+
+        Ex.: `with tracer.span("llm.call", model=model) as span: ...`.
+
+        Args:
+            name (str): O nome do span.
+            **attributes: Atributos iniciais do span.
+
+        Yields:
+            O span, para adicionar atributos.
+        """
+        if not self.enabled:
+            yield NOOP_SPAN
+            return
+        span = self.start_span(name, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if not isinstance(e, (asyncio.CancelledError, GeneratorExit)):
+                span.set_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def close(self):
+        """
+        Descarrega e libera o exportador.
+        """
+        if self.exporter is not None:
+            self.exporter.close()
+
+
+# Rastreador do processo, configurado no ciclo de vida da aplicação (ver `main.py`)
+tracer = Tracer()
+
+
+class TracingMiddleware:
+    """
+    Middleware ASGI que abre o span raiz de cada requisição HTTP e propaga o identificador
+    da requisição.
+
+    O identificador vem do cabeçalho `X-Request-ID` (ou é gerado) e é devolvido na resposta;
+    um cabeçalho `traceparent` recebido faz a requisição continuar o trace de quem chamou.
+    O span raiz dura até o fim da resposta (inclusive em streaming).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        request_id = headers.get("x-request-id") or uuid.uuid4().hex
+        request_token = _request_id.set(request_id)
+        root = tracer.start_span("http.request", {"http.method": scope["method"], "http.target": scope["path"],
+                                                  "request.id": request_id}, traceparent=headers.get("traceparent"))
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.set_attribute("http.status_code", message["status"])
+                if message["status"] >= 500:
+                    root.status = "ERROR"
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (b"x-request-id", request_id.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            with tracer.use_span(root):
+                await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            root.set_error(e)
+            raise
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if route and root is not NOOP_SPAN:
+                root.name = f"{scope['method']} {route}"
+                root.set_attribute("http.route", route)
+            root.end()
+            _request_id.reset(request_token)
+
+
+class TracedRoute(APIRoute):
+    """
+    Rota que mede, em spans separados, a preparação da requisição (dependências, como a
+    autenticação, e validação do corpo pelo Pydantic) e a execução do endpoint.
+    """
+
+    def get_route_handler(self):
+        endpoint = self.dependant.call
+        if getattr(endpoint, "traced", False):
+            return super().get_route_handler()
+
+        if asyncio.iscoroutinefunction(endpoint):
+            @functools.wraps(endpoint)
+            async def traced_endpoint(*args, **kwargs):
+                with self._endpoint_span():
+                    return await endpoint(*args, **kwargs)
+        else:
+            @functools.wraps(endpoint)
+            def traced_endpoint(*args, **kwargs):
+                with self._endpoint_span():
+                    return endpoint(*args, **kwargs)
+
+        traced_endpoint.traced = True
+        self.dependant.call = traced_endpoint
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            if not tracer.enabled:
+                return await handler(request)
+            validation = tracer.start_span("request.validation", {"http.route": self.path})
+            try:
+                with tracer.use_span(validation):
+                    return await handler(request)
+            except Exception as e:
+                # Erro antes do endpoint (ex.: corpo inválido ou token recusado)
+                if validation is not NOOP_SPAN and validation.end_time is None:
+                    validation.set_error(e)
+                raise
+            finally:
+                validation.end()
+
+        return traced_handler
+
+    @contextlib.contextmanager
+    def _endpoint_span(self):
+        # A validação termina quando o endpoint começa; o endpoint é filho do span da requisição
+        validation = current_span()
+        if validation is None or validation.name != "request.validation":
+            yield
+            return
+        validation.end()
+        with tracer.use_span(validation.parent):
+            with tracer.span("endpoint", **{"code.function": self.name}):
+                yield
@@ -1,17 +1,31 @@
+import json
+
 from fastapi.testclient import TestClient
 
 from main import app
 # Para facilitar os testes dos endpoints que dependem do usuário autenticado,
 # sobrescrevemos a dependência get_current_user.
 from routes.auth_routes import get_current_user
+from routes.dependencies import get_groq_service, get_question_pool
 from services import auth_service
+from services.groq_service import AsyncGroqService
 
 
 def override_get_current_user():
     return {"id": "test-user"}
 
 
+# O AsyncGroqService é compartilhado pela aplicação; nos testes usamos uma instância
+# com chave fictícia, cujos métodos são substituídos via monkeypatch.
+test_groq_service = AsyncGroqService(api_key="test-key")
+
+
+def override_get_groq_service():
+    return test_groq_service
+
+
 app.dependency_overrides[get_current_user] = override_get_current_user
+app.dependency_overrides[get_groq_service] = override_get_groq_service
 
 client = TestClient(app)
 
@@ -55,28 +69,28 @@ def test_read_users_me():
 
 # ---------- Testes para endpoints de Questions ----------
 
-# Helpers para simular o GroqService
-def fake_create_question(self, theme):
+# Helpers para simular o AsyncGroqService
+async def fake_create_question(self, theme, provider=None):
     # Retorna a string com o tema "trimmed"
     return f"Pergunta gerada para {theme.strip()}"
 
 
-def fake_create_question_fail(self, theme):
+async def fake_create_question_fail(self, theme, provider=None):
     raise Exception("Falha na geração da pergunta")
 
 
-def fake_analyze_response(self, question, answer):
+async def fake_analyze_response(self, question, answer, provider=None):
     from models.assessment import Assessment
     return Assessment(score="90%", feedback="Resposta quase correta.")
 
 
-def fake_analyze_response_fail(self, question, answer):
+async def fake_analyze_response_fail(self, question, answer, provider=None):
     raise Exception("Falha na análise da resposta")
 
 
 def test_generate_question_success(monkeypatch):
-    from services.groq_service import GroqService
-    monkeypatch.setattr(GroqService, "create_question", fake_create_question)
+    from services.groq_service import AsyncGroqService
+    monkeypatch.setattr(AsyncGroqService, "create_question", fake_create_question)
     payload = {"theme": " História "}
     response = client.post(
         "/questions/v1/generate-question",
@@ -102,8 +116,8 @@ def test_generate_question_empty_theme():
 
 
 def test_generate_question_internal_error(monkeypatch):
-    from services.groq_service import GroqService
-    monkeypatch.setattr(GroqService, "create_question", fake_create_question_fail)
+    from services.groq_service import AsyncGroqService
+    monkeypatch.setattr(AsyncGroqService, "create_question", fake_create_question_fail)
     payload = {"theme": "Matemática"}
     response = client.post(
         "/questions/v1/generate-question",
@@ -114,8 +128,8 @@ def test_generate_question_internal_error(monkeypatch):
 
 
 def test_generate_question_v2_success(monkeypatch):
-    from services.groq_service import GroqService
-    monkeypatch.setattr(GroqService, "create_question", fake_create_question)
+    from services.groq_service import AsyncGroqService
+    monkeypatch.setattr(AsyncGroqService, "create_question", fake_create_question)
     payload = {"theme": " Química ", "quantity": 3}
     response = client.post(
         "/questions/v2/generate-question",
@@ -131,6 +145,24 @@ def test_generate_question_v2_success(monkeypatch):
         assert item["question"] == "Pergunta gerada para Química"
 
 
+def test_generate_question_v2_batched(monkeypatch):
+    from services.groq_service import AsyncGroqService
+
+    async def fake_create_questions_batch(self, theme, quantity, provider=None):
+        return [f"Pergunta {i} em lote sobre {theme}" for i in range(quantity)]
+
+    monkeypatch.setattr(AsyncGroqService, "create_questions_batch", fake_create_questions_batch)
+    payload = {"theme": "Física", "quantity": 4}
+    response = client.post(
+        "/questions/v2/generate-question?batched=true",
+        json=payload,
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["question"] for item in data] == [f"Pergunta {i} em lote sobre Física" for i in range(4)]
+
+
 def test_generate_question_v2_empty_theme():
     payload = {"theme": "   ", "quantity": 3}
     response = client.post(
@@ -143,8 +175,8 @@ def test_generate_question_v2_empty_theme():
 
 
 def test_generate_question_v2_internal_error(monkeypatch):
-    from services.groq_service import GroqService
-    monkeypatch.setattr(GroqService, "create_question", fake_create_question_fail)
+    from services.groq_service import AsyncGroqService
+    monkeypatch.setattr(AsyncGroqService, "create_question", fake_create_question_fail)
     payload = {"theme": "Biologia", "quantity": 2}
     response = client.post(
         "/questions/v2/generate-question",
@@ -155,8 +187,8 @@ def test_generate_question_v2_internal_error(monkeypatch):
 
 
 def test_analyze_response_success(monkeypatch):
-    from services.groq_service import GroqService
-    monkeypatch.setattr(GroqService, "analyze_response", fake_analyze_response)
+    from services.groq_service import AsyncGroqService
+    monkeypatch.setattr(AsyncGroqService, "analyze_response", fake_analyze_response)
     payload = {
         "question": {"question": "Qual a fórmula da água?"},
         "answer": {"answer": "H2O"}
@@ -169,6 +201,7 @@ def test_analyze_response_success(monkeypatch):
     assert response.status_code == 200
     data = response.json()
     assert data["score"] == "90%"
+    assert data["score_value"] == 90.0
     assert data["feedback"] == "Resposta quase correta."
 
 
@@ -203,8 +236,8 @@ def test_analyze_response_empty_answer():
 
 
 def test_analyze_response_internal_error(monkeypatch):
-    from services.groq_service import GroqService
-    monkeypatch.setattr(GroqService, "analyze_response", fake_analyze_response_fail)
+    from services.groq_service import AsyncGroqService
+    monkeypatch.setattr(AsyncGroqService, "analyze_response", fake_analyze_response_fail)
     payload = {
         "question": {"question": "Qual a fórmula da água?"},
         "answer": {"answer": "H2O"}
@@ -215,3 +248,449 @@ def test_analyze_response_internal_error(monkeypatch):
         headers={"Authorization": "Bearer fake-token"}
     )
     assert response.status_code == 500
+
+
+# ---------- Testes para o ciclo de vida da aplicação ----------
+
+def test_lifespan_shares_groq_service(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "dummy_key")
+    monkeypatch.delitem(app.dependency_overrides, get_groq_service)
+
+    used_services = []
+
+    async def spy_create_question(self, theme, provider=None):
+        used_services.append(self)
+        return await fake_create_question(self, theme)
+
+    monkeypatch.setattr(AsyncGroqService, "create_question", spy_create_question)
+    with TestClient(app) as lifespan_client:
+        for _ in range(2):
+            response = lifespan_client.post(
+                "/questions/v1/generate-question",
+                json={"theme": "História"},
+                headers={"Authorization": "Bearer fake-token"}
+            )
+            assert response.status_code == 200
+        assert used_services[0] is used_services[1] is app.state.groq_service
+    assert app.state.groq_service.http_client.is_closed
+
+
+# ---------- Testes para os endpoints em streaming ----------
+
+def parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_generate_question_stream_success(monkeypatch):
+    async def fake_stream_question(self, theme, provider=None):
+        for delta in ["Pergunta ", "sobre ", theme, "?"]:
+            yield delta
+
+    monkeypatch.setattr(AsyncGroqService, "stream_question", fake_stream_question)
+    response = client.post(
+        "/questions/v1/generate-question/stream",
+        json={"theme": "História"},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    assert [event for event, _ in events] == ["token"] * 4 + ["done"]
+    assert events[-1][1] == {"question": "Pergunta sobre História?"}
+
+
+def test_generate_question_stream_error(monkeypatch):
+    async def fake_stream_question_fail(self, theme, provider=None):
+        yield "Pergunta "
+        raise Exception("Falha na geração da pergunta")
+
+    monkeypatch.setattr(AsyncGroqService, "stream_question", fake_stream_question_fail)
+    response = client.post(
+        "/questions/v1/generate-question/stream",
+        json={"theme": "História"},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    events = parse_sse(response.text)
+    assert events[-1] == ("error", {"detail": "Erro interno ao gerar questão."})
+
+
+def test_generate_question_v2_stream_success(monkeypatch):
+    monkeypatch.setattr(AsyncGroqService, "create_question", fake_create_question)
+    response = client.post(
+        "/questions/v2/generate-question/stream",
+        json={"theme": "Química", "quantity": 3},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"question": "Pergunta gerada para Química"}] * 3
+
+
+def test_analyze_response_stream_success(monkeypatch):
+    async def fake_stream_analysis(self, question, answer, provider=None):
+        for delta in ['{"score": "90%", ', '"feedback": "Resposta quase correta."}']:
+            yield delta
+
+    monkeypatch.setattr(AsyncGroqService, "stream_analysis", fake_stream_analysis)
+    payload = {
+        "question": {"question": "Qual a fórmula da água?"},
+        "answer": {"answer": "H2O"}
+    }
+    response = client.post(
+        "/questions/v1/analyze-response/stream",
+        json=payload,
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 200
+    events = parse_sse(response.text)
+    assert events[-1] == ("done", {"feedback": "Resposta quase correta.", "score": "90%", "score_value": 90.0,
+                                   "reused": False, "similarity": None})
+
+
+# ---------- Testes para a reserva de perguntas ----------
+
+class FakePool:
+    def __init__(self, questions):
+        self.questions = list(questions)
+
+    def get(self, theme):
+        return self.questions.pop(0) if self.questions else None
+
+    def take(self, theme, quantity):
+        taken, self.questions = self.questions[:quantity], self.questions[quantity:]
+        return taken
+
+
+def test_generate_question_from_pool(monkeypatch):
+    monkeypatch.setattr(AsyncGroqService, "create_question", fake_create_question_fail)
+    monkeypatch.setitem(app.dependency_overrides, get_question_pool,
+                        lambda: FakePool(["Pergunta da reserva?"]))
+    response = client.post(
+        "/questions/v1/generate-question",
+        json={"theme": "História"},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 200
+    assert response.json()["question"] == "Pergunta da reserva?"
+
+
+def test_generate_question_v2_pool_with_live_fallback(monkeypatch):
+    monkeypatch.setattr(AsyncGroqService, "create_question", fake_create_question)
+    monkeypatch.setitem(app.dependency_overrides, get_question_pool,
+                        lambda: FakePool(["Pergunta da reserva?"]))
+    response = client.post(
+        "/questions/v2/generate-question",
+        json={"theme": "Química", "quantity": 3},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 200
+    assert [item["question"] for item in response.json()] == [
+        "Pergunta da reserva?", "Pergunta gerada para Química", "Pergunta gerada para Química"
+    ]
+
+
+# ---------- Testes para a verificação do token ----------
+
+def test_get_current_user_decodes_token_once(monkeypatch):
+    import jwt
+    from datetime import timedelta
+    monkeypatch.delitem(app.dependency_overrides, get_current_user)
+    monkeypatch.setattr(AsyncGroqService, "create_question", fake_create_question)
+    auth_service.token_cache.clear()
+    token = auth_service.create_access_token({"sub": "123"}, expires_delta=timedelta(minutes=1))
+
+    decodes = []
+    original_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decodes.append(args[0])
+        return original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth_service.jwt, "decode", counting_decode)
+    for _ in range(3):
+        response = client.post(
+            "/questions/v1/generate-question",
+            json={"theme": "História"},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+        assert response.status_code == 200
+    assert len(decodes) == 1
+
+    response = client.get("/auth/users/me", headers={"Authorization": "Bearer token-invalido"})
+    assert response.status_code == 401
+
+
+# ---------- Testes para a indisponibilidade do serviço de IA ----------
+
+def test_generate_question_upstream_unavailable(monkeypatch):
+    from services.exceptions import UpstreamUnavailableError
+
+    async def fake_create_question_busy(self, theme, provider=None):
+        raise UpstreamUnavailableError(retry_after=2.4)
+
+    monkeypatch.setattr(AsyncGroqService, "create_question", fake_create_question_busy)
+    response = client.post(
+        "/questions/v1/generate-question",
+        json={"theme": "Matemática"},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "3"
+
+
+def test_generate_question_upstream_timeout_returns_503(monkeypatch):
+    from services.llm_providers import StubProvider
+    from services.resilience import RetryPolicy
+    service = AsyncGroqService(api_key="test-key", providers={"stub": StubProvider(latency=1.0)},
+                               retry_policy=RetryPolicy(max_attempts=2, base_delay=0.001, timeout=0.01))
+    monkeypatch.setitem(app.dependency_overrides, get_groq_service, lambda: service)
+    monkeypatch.setitem(app.dependency_overrides, get_question_pool, lambda: FakePool([]))
+
+    response = client.post(
+        "/questions/v1/generate-question?provider=stub",
+        json={"theme": "Matemática"},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_streaming_endpoints_reject_before_starting_when_breaker_open(monkeypatch):
+    from services.circuit_breaker import CircuitBreaker
+    from services.exceptions import LLMProviderError
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure(LLMProviderError("Bad Gateway", 502))
+    service = AsyncGroqService(api_key="test-key", circuit_breaker=breaker)
+    monkeypatch.setitem(app.dependency_overrides, get_groq_service, lambda: service)
+
+    requests = [
+        ("/questions/v1/generate-question/stream", {"theme": "Matemática"}),
+        ("/questions/v2/generate-question/stream", {"theme": "Matemática", "quantity": 2}),
+        ("/questions/v1/analyze-response/stream",
+         {"question": {"question": "Pergunta?"}, "answer": {"answer": "Resposta"}}),
+    ]
+    for url, body in requests:
+        response = client.post(url, json=body, headers={"Authorization": "Bearer fake-token"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "30"
+    assert breaker.stats()["rejected"] == 3
+
+
+# ---------- Testes para a escolha do provedor de LLM ----------
+
+def test_generate_question_provider_per_request(monkeypatch):
+    from services.llm_providers import StubProvider
+    service = AsyncGroqService(api_key="test-key", providers={"stub": StubProvider()})
+    monkeypatch.setitem(app.dependency_overrides, get_groq_service, lambda: service)
+    monkeypatch.setitem(app.dependency_overrides, get_question_pool, lambda: FakePool(["Pergunta da reserva?"]))
+
+    response = client.post(
+        "/questions/v1/generate-question?provider=stub",
+        json={"theme": "Matemática"},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 200
+    assert response.json()["question"].startswith("Pergunta simulada")
+
+    response = client.post(
+        "/questions/v1/analyze-response?provider=inexistente",
+        json={"question": {"question": "Pergunta?"}, "answer": {"answer": "Resposta"}},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 400
+
+
+# ---------- Testes para a correção em lote ----------
+
+def test_analyze_responses_bulk_dedupes_and_reports_errors(monkeypatch):
+    from models import Assessment
+    calls = []
+
+    async def fake_analyze(self, question, answer, provider=None):
+        calls.append((question, answer))
+        if answer == "erro":
+            raise Exception("Erro interno ao analisar a resposta.")
+        return Assessment(score="90%", feedback=f"Avaliação de {answer}.")
+
+    monkeypatch.setattr(AsyncGroqService, "analyze_response", fake_analyze)
+    items = [
+        {"question": "Qual a fórmula da água?", "answer": "H2O"},
+        {"question": "Qual a capital do Brasil?", "answer": "erro"},
+        {"question": "qual a fórmula  da água?", "answer": " h2o "},
+    ]
+    response = client.post("/questions/v1/analyze-responses", json=items,
+                           headers={"Authorization": "Bearer fake-token"})
+    assert response.status_code == 200
+    data = response.json()
+    assert [result["index"] for result in data] == [0, 1, 2]
+    assert data[0]["assessment"]["feedback"] == "Avaliação de H2O."
+    assert data[2] == {**data[0], "index": 2}
+    assert data[1]["assessment"] is None and data[1]["error"] == "Erro interno ao analisar resposta."
+    assert len(calls) == 2
+
+    response = client.post("/questions/v1/analyze-responses", json=[],
+                           headers={"Authorization": "Bearer fake-token"})
+    assert response.status_code == 422
+
+
+def test_analyze_responses_stream_ndjson(monkeypatch):
+    from models import Assessment
+
+    async def fake_analyze(self, question, answer, provider=None):
+        return Assessment(score="50%", feedback=answer)
+
+    monkeypatch.setattr(AsyncGroqService, "analyze_response", fake_analyze)
+    body = "\n".join([
+        json.dumps({"question": "Pergunta 1?", "answer": "A"}),
+        "isto não é JSON",
+        json.dumps({"question": "Pergunta 2?", "answer": "B"}),
+    ])
+    response = client.post("/questions/v1/analyze-responses/stream", content=body,
+                           headers={"Authorization": "Bearer fake-token", "Content-Type": "application/x-ndjson"})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["index"] for line in lines] == [0, 1, 2]
+    assert lines[0]["assessment"]["feedback"] == "A"
+    assert lines[1]["error"] == "Item inválido."
+    assert lines[2]["assessment"]["score_value"] == 50.0
+
+
+# ---------- Testes para a fila de tarefas (/jobs) ----------
+
+def test_jobs_submit_poll_and_owner_check(monkeypatch):
+    import asyncio
+    from models import Job
+    from routes.dependencies import get_job_queue
+    from services.job_queue import JobQueue, MemoryJobStore
+
+    async def handler(payload):
+        return payload
+
+    # Sem workers, as tarefas permanecem na fila e a conclusão é simulada no armazenamento
+    queue = JobQueue(MemoryJobStore(), {"generate_questions": handler, "analyze_responses": handler}, workers=0)
+    monkeypatch.setitem(app.dependency_overrides, get_job_queue, lambda: queue)
+    headers = {"Authorization": "Bearer fake-token"}
+
+    response = client.post("/jobs/v1/analyze-responses", json=[{"question": "Q?", "answer": "R"}], headers=headers)
+    assert response.status_code == 202
+    job = response.json()
+    assert job["status"] == "queued" and job["kind"] == "analyze_responses" and job["owner"] == "test-user"
+
+    response = client.post("/jobs/v1/generate-question", json={"theme": "Física", "quantity": 50}, headers=headers)
+    assert response.status_code == 202
+
+    finished = Job(**{**job, "status": "succeeded", "result": [{"index": 0}], "finished_at": 1.0})
+    asyncio.run(queue.store.save(finished))
+    response = client.get(f"/jobs/v1/{job['id']}?wait=1", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["status"] == "succeeded" and response.json()["result"] == [{"index": 0}]
+
+    events = parse_sse(client.get(f"/jobs/v1/{job['id']}/events", headers=headers).text)
+    assert events[-1][0] == "done" and events[-1][1]["status"] == "succeeded"
+
+    asyncio.run(queue.store.add(Job(id="alheia", kind="analyze_responses", owner="outro", created_at=1.0), {}))
+    assert client.get("/jobs/v1/alheia", headers=headers).status_code == 404
+    assert client.get("/jobs/v1/inexistente", headers=headers).status_code == 404
+    assert client.post("/jobs/v1/analyze-responses", json=[], headers=headers).status_code == 422
+
+
+# ---------- Testes para /metrics ----------
+
+def test_metrics_endpoint_reports_requests_by_route(monkeypatch):
+    monkeypatch.setattr(AsyncGroqService, "create_question", fake_create_question)
+    client.post("/questions/v1/generate-question", json={"theme": "Física"},
+                headers={"Authorization": "Bearer fake-token"})
+    client.get("/rota/inexistente")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert 'http_requests_total{method="POST",route="/questions/v1/generate-question",status="200"}' in text
+    assert 'http_requests_total{method="GET",route="unmatched",status="404"}' in text
+    assert 'http_request_duration_seconds_bucket{method="POST",route="/questions/v1/generate-question",le="+Inf"}' in text
+    assert "http_requests_in_flight 1" in text
+    assert 'cache_hit_ratio{cache="token"}' in text
+
+
+# ---------- Testes para o rastreamento das requisições ----------
+
+def test_analyze_response_emits_spans_per_stage(monkeypatch):
+    from datetime import timedelta
+    from types import SimpleNamespace
+    from services.tracing import InMemorySpanExporter, tracer
+    monkeypatch.delitem(app.dependency_overrides, get_current_user)
+    token = auth_service.create_access_token({"sub": "123"}, expires_delta=timedelta(minutes=1))
+    exporter = InMemorySpanExporter()
+    tracer.configure(exporter)
+
+    async def fake_create(messages, model, **kwargs):
+        content = '{"score": "8/10", "feedback": "Boa resposta."}'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+                               usage=SimpleNamespace(total_tokens=120))
+
+    monkeypatch.setattr(test_groq_service.client.chat.completions, "create", fake_create)
+    try:
+        response = client.post(
+            "/questions/v1/analyze-response",
+            json={"question": {"question": "O que é tracing?"}, "answer": {"answer": "Rastreamento de etapas."}},
+            headers={"Authorization": f"Bearer {token}", "X-Request-ID": "req-123",
+                     "traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"}
+        )
+    finally:
+        tracer.configure(None)
+    assert response.status_code == 200
+    assert response.headers["x-request-id"] == "req-123"
+
+    spans = {span.name: span for span in exporter.spans}
+    root = spans["POST /questions/v1/analyze-response"]
+    assert root.attributes["request.id"] == "req-123" and root.attributes["http.status_code"] == 200
+    assert root.parent_id == "b7ad6b7169203331"
+    assert {span.trace_id for span in exporter.spans} == {"0af7651916cd43dd8448eb211c80319c"}
+    assert spans["request.validation"].parent_id == root.span_id
+    assert spans["auth.get_current_user"].parent_id == spans["request.validation"].span_id
+    assert spans["endpoint"].parent_id == root.span_id
+    assert spans["prompt.build"].parent_id == spans["endpoint"].span_id
+    assert spans["llm.call"].attributes["llm.usage.total_tokens"] == 120
+    assert spans["llm.attempt"].parent_id == spans["llm.call"].span_id
+    assert spans["assessment.validate"].parent_id == spans["response.parse"].span_id
+
+
+# ---------- Testes para as cotas por usuário ----------
+
+def test_tenant_token_quota_returns_429(monkeypatch):
+    from services.fair_scheduler import TenantBudgets
+    from services.llm_providers import StubProvider
+    service = AsyncGroqService(api_key="test-key", providers={"stub": StubProvider()}, default_provider="stub",
+                               tenant_budgets=TenantBudgets(tokens_per_minute=60))
+    monkeypatch.setitem(app.dependency_overrides, get_groq_service, lambda: service)
+
+    response = client.post(
+        "/questions/v1/generate-question",
+        json={"theme": "Matemática"},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 200
+    assert service.tenant_budgets.balance("test-user") < 0
+
+    response = client.post(
+        "/questions/v1/generate-question",
+        json={"theme": "Matemática"},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 1
+    assert service.tenant_budgets.balance("outro-usuario") == 60
+
+
+def test_generate_question_v2_quantity_limit():
+    response = client.post(
+        "/questions/v2/generate-question",
+        json={"theme": "Matemática", "quantity": 500},
+        headers={"Authorization": "Bearer fake-token"}
+    )
+    assert response.status_code == 422
@@ -1,4 +1,7 @@
+import asyncio
 import json
+import time
+
 import pytest
 from datetime import timedelta
 
@@ -10,29 +13,62 @@ from pydantic import ValidationError
 # ===== Testes para services/auth_service.py =====
 
 def test_create_access_token_success(monkeypatch):
+    from config import Settings
     from services.auth_service import create_access_token
 
-    # Define as variáveis de ambiente necessárias para o teste.
-    monkeypatch.setenv("SECRET_KEY", "testsecret")
-    monkeypatch.setenv("ALGORITHM", "HS256")
+    # As configurações são injetadas explicitamente, sem depender do ambiente.
+    settings = Settings(_env_file=None, groq_api_key="dummy_key", secret_key="testsecret", algorithm="HS256")
 
     data = {"sub": "123"}
-    token = create_access_token(data, expires_delta=timedelta(minutes=1))
+    token = create_access_token(data, expires_delta=timedelta(minutes=1), settings=settings)
     decoded = jwt.decode(token, "testsecret", algorithms=["HS256"])
     assert decoded["sub"] == "123"
     assert "exp" in decoded
 
 
-def test_create_access_token_failure(monkeypatch):
+def test_create_access_token_failure(monkeypatch, tmp_path):
+    from config import get_settings
     from services.auth_service import create_access_token
 
-    # Remove as variáveis de ambiente para simular erro
+    # Remove as variáveis de ambiente (e o .env) para simular erro
     monkeypatch.delenv("SECRET_KEY", raising=False)
     monkeypatch.delenv("ALGORITHM", raising=False)
+    monkeypatch.chdir(tmp_path)
+    get_settings.cache_clear()
 
     data = {"sub": "123"}
-    with pytest.raises(ValueError):
-        create_access_token(data)
+    try:
+        with pytest.raises(ValueError):
+            create_access_token(data)
+    finally:
+        get_settings.cache_clear()
+
+
+# ===== Testes para config.py =====
+
+def test_settings_parsed_once_from_environment(monkeypatch, tmp_path):
+    from config import Settings
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GROQ_API_KEY", "dummy_key")
+    monkeypatch.setenv("SECRET_KEY", "testsecret")
+    monkeypatch.setenv("ALGORITHM", "HS256")
+    monkeypatch.setenv("ACCESS_TOKEN_EXPIRE_MINUTES", "45")
+    monkeypatch.setenv("GROQ_BATCH_GENERATION", "true")
+    monkeypatch.setenv("QUESTION_POOL_THEMES", "Matemática, História,")
+    settings = Settings()
+    assert settings.access_token_expire_minutes == 45.0
+    assert settings.groq_batch_generation is True
+    assert settings.question_pool_theme_list == ["Matemática", "História"]
+
+
+def test_settings_invalid_values_fail_fast(monkeypatch, tmp_path):
+    from config import Settings
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValidationError):
+        Settings(groq_api_key="dummy_key", secret_key="testsecret", algorithm="ALGORITMO")
+    with pytest.raises(ValidationError):
+        Settings(groq_api_key="dummy_key", secret_key="testsecret", algorithm="HS256",
+                 access_token_expire_minutes="trinta")
 
 
 def test_verify_user_success():
@@ -46,6 +82,43 @@ def test_verify_user_failure():
     assert verify_user("usuario", "senhaerrada") is None
 
 
+def test_decode_access_token_uses_cache(monkeypatch):
+    from services import auth_service
+    auth_service.token_cache.clear()
+    token = jwt.encode({"sub": "123", "exp": int(time.time()) + 60}, "testsecret", algorithm="HS256")
+    decodes = []
+    original_decode = jwt.decode
+
+    def counting_decode(*args, **kwargs):
+        decodes.append(args[0])
+        return original_decode(*args, **kwargs)
+
+    monkeypatch.setattr(auth_service.jwt, "decode", counting_decode)
+    for _ in range(3):
+        assert auth_service.decode_access_token(token, "testsecret", "HS256")["sub"] == "123"
+    assert len(decodes) == 1
+    # Outra chave secreta não reaproveita a verificação anterior
+    with pytest.raises(jwt.InvalidSignatureError):
+        auth_service.decode_access_token(token, "outrosegredo", "HS256")
+
+
+def test_token_cache_honors_expiration_and_size(monkeypatch):
+    from services import auth_service
+    from services.auth_service import TokenCache
+    now = {"value": 1000.0}
+    monkeypatch.setattr(auth_service.time, "time", lambda: now["value"])
+    cache = TokenCache(max_size=2, ttl=300)
+    cache.set("a", {"sub": "1", "exp": 1010})
+    cache.set("b", {"sub": "2"})
+    assert cache.get("a") == {"sub": "1", "exp": 1010}
+    cache.set("c", {"sub": "3"})
+    assert cache.get("b") is None
+    now["value"] = 1010
+    assert cache.get("a") is None
+    assert cache.get("c") == {"sub": "3"}
+    assert cache.stats() == {"hits": 2, "misses": 2, "size": 1}
+
+
 # ===== Testes para services/groq_service.py =====
 
 # Helper para simular as respostas do client do Groq
@@ -57,75 +130,1656 @@ class DummyCompletion:
         self.choices = [self.DummyChoice(content)]
 
 
-def dummy_create_completion_success(messages, model):
+# ===== Testes para AsyncGroqService =====
+
+async def async_dummy_create_completion_success(messages, model):
     return DummyCompletion("Pergunta de teste")
 
 
-def dummy_create_completion_fail(messages, model):
+async def async_dummy_create_completion_fail(messages, model, **kwargs):
     raise Exception("Erro na API Groq")
 
 
-def dummy_create_completion_analysis(messages, model):
-    # Retorna uma string JSON válida
-    response = '{"score": "80%", "feedback": "Bom trabalho."}'
-    return DummyCompletion(response)
+async def async_dummy_create_completion_analysis(messages, model, **kwargs):
+    return DummyCompletion('{"score": "80%", "feedback": "Bom trabalho."}')
 
 
-def dummy_create_completion_invalid_json(messages, model):
-    return DummyCompletion("texto não-json")
-
-
-def test_groq_service_init_failure(monkeypatch):
-    from services.groq_service import GroqService
+def test_async_groq_service_init_failure(monkeypatch):
+    from services.groq_service import AsyncGroqService
     monkeypatch.delenv("GROQ_API_KEY", raising=False)
     with pytest.raises(ValueError):
-        GroqService()
+        AsyncGroqService()
 
 
-def test_groq_service_create_question_success(monkeypatch):
-    monkeypatch.setenv("GROQ_API_KEY", "dummy_key")
-    from services.groq_service import GroqService
-    service = GroqService()
-    monkeypatch.setattr(service.client.chat.completions, "create", dummy_create_completion_success)
-    question_text = service.create_question("Teste")
-    assert question_text == "Pergunta de teste"
+def test_async_groq_service_create_question_success(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+    monkeypatch.setattr(service.client.chat.completions, "create", async_dummy_create_completion_success)
+    assert asyncio.run(service.create_question("Teste")) == "Pergunta de teste"
 
 
-def test_groq_service_create_question_failure(monkeypatch):
-    monkeypatch.setenv("GROQ_API_KEY", "dummy_key")
-    from services.groq_service import GroqService
-    service = GroqService()
-    monkeypatch.setattr(service.client.chat.completions, "create", dummy_create_completion_fail)
+def test_async_groq_service_create_question_failure(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+    monkeypatch.setattr(service.client.chat.completions, "create", async_dummy_create_completion_fail)
     with pytest.raises(Exception) as excinfo:
-        service.create_question("Teste")
+        asyncio.run(service.create_question("Teste"))
     assert "Erro interno ao gerar a pergunta." in str(excinfo.value)
 
 
-def test_groq_service_analyze_response_success(monkeypatch):
-    monkeypatch.setenv("GROQ_API_KEY", "dummy_key")
-    from services.groq_service import GroqService
-    service = GroqService()
-    monkeypatch.setattr(service.client.chat.completions, "create", dummy_create_completion_analysis)
-    assessment = service.analyze_response("Pergunta", "Resposta")
+def test_async_groq_service_analyze_response_success(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+    monkeypatch.setattr(service.client.chat.completions, "create", async_dummy_create_completion_analysis)
+    assessment = asyncio.run(service.analyze_response("Pergunta", "Resposta"))
     assert assessment.score == "80%"
     assert assessment.feedback == "Bom trabalho."
 
 
-def test_groq_service_analyze_response_failure(monkeypatch):
-    monkeypatch.setenv("GROQ_API_KEY", "dummy_key")
-    from services.groq_service import GroqService
-    service = GroqService()
-    monkeypatch.setattr(service.client.chat.completions, "create", dummy_create_completion_fail)
+def test_async_groq_service_analyze_response_failure(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+    monkeypatch.setattr(service.client.chat.completions, "create", async_dummy_create_completion_fail)
     with pytest.raises(Exception) as excinfo:
-        service.analyze_response("Pergunta", "Resposta")
+        asyncio.run(service.analyze_response("Pergunta", "Resposta"))
     assert "Erro interno ao analisar a resposta." in str(excinfo.value)
 
 
-def test_groq_service_analyze_response_invalid_json(monkeypatch):
-    monkeypatch.setenv("GROQ_API_KEY", "dummy_key")
-    from services.groq_service import GroqService
-    service = GroqService()
-    monkeypatch.setattr(service.client.chat.completions, "create", dummy_create_completion_invalid_json)
+def test_async_groq_service_analyze_response_invalid_json(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+
+    async def invalid_json(messages, model, **kwargs):
+        return DummyCompletion("texto não-json")
+
+    monkeypatch.setattr(service.client.chat.completions, "create", invalid_json)
     with pytest.raises(ValueError) as excinfo:
-        service.analyze_response("Pergunta", "Resposta")
+        asyncio.run(service.analyze_response("Pergunta", "Resposta"))
     assert "Resposta em formato inválido." in str(excinfo.value)
+
+
+def test_async_groq_service_connection_pool():
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key", max_connections=7, max_keepalive_connections=3)
+    pool = service.http_client._transport._pool
+    assert pool._max_connections == 7
+    assert pool._max_keepalive_connections == 3
+    assert service.client._client is service.http_client
+    asyncio.run(service.close())
+    assert service.http_client.is_closed
+
+
+def test_async_groq_service_concurrent_calls(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+    in_flight = {"current": 0, "max": 0}
+
+    async def slow_completion(messages, model):
+        in_flight["current"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        await asyncio.sleep(0.01)
+        in_flight["current"] -= 1
+        return DummyCompletion("Pergunta de teste")
+
+    monkeypatch.setattr(service.client.chat.completions, "create", slow_completion)
+
+    async def run():
+        return await asyncio.gather(*(service.create_question("Teste") for _ in range(50)))
+
+    results = asyncio.run(run())
+    assert len(results) == 50
+    assert in_flight["max"] == 50
+
+
+# ===== Testes para services/concurrency.py =====
+
+def test_gather_bounded_preserves_order_and_limit():
+    from services.concurrency import gather_bounded
+    in_flight = {"current": 0, "max": 0}
+
+    async def work(index):
+        in_flight["current"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        await asyncio.sleep(0.01 * (5 - index % 5))
+        in_flight["current"] -= 1
+        return index
+
+    async def run():
+        shared = asyncio.Semaphore(10)
+        return await gather_bounded([lambda i=i: work(i) for i in range(10)], limit=3, shared_semaphore=shared)
+
+    assert asyncio.run(run()) == list(range(10))
+    assert in_flight["max"] == 3
+
+
+def test_gather_bounded_fail_fast_cancels_siblings():
+    from services.concurrency import gather_bounded
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("falhou")
+
+    async def run():
+        return await gather_bounded([slow, fail, slow], limit=3)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert len(cancelled) == 2
+
+
+def test_async_groq_service_create_questions_concurrently(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key", max_concurrency_per_request=4)
+    in_flight = {"current": 0, "max": 0}
+    counter = {"n": 0}
+
+    async def slow_completion(messages, model):
+        in_flight["current"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["current"])
+        counter["n"] += 1
+        number = counter["n"]
+        await asyncio.sleep(0.01)
+        in_flight["current"] -= 1
+        return DummyCompletion(f"Pergunta {number}")
+
+    monkeypatch.setattr(service.client.chat.completions, "create", slow_completion)
+    questions = asyncio.run(service.create_questions("Teste", 10))
+    assert questions == [f"Pergunta {i}" for i in range(1, 11)]
+    assert in_flight["max"] == 4
+
+
+# ===== Testes para a geração de perguntas em lote =====
+
+def test_parse_question_batch_formats():
+    from services.groq_service import _parse_question_batch
+    assert _parse_question_batch('{"questions": ["Pergunta A?", "Pergunta B?"]}') == ["Pergunta A?", "Pergunta B?"]
+    assert _parse_question_batch('[{"question": "Pergunta A?"}, "Pergunta A?", "abc"]') == ["Pergunta A?"]
+    assert _parse_question_batch("texto não-json") == []
+
+
+def test_async_groq_service_create_questions_batch(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key", batch_size=4)
+    calls = []
+
+    async def batch_completion(messages, model, **options):
+        calls.append(options)
+        size = 4 if "crie 4 perguntas" in messages[0]["content"] else 2
+        start = len(calls) * 10
+        return DummyCompletion(json.dumps({"questions": [f"Pergunta {start + i}?" for i in range(size)]}))
+
+    monkeypatch.setattr(service.client.chat.completions, "create", batch_completion)
+    questions = asyncio.run(service.create_questions_batch("Teste", 10))
+    assert len(questions) == 10
+    assert len(set(questions)) == 10
+    assert len(calls) == 3
+    assert all(options == {"response_format": {"type": "json_object"}} for options in calls)
+
+
+def test_async_groq_service_create_questions_batch_shortfall(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key", batch_size=5)
+
+    async def partial_completion(messages, model, **options):
+        if options:
+            return DummyCompletion('{"questions": ["Pergunta em lote?"]}')
+        return DummyCompletion("Pergunta individual?")
+
+    monkeypatch.setattr(service.client.chat.completions, "create", partial_completion)
+    questions = asyncio.run(service.create_questions_batch("Teste", 3))
+    assert questions == ["Pergunta em lote?", "Pergunta individual?", "Pergunta individual?"]
+
+
+# ===== Testes para o streaming do AsyncGroqService =====
+
+class DummyStream:
+    def __init__(self, deltas):
+        self.deltas = deltas
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for delta in self.deltas:
+            choice = type("DummyChoice", (), {"delta": type("DummyDelta", (), {"content": delta})})
+            yield type("DummyChunk", (), {"choices": [choice]})
+
+
+def test_async_groq_service_stream_question(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+
+    async def stream_completion(messages, model, stream):
+        assert stream is True
+        return DummyStream(["Pergunta ", None, "de teste"])
+
+    monkeypatch.setattr(service.client.chat.completions, "create", stream_completion)
+
+    async def collect():
+        return [delta async for delta in service.stream_question("Teste")]
+
+    assert asyncio.run(collect()) == ["Pergunta ", "de teste"]
+
+
+def test_async_groq_service_stream_analysis_failure(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+
+    async def stream_completion(messages, model, stream):
+        raise Exception("Erro na API Groq")
+
+    monkeypatch.setattr(service.client.chat.completions, "create", stream_completion)
+
+    async def collect():
+        return [delta async for delta in service.stream_analysis("Pergunta", "Resposta")]
+
+    with pytest.raises(Exception) as excinfo:
+        asyncio.run(collect())
+    assert "Erro interno ao analisar a resposta." in str(excinfo.value)
+
+
+def test_iterate_bounded_yields_in_completion_order():
+    from services.concurrency import iterate_bounded
+
+    async def work(delay, value):
+        await asyncio.sleep(delay)
+        return value
+
+    async def collect():
+        factories = [lambda: work(0.03, "lento"), lambda: work(0.0, "rápido")]
+        return [value async for value in iterate_bounded(factories, limit=2)]
+
+    assert asyncio.run(collect()) == ["rápido", "lento"]
+
+
+# ===== Testes para services/assessment_cache.py =====
+
+def test_assessment_cache_requires_storage_methods():
+    from services.assessment_cache import AssessmentCache
+
+    class Incomplete(AssessmentCache):
+        async def _get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_make_cache_key_normalizes_text():
+    from services.assessment_cache import make_cache_key
+    key = make_cache_key("Qual a fórmula da água?", "H2O", "modelo", "1")
+    assert key == make_cache_key("  qual a fórmula   da água? ", "h2o ", "modelo", "1")
+    assert key != make_cache_key("Qual a fórmula da água?", "H2O", "modelo", "2")
+    assert key != make_cache_key("Qual a fórmula da água?", "CO2", "modelo", "1")
+
+
+def test_lru_assessment_cache_eviction_and_ttl(monkeypatch):
+    from models.assessment import Assessment
+    from services import assessment_cache
+    from services.assessment_cache import LRUAssessmentCache
+    now = {"value": 100.0}
+    monkeypatch.setattr(assessment_cache.time, "monotonic", lambda: now["value"])
+    cache = LRUAssessmentCache(max_size=2, ttl=10)
+    assessment = Assessment(score="80%", feedback="Bom trabalho.")
+
+    async def scenario():
+        await cache.set("a", assessment)
+        await cache.set("b", assessment)
+        assert await cache.get("a") == assessment
+        await cache.set("c", assessment)
+        assert await cache.get("b") is None
+        now["value"] += 11
+        assert await cache.get("a") is None
+
+    asyncio.run(scenario())
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_ratio": 1 / 3}
+    assert len(cache) == 1
+
+
+def test_sqlite_assessment_cache_shared_between_instances(tmp_path):
+    from models.assessment import Assessment
+    from services.assessment_cache import build_assessment_cache
+    path = str(tmp_path / "cache.db")
+    assessment = Assessment(score="80%", feedback="Bom trabalho.")
+
+    async def scenario():
+        first = build_assessment_cache(backend="sqlite", sqlite_path=path)
+        second = build_assessment_cache(backend="sqlite", sqlite_path=path)
+        await first.set("chave", assessment)
+        assert await second.get("chave") == assessment
+        assert await second.local.get("chave") == assessment
+        await first.close()
+        await second.close()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_assessment_cache_purges_expired_rows_and_caps_size(tmp_path, monkeypatch):
+    from models.assessment import Assessment
+    from services import assessment_cache
+    from services.assessment_cache import SQLiteAssessmentCache
+    now = [1000.0]
+    monkeypatch.setattr(assessment_cache.time, "time", lambda: now[0])
+    cache = SQLiteAssessmentCache(str(tmp_path / "cache.db"), ttl=100, max_size=3, purge_interval=60)
+    assessment = Assessment(score="80%", feedback="Bom trabalho.")
+
+    def keys():
+        return [row[0] for row in cache._connection.execute("SELECT key FROM assessments ORDER BY expires_at")]
+
+    async def scenario():
+        for key in ("a", "b"):
+            await cache.set(key, assessment)
+        # A limpeza só ocorre após o intervalo mínimo, removendo as avaliações expiradas
+        now[0] = 1101.0
+        await cache.set("c", assessment)
+        assert keys() == ["c"]
+        for key in ("d", "e", "f"):
+            now[0] += 1
+            await cache.set(key, assessment)
+        assert len(keys()) == 4
+        # Acima do tamanho máximo, as mais antigas são descartadas
+        now[0] = 1170.0
+        await cache.set("g", assessment)
+        assert keys() == ["e", "f", "g"]
+        await cache.close()
+
+    asyncio.run(scenario())
+
+
+def test_build_assessment_cache_invalid_backend():
+    from services.assessment_cache import build_assessment_cache
+    assert build_assessment_cache(backend="none") is None
+    with pytest.raises(ValueError):
+        build_assessment_cache(backend="desconhecido")
+
+
+def test_async_groq_service_analyze_response_uses_cache(monkeypatch):
+    from services.assessment_cache import LRUAssessmentCache
+    from services.groq_service import AsyncGroqService
+    cache = LRUAssessmentCache()
+    service = AsyncGroqService(api_key="dummy_key", assessment_cache=cache)
+    calls = []
+
+    async def analysis_completion(messages, model, **kwargs):
+        calls.append(messages)
+        return DummyCompletion('{"score": "80%", "feedback": "Bom trabalho."}')
+
+    monkeypatch.setattr(service.client.chat.completions, "create", analysis_completion)
+
+    async def scenario():
+        first = await service.analyze_response("Pergunta", "Resposta")
+        second = await service.analyze_response("pergunta ", "  RESPOSTA")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+
+
+# ===== Testes para services/question_pool.py =====
+
+class FakeQuestionService:
+    def __init__(self):
+        self.calls = []
+
+    async def create_questions_batch(self, theme, quantity):
+        self.calls.append((theme, quantity))
+        start = sum(n for _, n in self.calls[:-1])
+        return [f"Pergunta {start + i} sobre {theme}?" for i in range(quantity)]
+
+
+def test_question_pool_refills_to_high_watermark():
+    from services.question_pool import QuestionPool
+    service = FakeQuestionService()
+
+    async def scenario():
+        pool = QuestionPool(service, low_watermark=2, high_watermark=4, refill_interval=0.01,
+                            auto_register_after=1)
+        await pool.start()
+        assert pool.get("História") is None
+        for _ in range(100):
+            if pool.size("história") == 4:
+                break
+            await asyncio.sleep(0.01)
+        taken = pool.take("  HISTÓRIA ", 3)
+        for _ in range(100):
+            if pool.size("História") == 4:
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+        return pool, taken
+
+    pool, taken = asyncio.run(scenario())
+    assert taken == [f"Pergunta {i} sobre História?" for i in range(3)]
+    assert service.calls == [("História", 4), ("História", 3)]
+    assert pool.stats() == {"hits": 3, "misses": 1, "themes": 1, "questions": 4}
+
+
+def test_question_pool_refills_empty_queue_with_zero_low_watermark():
+    from services.question_pool import QuestionPool
+    service = FakeQuestionService()
+
+    async def scenario():
+        pool = QuestionPool(service, low_watermark=0, high_watermark=2, refill_interval=0.01)
+        pool.warm(["Física"])
+        await pool.start()
+        for _ in range(100):
+            if pool.size("Física") == 2:
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop()
+
+    asyncio.run(scenario())
+    assert service.calls == [("Física", 2)]
+
+
+def test_question_pool_evicts_least_recently_used_theme():
+    from services.question_pool import QuestionPool
+    pool = QuestionPool(FakeQuestionService(), max_themes=2, auto_register_after=1)
+    pool.warm(["Matemática", ""])
+    pool.get("História")
+    pool.get("Química")
+    assert pool.stats()["themes"] == 2
+    # Temas configurados não são descartados pelos registrados automaticamente
+    assert "matemática" in pool._queues and "história" not in pool._queues
+
+
+def test_question_pool_reserves_only_configured_or_frequent_themes():
+    from services.question_pool import QuestionPool
+    pool = QuestionPool(FakeQuestionService())
+    pool.warm(["Matemática"])
+    assert pool.take("Física", 3) == []
+    assert pool.stats() == {"hits": 0, "misses": 3, "themes": 1, "questions": 0}
+
+    pool = QuestionPool(FakeQuestionService(), auto_register_after=2)
+    pool.get("Física")
+    assert pool.stats()["themes"] == 0
+    pool.get("física ")
+    assert pool.stats()["themes"] == 1
+
+
+# ===== Testes para services/single_flight.py =====
+
+def test_single_flight_shares_result_and_exception():
+    from services.single_flight import SingleFlight
+    single_flight = SingleFlight()
+    calls = []
+
+    async def operation(value):
+        calls.append(value)
+        await asyncio.sleep(0.01)
+        if value == "falha":
+            raise RuntimeError("erro compartilhado")
+        return value
+
+    async def scenario():
+        results = await asyncio.gather(*(single_flight.do("a", lambda: operation("ok")) for _ in range(5)))
+        errors = await asyncio.gather(*(single_flight.do("b", lambda: operation("falha")) for _ in range(3)),
+                                      return_exceptions=True)
+        return results, errors
+
+    results, errors = asyncio.run(scenario())
+    assert results == ["ok"] * 5
+    assert all(isinstance(error, RuntimeError) for error in errors)
+    assert calls == ["ok", "falha"]
+    assert single_flight.stats() == {"executions": 2, "shared": 6, "in_flight": 0}
+
+
+def test_single_flight_waiter_cancellation_keeps_shared_call():
+    from services.single_flight import SingleFlight
+    single_flight = SingleFlight()
+
+    async def operation():
+        await asyncio.sleep(0.02)
+        return "resultado"
+
+    async def scenario():
+        first = asyncio.ensure_future(single_flight.do("chave", operation))
+        second = asyncio.ensure_future(single_flight.do("chave", operation))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "resultado"
+
+
+def test_async_groq_service_coalesces_concurrent_analyses(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+    calls = []
+
+    async def analysis_completion(messages, model, **kwargs):
+        calls.append(messages)
+        await asyncio.sleep(0.01)
+        return DummyCompletion('{"score": "80%", "feedback": "Bom trabalho."}')
+
+    monkeypatch.setattr(service.client.chat.completions, "create", analysis_completion)
+
+    async def scenario():
+        return await asyncio.gather(*(service.analyze_response("Pergunta", "Resposta") for _ in range(20)))
+
+    assessments = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(assessment.score == "80%" for assessment in assessments)
+
+
+def test_async_groq_service_shared_question_not_used_by_fan_out(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+    calls = []
+
+    async def question_completion(messages, model):
+        calls.append(messages)
+        number = len(calls)
+        await asyncio.sleep(0.01)
+        return DummyCompletion(f"Pergunta {number}")
+
+    monkeypatch.setattr(service.client.chat.completions, "create", question_completion)
+
+    async def scenario():
+        shared = await asyncio.gather(*(service.create_shared_question("Teste") for _ in range(10)))
+        distinct = await service.create_questions("Teste", 3)
+        return shared, distinct
+
+    shared, distinct = asyncio.run(scenario())
+    assert shared == ["Pergunta 1"] * 10
+    assert len(set(distinct)) == 3
+
+
+def test_async_groq_service_coalesces_only_same_tenant_and_provider():
+    from services.exceptions import QuotaExceededError
+    from services.fair_scheduler import TenantBudgets, tenant_scope
+    from services.groq_service import AsyncGroqService
+    from services.llm_providers import StubProvider
+    service = AsyncGroqService(api_key="dummy_key", providers={"stub": StubProvider(latency=0.01),
+                                                               "outro": StubProvider(latency=0.01)},
+                               default_provider="stub", tenant_budgets=TenantBudgets(tokens_per_minute=1000))
+    service.tenant_budgets.charge("sem-cota", 2000)
+
+    async def ask(tenant, provider=None):
+        with tenant_scope(tenant):
+            return await service.create_shared_question("Física", provider)
+
+    async def scenario():
+        return await asyncio.gather(ask("sem-cota"), ask("u1"), ask("u1"), ask("u1", "outro"),
+                                    return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    # O erro de cota de um usuário não é repassado aos demais
+    assert isinstance(results[0], QuotaExceededError)
+    assert all(isinstance(result, str) for result in results[1:])
+    assert service.single_flight.stats()["executions"] == 3
+    assert service.single_flight.stats()["shared"] == 1
+
+
+# ===== Testes para services/rate_limiter.py =====
+
+class DummyRateLimitError(Exception):
+    status_code = 429
+
+
+def test_token_bucket_paces_and_honors_deadline():
+    from services.exceptions import UpstreamUnavailableError
+    from services.rate_limiter import TokenBucket
+
+    async def scenario():
+        bucket = TokenBucket(rate_per_minute=600, capacity=2)  # 10 fichas por segundo
+        start = time.monotonic()
+        for _ in range(3):
+            await bucket.acquire(1, deadline=start + 5)
+        elapsed = time.monotonic() - start
+        with pytest.raises(UpstreamUnavailableError) as excinfo:
+            await bucket.acquire(2, deadline=time.monotonic() + 0.01)
+        return elapsed, excinfo.value.retry_after
+
+    elapsed, retry_after = asyncio.run(scenario())
+    assert 0.08 <= elapsed < 1
+    assert retry_after > 0
+
+
+def test_adaptive_concurrency_aimd():
+    from services.rate_limiter import AdaptiveConcurrencyLimiter
+
+    async def scenario():
+        limiter = AdaptiveConcurrencyLimiter(initial=4, minimum=1, maximum=5, latency_threshold=1.0)
+        deadline = time.monotonic() + 1
+        for _ in range(4):
+            await limiter.acquire(deadline)
+            await limiter.release(latency=0.1, overloaded=False)
+        increased = limiter.limit
+        await limiter.acquire(deadline)
+        await limiter.release(latency=None, overloaded=True)
+        after_throttle = limiter.limit
+        await limiter.acquire(deadline)
+        await limiter.release(latency=5.0, overloaded=False)
+        return increased, after_throttle, limiter.limit
+
+    increased, after_throttle, after_spike = asyncio.run(scenario())
+    assert 4 < increased <= 5
+    assert after_throttle == increased / 2
+    assert after_spike == after_throttle / 2
+
+
+def test_rate_governor_queues_until_deadline():
+    from services.exceptions import UpstreamUnavailableError
+    from services.rate_limiter import RateGovernor
+    governor = RateGovernor(initial_concurrency=1, max_concurrency=1, queue_timeout=0.05)
+
+    async def hold(delay):
+        async with governor.slot(10):
+            await asyncio.sleep(delay)
+
+    async def scenario():
+        return await asyncio.gather(hold(0.2), hold(0), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert results[0] is None
+    assert isinstance(results[1], UpstreamUnavailableError)
+    assert governor.stats()["rejected"] == 1
+
+
+def test_async_groq_service_governor_backs_off_on_429(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    from services.rate_limiter import RateGovernor
+    governor = RateGovernor(tokens_per_minute=100000, initial_concurrency=8)
+    service = AsyncGroqService(api_key="dummy_key", rate_governor=governor)
+
+    async def throttled_completion(messages, model):
+        raise DummyRateLimitError("Too Many Requests")
+
+    monkeypatch.setattr(service.client.chat.completions, "create", throttled_completion)
+    with pytest.raises(Exception) as excinfo:
+        asyncio.run(service.create_question("Teste"))
+    assert "Erro interno ao gerar a pergunta." in str(excinfo.value)
+    assert governor.stats()["throttled"] == 1
+    assert governor.concurrency.limit == 4
+
+
+# ===== Testes para services/resilience.py =====
+
+class DummyStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = type("DummyResponse", (), {"headers": headers or {}})
+
+
+def test_is_retryable_classification():
+    from services.resilience import is_retryable
+    assert is_retryable(asyncio.TimeoutError())
+    assert is_retryable(DummyStatusError(429))
+    assert is_retryable(DummyStatusError(503))
+    assert not is_retryable(DummyStatusError(400))
+    assert not is_retryable(ValueError("Resposta em formato inválido."))
+
+
+def test_retry_after_from_headers():
+    from services.resilience import retry_after_from
+    assert retry_after_from(DummyStatusError(429, {"retry-after": "2"})) == 2.0
+    assert retry_after_from(DummyStatusError(429, {"retry-after-ms": "150"})) == 0.15
+    assert retry_after_from(DummyStatusError(429)) is None
+
+
+def test_retry_policy_retries_transient_errors():
+    from services.resilience import RetryPolicy
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise DummyStatusError(503)
+        return "ok"
+
+    assert asyncio.run(policy.call(flaky)) == "ok"
+    assert policy.stats()["retries"] == 2
+
+
+def test_retry_policy_does_not_retry_validation_errors():
+    from services.resilience import RetryPolicy
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001)
+    attempts = []
+
+    async def invalid():
+        attempts.append(1)
+        raise DummyStatusError(422)
+
+    with pytest.raises(DummyStatusError):
+        asyncio.run(policy.call(invalid))
+    assert len(attempts) == 1
+
+
+def test_retry_policy_honors_budget_and_timeout():
+    from services.resilience import RetryBudget, RetryPolicy
+    policy = RetryPolicy(max_attempts=5, base_delay=0.001, timeout=0.01,
+                         budget=RetryBudget(ratio=0, max_tokens=1))
+    attempts = []
+
+    async def slow():
+        attempts.append(1)
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(policy.call(slow))
+    assert len(attempts) == 2
+    assert policy.stats()["budget_exhausted"] == 1
+
+
+def test_retry_policy_honors_retry_after_beyond_max_delay():
+    from services.resilience import RetryPolicy
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=1)
+    attempts = []
+
+    async def throttled():
+        attempts.append(1)
+        raise DummyStatusError(429, {"retry-after": "30"})
+
+    # Repetir antes dos 30 s pedidos pelo servidor apenas gastaria tentativas
+    with pytest.raises(DummyStatusError):
+        asyncio.run(policy.call(throttled))
+    assert len(attempts) == 1
+    assert policy.stats()["retries"] == 0
+
+
+def test_async_groq_service_reports_upstream_retry_after(monkeypatch):
+    from services.exceptions import UpstreamUnavailableError
+    from services.groq_service import AsyncGroqService
+    from services.resilience import RetryPolicy
+    service = AsyncGroqService(api_key="dummy_key", retry_policy=RetryPolicy(base_delay=0.001))
+
+    async def throttled(messages, model):
+        raise DummyStatusError(429, {"retry-after": "30"})
+
+    monkeypatch.setattr(service.client.chat.completions, "create", throttled)
+    with pytest.raises(UpstreamUnavailableError) as excinfo:
+        asyncio.run(service.create_question("Teste"))
+    assert excinfo.value.retry_after == 30
+
+
+def test_retry_policy_hedges_slow_attempts():
+    from services.resilience import RetryPolicy
+    policy = RetryPolicy(hedging=True, hedge_min_delay=0.01, hedge_min_samples=1)
+    policy.latencies.record(0.01)
+    calls = []
+
+    async def first_slow():
+        calls.append(1)
+        await asyncio.sleep(1 if len(calls) == 1 else 0)
+        return len(calls)
+
+    started = time.monotonic()
+    assert asyncio.run(policy.call(first_slow)) == 2
+    assert time.monotonic() - started < 0.5
+    assert policy.stats()["hedges"] == 1
+    assert policy.stats()["hedge_wins"] == 1
+
+
+def test_async_groq_service_retries_rate_limited_calls(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    from services.resilience import RetryPolicy
+    service = AsyncGroqService(api_key="dummy_key", retry_policy=RetryPolicy(base_delay=0.001))
+    assert service.client.max_retries == 0
+    attempts = []
+
+    async def throttled_once(messages, model):
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise DummyStatusError(429, {"retry-after": "0"})
+        return DummyCompletion("Pergunta de teste")
+
+    monkeypatch.setattr(service.client.chat.completions, "create", throttled_once)
+    assert asyncio.run(service.create_question("Teste")) == "Pergunta de teste"
+    assert len(attempts) == 2
+
+
+def test_async_groq_service_timeout_excludes_admission_queue():
+    from services.circuit_breaker import CircuitBreaker
+    from services.groq_service import AsyncGroqService
+    from services.llm_providers import StubProvider
+    from services.rate_limiter import RateGovernor
+    from services.resilience import RetryPolicy
+    policy = RetryPolicy(max_attempts=1, timeout=0.1)
+    breaker = CircuitBreaker(failure_threshold=1)
+    service = AsyncGroqService(api_key="dummy_key", providers={"stub": StubProvider(latency=0.05)},
+                               default_provider="stub", retry_policy=policy, circuit_breaker=breaker,
+                               rate_governor=RateGovernor(initial_concurrency=1, max_concurrency=1))
+
+    async def scenario():
+        calls = asyncio.gather(*(service.create_question(f"Tema {i}") for i in range(10)))
+        return await asyncio.wait_for(calls, 5)
+
+    # Com a fila saturada, as chamadas esperam ~0,5 s, mas cada chamada ao modelo leva 0,05 s
+    assert len(asyncio.run(scenario())) == 10
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert len(policy.latencies) == 10 and policy.latencies.percentile(1.0) < 0.1
+
+
+# ===== Testes para services/circuit_breaker.py =====
+
+def test_circuit_breaker_opens_and_probes_with_single_trial(monkeypatch):
+    from services import circuit_breaker
+    from services.circuit_breaker import CircuitBreaker
+    from services.exceptions import UpstreamUnavailableError
+    now = [100.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10)
+
+    async def call(error=None, gate=None):
+        async with breaker.guard():
+            if gate is not None:
+                await gate.wait()
+            if error is not None:
+                raise error
+
+    async def scenario():
+        # Erros 4xx não contam como indisponibilidade
+        with pytest.raises(DummyStatusError):
+            await call(DummyStatusError(400))
+        for _ in range(2):
+            with pytest.raises(DummyStatusError):
+                await call(DummyStatusError(503))
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(UpstreamUnavailableError) as excinfo:
+            await call()
+        assert excinfo.value.retry_after == 10
+
+        # Passado o tempo de recuperação, apenas uma chamada de teste é liberada
+        now[0] += 10
+        gate = asyncio.Event()
+        trial = asyncio.create_task(call(gate=gate))
+        await asyncio.sleep(0)
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        with pytest.raises(UpstreamUnavailableError):
+            await call()
+        gate.set()
+        await trial
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    asyncio.run(scenario())
+    assert breaker.stats() == {"state": "closed", "failures": 0, "opened": 1, "rejected": 2}
+
+
+def test_circuit_breaker_reopens_when_trial_fails(monkeypatch):
+    from services import circuit_breaker
+    from services.circuit_breaker import CircuitBreaker
+    now = [0.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=5)
+
+    async def failing():
+        async with breaker.guard():
+            raise asyncio.TimeoutError()
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(failing())
+    now[0] += 5
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(failing())
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.stats()["opened"] == 2
+
+
+def test_circuit_breaker_ignores_admission_rejections_and_late_failures(monkeypatch):
+    from services import circuit_breaker
+    from services.circuit_breaker import CircuitBreaker
+    from services.exceptions import QuotaExceededError, UpstreamUnavailableError
+    now = [0.0]
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", lambda: now[0])
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=10)
+
+    # Recusas locais (fila saturada ou cota do usuário) não indicam indisponibilidade do serviço
+    breaker.record_failure(UpstreamUnavailableError("Serviço de IA sobrecarregado."))
+    breaker.record_failure(QuotaExceededError("Cota de tokens do usuário esgotada."))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure(DummyStatusError(503))
+    now[0] += 5
+    # Falhas de chamadas em andamento não reiniciam o tempo de recuperação
+    breaker.record_failure(asyncio.TimeoutError())
+    assert breaker.stats()["opened"] == 1
+    assert breaker._retry_after() == 5
+
+
+def test_async_groq_service_fails_fast_while_breaker_open(monkeypatch):
+    from services.circuit_breaker import CircuitBreaker
+    from services.exceptions import UpstreamUnavailableError
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key",
+                               circuit_breaker=CircuitBreaker(failure_threshold=1, recovery_timeout=30))
+    calls = []
+
+    async def unavailable(messages, model):
+        calls.append(1)
+        raise DummyStatusError(502)
+
+    monkeypatch.setattr(service.client.chat.completions, "create", unavailable)
+    with pytest.raises(Exception, match="Erro interno ao gerar a pergunta."):
+        asyncio.run(service.create_question("Teste"))
+    with pytest.raises(UpstreamUnavailableError):
+        asyncio.run(service.create_question("Teste"))
+    assert len(calls) == 1
+
+
+# ===== Testes para services/llm_providers.py =====
+
+def test_llm_provider_requires_complete_and_stream():
+    from services.llm_providers import LLMProvider
+
+    class Incomplete(LLMProvider):
+        async def complete(self, prompt, model=None, **options):
+            return None
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_stub_provider_is_deterministic_and_simulates_errors():
+    from services.exceptions import LLMProviderError
+    from services.groq_service import _build_analysis_prompt, _build_question_batch_prompt, parse_assessment
+    from services.llm_providers import StubProvider
+    provider = StubProvider()
+    first = asyncio.run(provider.complete("prompt")).content
+    assert first == asyncio.run(provider.complete("prompt")).content
+    assert first != asyncio.run(provider.complete("outro prompt")).content
+
+    batch = asyncio.run(provider.complete(_build_question_batch_prompt("Física", 3),
+                                          response_format={"type": "json_object"}))
+    assert len(json.loads(batch.content)["questions"]) == 3
+    analysis = asyncio.run(provider.complete(_build_analysis_prompt("Pergunta?", "Resposta"))).content
+    assert parse_assessment(analysis).score.endswith("%")
+
+    failing = StubProvider(error_rate=1.0, error_status=502)
+    with pytest.raises(LLMProviderError) as excinfo:
+        asyncio.run(failing.complete("prompt"))
+    assert excinfo.value.status_code == 502
+
+
+def test_openai_compatible_provider_complete_and_stream():
+    import httpx
+    from services.llm_providers import OpenAICompatibleProvider
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        body = json.loads(request.content)
+        if body.get("stream"):
+            chunks = [{"choices": [{"delta": {"content": part}}]} for part in ("Olá", " mundo")]
+            text = "".join(f"data: {json.dumps(chunk)}\n\n" for chunk in chunks) + "data: [DONE]\n\n"
+            return httpx.Response(200, text=text)
+        return httpx.Response(200, json={"choices": [{"message": {"content": "Pergunta?"}}],
+                                         "usage": {"total_tokens": 42}})
+
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    provider = OpenAICompatibleProvider("http://llm.local/v1/", "modelo-x", api_key="k", http_client=http_client)
+
+    async def scenario():
+        response = await provider.complete("prompt")
+        parts = [delta async for delta in provider.stream("prompt")]
+        return response, parts
+
+    response, parts = asyncio.run(scenario())
+    assert (response.content, response.total_tokens) == ("Pergunta?", 42)
+    assert parts == ["Olá", " mundo"]
+    assert str(requests[0].url) == "http://llm.local/v1/chat/completions"
+    assert requests[0].headers["Authorization"] == "Bearer k"
+    assert json.loads(requests[0].content)["model"] == "modelo-x"
+
+
+def test_async_groq_service_selects_provider_per_call(monkeypatch):
+    from services.assessment_cache import LRUAssessmentCache
+    from services.groq_service import AsyncGroqService
+    from services.llm_providers import StubProvider
+    stub = StubProvider()
+    service = AsyncGroqService(api_key="dummy_key", providers={"stub": stub},
+                               assessment_cache=LRUAssessmentCache())
+    contents = ["Pergunta de teste", '{"score": "100%", "feedback": "Groq"}']
+
+    async def fake_create(messages, model, **kwargs):
+        return DummyCompletion(contents.pop(0))
+
+    monkeypatch.setattr(service.client.chat.completions, "create", fake_create)
+    assert asyncio.run(service.create_question("Teste")) == "Pergunta de teste"
+    assert asyncio.run(service.create_question("Teste", provider="stub")).startswith("Pergunta simulada")
+    # Avaliações de provedores distintos não compartilham o cache
+    stub_assessment = asyncio.run(service.analyze_response("Pergunta?", "Resposta", provider="stub"))
+    assert asyncio.run(service.analyze_response("Pergunta?", "Resposta")).feedback == "Groq"
+    assert asyncio.run(service.analyze_response("Pergunta?", "Resposta", provider="stub")) == stub_assessment
+    assert stub.calls == 2
+
+    with pytest.raises(ValueError, match="Provedor de LLM desconhecido"):
+        AsyncGroqService(api_key="dummy_key", default_provider="inexistente")
+
+
+# ===== Testes para services/model_router.py =====
+
+def test_parse_model_routes_and_select():
+    from services.model_router import ModelRouter, parse_model_prices, parse_model_routes
+    rules = parse_model_routes("question:small, analysis<=100:small ,*:large")
+    router = ModelRouter(rules)
+    assert router.select("groq", "question", 5000) == "small"
+    assert router.select("groq", "analysis", 100) == "small"
+    assert router.select("groq", "analysis", 101) == "large"
+    assert router.select("stub", "question", 10) is None
+    assert parse_model_prices("a:0.5,b:1") == {"a": 0.5, "b": 1.0}
+    for invalid in ("question", "analysis<=x:small", "tarefa:small"):
+        with pytest.raises(ValueError):
+            parse_model_routes(invalid)
+
+
+def test_async_groq_service_routes_models_and_records_metrics(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    from services.model_router import ModelRouter, parse_model_routes
+
+    class DummyUsageCompletion(DummyCompletion):
+        def __init__(self, content):
+            super().__init__(content)
+            self.usage = type("DummyUsage", (), {"total_tokens": 1000})
+
+    router = ModelRouter(parse_model_routes("question:small,analysis<=400:small"),
+                         prices={"small": 1.0, "large": 10.0})
+    service = AsyncGroqService(api_key="dummy_key", model="large", model_router=router)
+    models = []
+
+    async def fake_create(messages, model, **kwargs):
+        models.append(model)
+        if "Analise" in messages[0]["content"]:
+            return DummyUsageCompletion('{"score": "80%", "feedback": "Bom."}')
+        return DummyUsageCompletion("Pergunta?")
+
+    monkeypatch.setattr(service.client.chat.completions, "create", fake_create)
+    asyncio.run(service.create_question("Teste"))
+    asyncio.run(service.analyze_response("Pergunta?", "Curta"))
+    asyncio.run(service.analyze_response("Pergunta?", "Resposta longa " * 200))
+    assert models == ["small", "small", "large"]
+
+    stats = router.stats()
+    assert stats["small"]["calls"] == 2 and stats["small"]["cost"] == 0.002
+    assert stats["large"]["tokens"] == 1000 and stats["large"]["cost"] == 0.01
+    assert stats["large"]["p50_latency"] is not None
+
+
+# ===== Testes para services/structured_output.py =====
+
+def test_extract_json_tolerates_fences_and_prose():
+    from services.structured_output import extract_json
+    expected = {"score": "80%", "feedback": "Bom."}
+    assert extract_json('{"score": "80%", "feedback": "Bom."}') == expected
+    assert extract_json('Segue:\n```json\n{"score": "80%", "feedback": "Bom."}\n```') == expected
+    assert extract_json('Análise {incompleta} -> {"score": "80%", "feedback": "Bom."} Fim.') == expected
+    with pytest.raises(ValueError):
+        extract_json("texto não-json")
+
+
+def test_parse_assessment_normalizes_score():
+    from services.groq_service import parse_assessment
+    assert parse_assessment('{"score": "8/10", "feedback": "Bom."}').score == "80%"
+    assessment = parse_assessment('Resultado: {"score": 72.5, "feedback": "Quase."}')
+    assert (assessment.score, assessment.score_value) == ("72.5%", 72.5)
+    for invalid in ('{"score": "excelente", "feedback": "Bom."}', '{"score": "150%", "feedback": "Bom."}',
+                    '{"feedback": "Sem score."}', '["80%"]'):
+        with pytest.raises(ValueError, match="Resposta em formato inválido."):
+            parse_assessment(invalid)
+
+
+def test_async_groq_service_repairs_invalid_analysis_once(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key")
+    calls = []
+
+    async def fake_create(messages, model, **kwargs):
+        calls.append((messages[0]["content"], kwargs))
+        if len(calls) == 1:
+            return DummyCompletion("A resposta merece nota 8 de 10. Bom trabalho.")
+        return DummyCompletion('{"score": "8 de 10", "feedback": "Bom trabalho."}')
+
+    monkeypatch.setattr(service.client.chat.completions, "create", fake_create)
+    assessment = asyncio.run(service.analyze_response("Pergunta?", "Resposta"))
+    assert (assessment.score, assessment.score_value) == ("80%", 80.0)
+    assert all(options == {"response_format": {"type": "json_object"}} for _, options in calls)
+    assert "nota 8 de 10" in calls[1][0]
+    assert service.analysis_repairs == 1
+
+    async def always_invalid(messages, model, **kwargs):
+        calls.append(messages)
+        return DummyCompletion("sem JSON")
+
+    calls.clear()
+    monkeypatch.setattr(service.client.chat.completions, "create", always_invalid)
+    with pytest.raises(ValueError, match="Resposta em formato inválido."):
+        asyncio.run(service.analyze_response("Outra pergunta?", "Resposta"))
+    assert len(calls) == 2
+
+
+# ===== Testes para a correção em lote do AsyncGroqService =====
+
+def test_async_groq_service_analyze_responses_bounded_and_in_order(monkeypatch):
+    from models import Assessment
+    from services.groq_service import AsyncGroqService
+    service = AsyncGroqService(api_key="dummy_key", bulk_concurrency=2)
+    active = []
+    peak = []
+
+    async def fake_analyze(question, answer, provider=None):
+        active.append(1)
+        peak.append(len(active))
+        await asyncio.sleep(0.01 if answer == "lenta" else 0)
+        active.pop()
+        if answer == "inválida":
+            raise ValueError("Resposta em formato inválido.")
+        return Assessment(score="70%", feedback=answer)
+
+    monkeypatch.setattr(service, "analyze_response", fake_analyze)
+    pairs = [("P1", "lenta"), ("P2", "rápida"), ("P3", "inválida"), ("p1", " LENTA"), ("P4", "rápida")]
+    results = asyncio.run(service.analyze_responses(pairs))
+    assert [getattr(result, "feedback", None) for result in results] == ["lenta", "rápida", None, "lenta", "rápida"]
+    assert isinstance(results[2], ValueError)
+    assert max(peak) <= 2 and len(peak) == 4
+
+    async def collect():
+        return [index async for index, _ in service.iter_analyses(pairs)]
+
+    assert asyncio.run(collect()) == [0, 1, 2, 3, 4]
+
+
+# ===== Testes para services/job_queue.py =====
+
+def test_sqlite_job_store_claims_each_job_once_and_recovers(tmp_path):
+    from models import Job
+    from services.job_queue import SQLiteJobStore
+
+    async def scenario():
+        first = SQLiteJobStore(str(tmp_path / "jobs.db"))
+        second = SQLiteJobStore(str(tmp_path / "jobs.db"))
+        await first.add(Job(id="a", kind="k", owner="u", created_at=1.0), {"n": 1})
+        await first.add(Job(id="b", kind="k", owner="u", created_at=2.0), {"n": 2})
+
+        job, payload = await second.claim()
+        assert (job.id, job.status, payload) == ("a", "running", {"n": 1})
+        job_b, _ = await first.claim()
+        assert job_b.id == "b"
+        assert await first.claim() is None
+
+        # A tarefa abandonada volta à fila e a concluída guarda o resultado
+        assert await first.recover(started_before=time.time() + 1) == 2
+        job, payload = await first.claim()
+        job.status, job.result, job.finished_at = "succeeded", [{"question": "Q?"}], 10.0
+        await first.save(job)
+        stored = await second.get("a")
+        assert stored.done and stored.result == [{"question": "Q?"}]
+        assert await first.purge(finished_before=11.0) == 1
+        assert await second.get("a") is None
+        await first.close()
+        await second.close()
+
+    asyncio.run(scenario())
+
+
+def test_sqlite_job_store_claim_rolls_back_on_error(tmp_path):
+    import sqlite3
+    from models import Job
+    from services.job_queue import SQLiteJobStore
+
+    async def scenario():
+        store = SQLiteJobStore(str(tmp_path / "jobs.db"))
+        await store.add(Job(id="a", kind="k", owner="u", created_at=1.0), {"n": 1})
+        store._connection.execute(
+            "CREATE TRIGGER falha AFTER UPDATE ON jobs BEGIN SELECT RAISE(FAIL, 'falha'); END"
+        )
+        with pytest.raises(sqlite3.DatabaseError):
+            await store.claim()
+        assert not store._connection.in_transaction
+        assert (await store.get("a")).status == "queued"
+
+        store._connection.execute("DROP TRIGGER falha")
+        job, _ = await store.claim()
+        assert job.id == "a"
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_job_queue_runs_jobs_and_reports_failures():
+    from services.exceptions import UpstreamUnavailableError
+    from services.job_queue import JobQueue, MemoryJobStore
+
+    async def double(payload):
+        await asyncio.sleep(0)
+        return payload["n"] * 2
+
+    async def unavailable(payload):
+        raise UpstreamUnavailableError(retry_after=1)
+
+    async def scenario():
+        queue = JobQueue(MemoryJobStore(), {"double": double, "unavailable": unavailable},
+                         workers=2, poll_interval=0.05)
+        with pytest.raises(ValueError):
+            await queue.submit("desconhecida", {})
+        await queue.start()
+        ok = await queue.submit("double", {"n": 21}, owner="u")
+        failed = await queue.submit("unavailable", {}, owner="u")
+        assert ok.status == "queued"
+        done = await queue.wait(ok.id, timeout=2)
+        assert (done.status, done.result, done.owner) == ("succeeded", 42, "u")
+        done = await queue.wait(failed.id, timeout=2)
+        assert (done.status, done.error) == ("failed", "Serviço de IA temporariamente indisponível.")
+        assert queue.stats() == {"workers": 2, "succeeded": 1, "failed": 1}
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_job_queue_wait_releases_event_of_job_finished_elsewhere():
+    from services.job_queue import JobQueue, MemoryJobStore
+
+    async def scenario():
+        # Sem workers neste processo: a tarefa seria executada por outro processo
+        queue = JobQueue(MemoryJobStore(), {"double": None}, workers=0, poll_interval=0.01)
+        job = await queue.submit("double", {"n": 1})
+        waits = [queue.wait(job.id, timeout=0.05), queue.wait(job.id, timeout=0.02)]
+        assert [waited.status for waited in await asyncio.gather(*waits)] == ["queued", "queued"]
+        assert queue._finished == {} and queue._waiters == {}
+
+        await queue.store.save(job.model_copy(update={"status": "succeeded", "result": 2, "finished_at": 1.0}))
+        assert (await queue.wait(job.id, timeout=1)).result == 2
+        assert queue._finished == {}
+
+    asyncio.run(scenario())
+
+
+def test_job_queue_worker_survives_store_errors():
+    import sqlite3
+    from services.job_queue import JobQueue, MemoryJobStore
+
+    class LockedStore(MemoryJobStore):
+        async def save(self, job):
+            if job.result == "falha":
+                raise sqlite3.OperationalError("database is locked")
+            await super().save(job)
+
+    async def echo(payload):
+        return payload["value"]
+
+    async def scenario():
+        queue = JobQueue(LockedStore(), {"echo": echo}, workers=1, poll_interval=1)
+        await queue.start()
+        failed = await queue.submit("echo", {"value": "falha"})
+        started = time.monotonic()
+        # Quem aguarda é acordado mesmo sem o registro do resultado
+        assert (await queue.wait(failed.id, timeout=5)).status == "running"
+        assert time.monotonic() - started < 2
+        ok = await queue.submit("echo", {"value": "ok"})
+        assert (await queue.wait(ok.id, timeout=5)).result == "ok"
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+def test_job_handlers_generate_and_grade():
+    from services.groq_service import AsyncGroqService
+    from services.job_handlers import build_job_handlers
+    from services.llm_providers import StubProvider
+    service = AsyncGroqService(api_key="dummy_key", providers={"stub": StubProvider()}, default_provider="stub")
+    handlers = build_job_handlers(service)
+
+    questions = asyncio.run(handlers["generate_questions"]({"theme": "Física", "quantity": 3, "batched": True}))
+    assert len(questions) == 3 and all(item["question"] for item in questions)
+    results = asyncio.run(handlers["analyze_responses"]({"items": [{"question": "Q?", "answer": "R"}]}))
+    assert results[0]["index"] == 0 and results[0]["error"] is None
+    assert results[0]["assessment"]["score"].endswith("%")
+
+
+def test_job_queue_stop_drains_running_jobs():
+    from services.job_queue import JobQueue, MemoryJobStore
+
+    async def slow(payload):
+        await asyncio.sleep(0.05)
+        return "ok"
+
+    async def scenario():
+        queue = JobQueue(MemoryJobStore(), {"slow": slow}, workers=1, poll_interval=0.05)
+        await queue.start()
+        job = await queue.submit("slow", {})
+        await asyncio.sleep(0.01)
+        store = queue.store
+        await queue.stop(drain_timeout=1)
+        assert (await store.get(job.id)).status == "succeeded"
+
+    asyncio.run(scenario())
+
+
+# ===== Testes para services/metrics.py =====
+
+def test_metrics_registry_renders_prometheus_text():
+    from services.metrics import CollectedMetric, MetricsRegistry, cache_metrics
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requisições.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latência.", buckets=(0.1, 1.0))
+    requests.labels("/a").inc()
+    requests.labels(route="/a").inc(2)
+    for value in (0.05, 0.5, 5.0):
+        latency.observe(value)
+    assert registry.counter("requests_total", "Requisições.", ("route",)) is requests
+    with pytest.raises(ValueError):
+        registry.gauge("requests_total", "Outra definição.")
+    with pytest.raises(ValueError):
+        requests.labels("/a", "extra")
+
+    text = registry.render(cache_metrics({"token": {"hits": 3, "misses": 1}, "assessment": None}))
+    assert '# TYPE requests_total counter\nrequests_total{route="/a"} 3\n' in text
+    assert 'latency_seconds_bucket{le="0.1"} 1\n' in text
+    assert 'latency_seconds_bucket{le="1"} 2\n' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "latency_seconds_count 3\n" in text
+    assert 'cache_hit_ratio{cache="token"} 0.75\n' in text
+    assert "assessment" not in text
+    assert 'x{v="a\\"b"} 1' in registry.render([CollectedMetric("x", "X.", "gauge", [({"v": 'a"b'}, 1)])])
+
+
+def test_async_groq_service_records_upstream_metrics():
+    from services import metrics
+    from services.groq_service import AsyncGroqService
+    from services.llm_providers import StubProvider
+    service = AsyncGroqService(api_key="dummy_key", providers={"stub": StubProvider(model="stub-m")},
+                               default_provider="stub")
+    successes = metrics.LLM_REQUESTS.labels("stub", "stub-m", "success")
+    before = successes.value
+    asyncio.run(service.create_question("Física"))
+    assert successes.value == before + 1
+    assert metrics.LLM_TOKENS.labels("stub", "stub-m").value > 0
+    assert metrics.LLM_REQUEST_DURATION.labels("stub", "stub-m").count >= 1
+
+
+# ===== Testes para benchmarks/load_test.py =====
+
+def test_load_test_summary_and_baseline_comparison():
+    from benchmarks.load_test import compare, percentile, summarize
+    assert percentile([0.3, 0.1, 0.2, 0.4], 0.5) == 0.2
+    assert percentile([], 0.99) == 0.0
+
+    summary = summarize([0.01 * value for value in range(1, 101)], errors=25, elapsed=5.0)
+    assert summary["requests"] == 125 and summary["rps"] == 25.0 and summary["error_rate"] == 0.2
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == (500.0, 950.0, 990.0)
+
+    baseline = {"scenarios": {"generate_question": {"p95_ms": 100, "p99_ms": 150, "rps": 200, "error_rate": 0.0}}}
+    current = {"scenarios": {"generate_question": {"p95_ms": 110, "p99_ms": 200, "rps": 150, "error_rate": 0.05},
+                             "auth_token": {"p95_ms": 5, "p99_ms": 6, "rps": 900, "error_rate": 0.0}}}
+    assert compare(current, baseline, tolerance=0.15) == [
+        "generate_question: p99_ms 150 -> 200",
+        "generate_question: rps 200 -> 150",
+        "generate_question: error_rate 0.0 -> 0.05",
+    ]
+    assert compare(baseline, baseline) == []
+
+
+def test_stub_provider_latency_distributions():
+    from services.llm_providers import StubProvider
+    for distribution in ("uniform", "lognormal", "exponential"):
+        provider = StubProvider(latency=0.1, latency_jitter=0.5, latency_distribution=distribution, seed=1)
+        delays = [provider._delay() for _ in range(200)]
+        assert all(delay >= 0 for delay in delays)
+        assert 0.03 < sorted(delays)[100] < 0.3
+    with pytest.raises(ValueError):
+        StubProvider(latency_distribution="normal")
+
+
+# ===== Testes para services/tracing.py =====
+
+def test_tracer_nests_spans_and_exports_json_lines(tmp_path):
+    from services.tracing import NOOP_SPAN, Tracer, build_span_exporter
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(build_span_exporter("file", str(path)))
+
+    async def scenario():
+        with tracer.span("raiz") as root:
+            # O span atual é herdado pelas tarefas criadas dentro dele
+            await asyncio.gather(*(asyncio.create_task(child(index)) for index in range(2)))
+        return root
+
+    async def child(index):
+        with tracer.span("filho", indice=index):
+            await asyncio.sleep(0)
+
+    root = asyncio.run(scenario())
+    with pytest.raises(RuntimeError):
+        with tracer.span("falha"):
+            raise RuntimeError("erro")
+    tracer.close()
+
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert [line["name"] for line in lines] == ["filho", "filho", "raiz", "falha"]
+    assert all(line["parent_id"] == f"0x{root.span_id}" for line in lines[:2])
+    assert lines[3]["status"]["status_code"] == "ERROR"
+    assert lines[3]["attributes"]["exception.type"] == "RuntimeError"
+
+    assert Tracer().start_span("desabilitado") is NOOP_SPAN
+    assert Tracer(build_span_exporter("console"), sample_rate=0).start_span("não amostrado") is NOOP_SPAN
+
+
+# ===== Testes para services/logging_config.py =====
+def test_sampling_filter_keeps_warnings_and_samples_info_excess(monkeypatch):
+    import logging
+    from services import logging_config
+    from services.logging_config import SamplingFilter
+
+    monkeypatch.setattr(logging_config.time, "monotonic", lambda: 100.0)
+    sampler = SamplingFilter(max_per_second=2, sample_rate=0.5)
+    info = logging.makeLogRecord({"levelno": logging.INFO, "levelname": "INFO"})
+    warning = logging.makeLogRecord({"levelno": logging.WARNING, "levelname": "WARNING"})
+
+    kept = [sampler.filter(info) for _ in range(10)]
+    assert kept == [True, True, False, True, False, True, False, True, False, True]
+    assert sampler.dropped == 4
+    assert all(sampler.filter(warning) for _ in range(5))
+
+    monkeypatch.setattr(logging_config.time, "monotonic", lambda: 101.0)
+    assert sampler.filter(info)
+    assert SamplingFilter().filter(info)
+
+
+def test_configure_logging_writes_json_lines_in_background():
+    import io
+    import logging
+    from services import tracing
+    from services.logging_config import AsyncQueueHandler, configure_logging
+
+    stream = io.StringIO()
+    root = logging.getLogger()
+    previous_level = root.level
+    pipeline = configure_logging(level="INFO", log_format="json", stream=stream)
+    try:
+        assert pipeline.handler in root.handlers
+        token = tracing._request_id.set("req-1")
+        try:
+            logging.getLogger("teste.logs").info("Usuário %s gerou %d questões.", "123", 5, extra={"theme": "python"})
+        finally:
+            tracing._request_id.reset(token)
+        try:
+            raise ValueError("falhou")
+        except ValueError:
+            logging.getLogger("teste.logs").error("Erro no processamento.", exc_info=True)
+        logging.getLogger("teste.logs").debug("Descartado pelo nível.")
+    finally:
+        pipeline.stop()
+        root.setLevel(previous_level)
+
+    assert pipeline.handler not in root.handlers
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["message"] == "Usuário 123 gerou 5 questões."
+    assert lines[0]["level"] == "INFO"
+    assert lines[0]["logger"] == "teste.logs"
+    assert lines[0]["request_id"] == "req-1"
+    assert lines[0]["theme"] == "python"
+    assert lines[1]["request_id"] is None
+    assert "ValueError: falhou" in lines[1]["exception"]
+
+    import queue
+    handler = AsyncQueueHandler(queue.Queue(maxsize=1))
+    record = logging.makeLogRecord({"msg": "a"})
+    handler.handle(record)
+    handler.handle(record)
+    assert handler.dropped == 1
+
+
+# ===== Testes para services/fair_scheduler.py =====
+def test_fair_scheduler_interleaves_tenants_by_weight():
+    from services.exceptions import QuotaExceededError, UpstreamUnavailableError
+    from services.fair_scheduler import FairScheduler, parse_tenant_weights
+
+    async def scenario():
+        scheduler = FairScheduler(concurrency=1, tenant_max_queued=3, weights=parse_tenant_weights("vip=2"))
+        order = []
+        release = asyncio.Event()
+
+        async def call(tenant):
+            async with scheduler.slot(tenant):
+                order.append(tenant)
+                await release.wait()
+
+        tasks = [asyncio.create_task(call("professor"))]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(call("professor")) for _ in range(3)]
+        tasks += [asyncio.create_task(call("vip")) for _ in range(2)]
+        tasks.append(asyncio.create_task(call("aluno")))
+        await asyncio.sleep(0)
+        assert scheduler.stats()["queued"] == 6
+
+        with pytest.raises(QuotaExceededError):
+            await scheduler.acquire("professor", time.monotonic() + 1)
+        with pytest.raises(UpstreamUnavailableError):
+            await scheduler.acquire("aluno", time.monotonic() + 0.01)
+
+        release.set()
+        await asyncio.gather(*tasks)
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(scenario())
+    # Após a primeira chamada do professor, os usuários que ainda não usaram o serviço vêm à frente,
+    # e o peso 2 dá ao usuário vip duas chamadas para cada uma dos demais
+    assert order == ["professor", "vip", "vip", "aluno", "professor", "professor", "professor"]
+    assert stats == {"in_flight": 0, "queued": 0, "queued_tenants": 0, "rejected": 1}
+
+    with pytest.raises(ValueError):
+        parse_tenant_weights("vip=0")
+
+
+def test_tenant_budgets_reject_until_refilled(monkeypatch):
+    from services import fair_scheduler
+    from services.exceptions import QuotaExceededError
+    from services.fair_scheduler import TenantBudgets
+
+    now = [100.0]
+    monkeypatch.setattr(fair_scheduler.time, "monotonic", lambda: now[0])
+    budgets = TenantBudgets(tokens_per_minute=600)
+    budgets.check("professor")
+    budgets.charge("professor", 900)
+    budgets.check("aluno")
+
+    with pytest.raises(QuotaExceededError) as error:
+        budgets.check("professor")
+    assert error.value.retry_after == pytest.approx(30.1)
+
+    now[0] += 31
+    budgets.check("professor")
+    assert budgets.balance("professor") == pytest.approx(10)
+    assert budgets.stats() == {"tenants": 2, "rejected": 1}
+
+
+# ===== Testes para services/similarity_index.py =====
+def test_similarity_index_reuses_assessment_of_near_duplicate_answer():
+    from models import Assessment
+    from services.similarity_index import SimilarAssessmentIndex, make_question_key, normalize_portuguese
+
+    assert normalize_portuguese("A fotossíntese produz OXIGÊNIO!") == normalize_portuguese("fotossintese, produz oxigenio")
+    assert normalize_portuguese("A fotossíntese produz oxigênio.") != normalize_portuguese("produz oxigenio, fotossintese")
+
+    index = SimilarAssessmentIndex(threshold=0.8)
+    key = make_question_key("O que a fotossíntese produz?", "modelo", "v1")
+    answer = "A fotossíntese transforma luz, água e gás carbônico em glicose e libera oxigênio."
+    index.add(key, answer, Assessment(feedback="Correto.", score="100%"))
+
+    reused = index.lookup(key, "a fotossintese transforma luz agua e gas carbonico em glicose, libera oxigenio")
+    assert reused.reused and reused.similarity == 1.0 and reused.score_value == 100
+    similar = index.lookup(key, "Fotossíntese transforma luz, água e gás carbônico em glicose e libera oxigênio puro.")
+    assert similar.reused and 0.8 <= similar.similarity < 1
+
+    assert index.lookup(key, "A fotossíntese não libera oxigênio.") is None
+    assert index.lookup(make_question_key("Outra pergunta?", "modelo", "v1"), answer) is None
+    assert index.stats()["hits"] == 2 and index.stats()["misses"] == 2
+
+    index.add(key, "Resposta reaproveitada", reused)
+    assert index.lookup(key, "Resposta reaproveitada") is None
+
+
+def test_similarity_index_default_threshold_rejects_one_word_substitution():
+    from models import Assessment
+    from services.similarity_index import SimilarAssessmentIndex, jaccard, make_question_key, normalize_portuguese, shingles
+    index = SimilarAssessmentIndex()
+    key = make_question_key("Explique a fotossíntese.", "modelo", "v1")
+    answer = ("As plantas usam a energia da luz solar para converter água e gás carbônico em glicose, "
+              "liberando oxigênio para a atmosfera durante o processo realizado nos cloroplastos das folhas verdes.")
+    wrong = answer.replace("liberando oxigênio", "liberando nitrogênio")
+    index.add(key, answer, Assessment(feedback="Correto.", score="90%"))
+
+    assert jaccard(shingles(normalize_portuguese(answer)), shingles(normalize_portuguese(wrong))) > 0.75
+    assert index.lookup(key, wrong) is None
+    assert index.lookup(key, answer.upper()).score == "90%"
+
+
+def test_similarity_index_distinguishes_word_order():
+    from models import Assessment
+    from services.similarity_index import SimilarAssessmentIndex, make_question_key
+    key = make_question_key("Qual número é maior, 2 ou 3?", "modelo", "v1")
+    for threshold in (1.0, 0.5):
+        index = SimilarAssessmentIndex(threshold=threshold)
+        index.add(key, "2 é maior que 3", Assessment(feedback="Incorreto.", score="0%"))
+        assert index.lookup(key, "3 é maior que 2") is None
+        assert index.lookup(key, "2 é MAIOR que 3!").similarity == 1.0
+
+
+def test_async_groq_service_analyze_response_uses_similarity_index(monkeypatch):
+    from services.groq_service import AsyncGroqService
+    from services.similarity_index import SimilarAssessmentIndex
+    service = AsyncGroqService(api_key="dummy_key", similarity_index=SimilarAssessmentIndex())
+    calls = []
+
+    async def analysis_completion(messages, model, **kwargs):
+        calls.append(messages)
+        return DummyCompletion('{"score": "80%", "feedback": "Bom trabalho."}')
+
+    monkeypatch.setattr(service.client.chat.completions, "create", analysis_completion)
+
+    async def scenario():
+        first = await service.analyze_response("Qual é a capital do Brasil?", "A capital é Brasília.")
+        second = await service.analyze_response("Qual é a capital do Brasil?", "a capital e Brasilia!")
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert not first.reused and first.similarity is None
+    assert second.reused and second.similarity == 1.0
+    assert second.feedback == first.feedback
+
+
+# ===== Testes para serve.py =====
+
+def test_server_workers_require_shared_job_queue():
+    pytest.importorskip("uvicorn")
+    from config import Settings
+    from serve import server_options, server_workers
+    settings = Settings(_env_file=None, groq_api_key="dummy_key", secret_key="testsecret", algorithm="HS256")
+    assert server_options(settings)["workers"] == 1
+
+    # Com a fila em memória, as tarefas só seriam visíveis no processo que as recebeu
+    assert server_workers(settings.model_copy(update={"server_workers": 4})) == 1
+    shared = settings.model_copy(update={"server_workers": 4, "job_queue_backend": "sqlite"})
+    assert server_workers(shared) == 4
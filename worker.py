@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import signal
+
+from config import get_settings
+from main import build_groq_service, setup_logging
+from services.job_handlers import build_job_handlers
+from services.job_queue import JobQueue, SQLiteJobStore
+
+# Configura o logger para o módulo atual
+logger = logging.getLogger(__name__)
+
+
+async def run_worker(workers: int):
+    """
+    Executa a fila de tarefas neste processo até receber SIGTERM ou SIGINT.
+
+    As tarefas são consumidas do armazenamento SQLite compartilhado com a API, de modo que
+    vários processos (e várias máquinas com o mesmo volume) dividem a carga.
+
+    Args:
+        workers (int): Quantidade de workers asyncio no processo.
+    """
+    settings = get_settings()
+    service = build_groq_service(settings)
+    queue = JobQueue(
+        store=SQLiteJobStore(settings.job_queue_sqlite_path),
+        handlers=build_job_handlers(service),
+        workers=workers,
+        poll_interval=settings.job_poll_interval,
+        job_timeout=settings.job_timeout,
+        result_ttl=settings.job_result_ttl
+    )
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stopping.set)
+
+    await queue.start()
+    try:
+        await stopping.wait()
+    finally:
+        await queue.stop(drain_timeout=settings.job_drain_timeout)
+        await service.close()
+
+
+def _process_main(workers: int):
+    pipeline = setup_logging(get_settings())
+    try:
+        asyncio.run(run_worker(workers))
+    finally:
+        pipeline.stop()
+
+
+def main():
+    """
+    Inicia os processos de trabalho da fila de tarefas (requer `JOB_QUEUE_BACKEND=sqlite`).
+
+    Ex.: `python worker.py --processes 4 --workers 8`.
+    """
+    settings = get_settings()
+    parser = argparse.ArgumentParser(description="Processos de trabalho da fila de tarefas assíncronas.")
+    parser.add_argument("--processes", type=int, default=settings.job_worker_processes,
+                        help="Quantidade de processos de trabalho")
+    parser.add_argument("--workers", type=int, default=settings.job_workers or 4,
+                        help="Quantidade de workers asyncio por processo")
+    args = parser.parse_args()
+    if settings.job_queue_backend != "sqlite":
+        parser.error("Os processos de trabalho exigem JOB_QUEUE_BACKEND=sqlite.")
+    if args.processes < 1 or args.workers < 1:
+        parser.error("--processes e --workers devem ser maiores que zero.")
+
+    if args.processes == 1:
+        _process_main(args.workers)
+        return
+    processes = [multiprocessing.Process(target=_process_main, args=(args.workers,))
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        # O sinal de término é repassado a cada processo, que conclui o encerramento por conta própria
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, forward)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()